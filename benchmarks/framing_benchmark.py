@@ -0,0 +1,81 @@
+"""Loopback throughput benchmark for the SecureTunnel stream framing.
+
+Usage: python -m benchmarks.framing_benchmark [--frames N] [--size BYTES]
+"""
+import argparse
+import socket
+import threading
+import time
+from ezlan.network.framing import FrameReader, FRAME_HEADER, encode_frame
+
+
+def _sender(sock, frames, size, batch=64):
+    """Write frames in large batches so the receive side is the bottleneck"""
+    chunk = encode_frame(b'\x00' * size) * batch
+    full, rest = divmod(frames, batch)
+    for _ in range(full):
+        sock.sendall(chunk)
+    sock.sendall(encode_frame(b'\x00' * size) * rest)
+    sock.shutdown(socket.SHUT_WR)
+
+
+def _naive_receive(sock, frames):
+    """Baseline: two recv calls and a fresh bytes object per frame"""
+    def recv_exact(size):
+        buffer = b''
+        while len(buffer) < size:
+            buffer += sock.recv(size - len(buffer))
+        return buffer
+
+    total = 0
+    for _ in range(frames):
+        length = FRAME_HEADER.unpack(recv_exact(FRAME_HEADER.size))[0]
+        total += len(recv_exact(length))
+    return total, None
+
+
+def _reader_receive(sock, frames):
+    reader = FrameReader(sock)
+    total = 0
+    count = 0
+    while count < frames:
+        for frame in reader.read_frames():
+            total += len(frame)
+            count += 1
+    return total, reader.recv_calls
+
+
+def run(receiver, frames, size):
+    server, client = socket.socketpair()
+    for sock in (server, client):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+
+    sender = threading.Thread(target=_sender, args=(client, frames, size), daemon=True)
+    start = time.perf_counter()
+    sender.start()
+    total, recv_calls = receiver(server, frames)
+    elapsed = time.perf_counter() - start
+    sender.join()
+    server.close()
+    client.close()
+    return elapsed, total, recv_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=200000)
+    parser.add_argument('--size', type=int, default=1200, help="payload bytes per frame")
+    args = parser.parse_args()
+
+    for name, receiver in (('naive recv', _naive_receive), ('FrameReader', _reader_receive)):
+        elapsed, total, recv_calls = run(receiver, args.frames, args.size)
+        line = (f"{name:12s} {args.frames / elapsed:12,.0f} frames/s "
+                f"{total / elapsed / (1024 * 1024):10,.1f} MB/s")
+        if recv_calls:
+            line += f"  {args.frames / recv_calls:6.1f} frames/recv"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
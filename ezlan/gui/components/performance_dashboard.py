@@ -5,14 +5,24 @@ import pyqtgraph as pg
 import numpy as np
 import qasync
 import asyncio
+from ezlan.network.analytics import SCORE_METRICS
+from ezlan.network.metrics_store import MetricRing
+from ezlan.network.scoring import get_scoring_engine
+from ezlan.utils.logger import Logger
+
+# Plotted series, in display units
+PLOT_COLUMNS = ('latency', 'bandwidth', 'packet_loss')
 
 class PerformanceDashboard(QWidget):
     def __init__(self, tunnel_service, parent=None):
         super().__init__(parent)
+        self.logger = Logger("PerformanceDashboard")
         self.tunnel_service = tunnel_service
         self.setMinimumWidth(400)
-        self.history_length = 60  # 60 seconds of history
+        self.history_length = 600  # samples kept per user (10 minutes at 1Hz), memory stays fixed
         self.user_plots = {}  # Store plots for each user
+        self._tab_users = {}  # tab widget -> user name, for O(1) lookup on tab changes
+        self.scoring = get_scoring_engine('connection')
         self._running = True
         self._setup_ui()
         
@@ -24,6 +34,7 @@ class PerformanceDashboard(QWidget):
     def _setup_ui(self):
         layout = QVBoxLayout(self)
         self.tab_widget = QTabWidget()
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
         layout.addWidget(self.tab_widget)
         
         # Overview tab
@@ -45,29 +56,65 @@ class PerformanceDashboard(QWidget):
         overview_layout.addWidget(self.bandwidth_plot)
         overview_layout.addWidget(self.packet_loss_plot)
         
+        # Aggregates over every peer (mean latency, total bandwidth, mean loss)
+        self.overview = {
+            'widget': overview_widget,
+            'curves': {
+                'latency': self.latency_plot.plot(),
+                'bandwidth': self.bandwidth_plot.plot(),
+                'packet_loss': self.packet_loss_plot.plot()
+            },
+            'history': MetricRing(PLOT_COLUMNS, self.history_length)
+        }
+        
         self.tab_widget.addTab(overview_widget, "Overview")
         
     def _update_metrics(self):
-        """Update metrics for all active connections - non-async version"""
+        """Buffer every peer's metrics and redraw only the tab on screen"""
         try:
-            for user_name, tunnel in self.tunnel_service.active_tunnels.items():
-                metrics = self.tunnel_service.network_analytics.get_current_metrics(user_name)
-                
+            # One lock-free read gives a consistent view of every connection
+            snapshot = self.tunnel_service.network_analytics.get_snapshot()
+            users = list(self.tunnel_service.active_tunnels)
+            all_metrics = [snapshot.get(user_name) for user_name in users]
+            
+            for user_name, metrics in zip(users, all_metrics):
                 # Add user tab if it doesn't exist
-                if not any(user_name in self.tab_widget.tabText(i) for i in range(self.tab_widget.count())):
+                if user_name not in self.user_plots:
                     self.add_user_tab(user_name)
                 
                 # Update plots only if we have metrics
                 if metrics:
                     self.update_user_plots(user_name, metrics)
                     
-                # Update health score (will be 0 if no metrics)
-                health_score = self.calculate_health_score(metrics)
-                self.health_score.setValue(int(health_score * 100))
+            if all_metrics:
+                matrix = self._metrics_matrix(all_metrics)
+                # Network health is the mean score over all peers (0 for peers without metrics)
+                scores = self.scoring.score_matrix(matrix, SCORE_METRICS)
+                self.health_score.setValue(int(scores.mean() * 100))
+                self._update_overview(matrix)
                 
         except Exception as e:
-            print(f"Error updating metrics: {e}")
+            self.logger.error(f"Error updating metrics: {e}")
+
+    def _update_overview(self, matrix):
+        """Append one aggregated sample over all peers to the overview plots"""
+        reported = matrix[~np.isnan(matrix[:, 0])]
+        if not len(reported):
+            return
+        latency, packet_loss, bandwidth = (reported[:, SCORE_METRICS.index(name)]
+                                           for name in ('latency', 'packet_loss', 'bandwidth'))
+        self.overview['history'].append((
+            latency.mean(),
+            bandwidth.sum() / (1024*1024),  # Convert to MB/s
+            packet_loss.mean() * 100  # Convert to percentage
+        ))
+        if self._is_on_screen(self.overview):
+            self._render_user(self.overview)
             
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._on_tab_changed(self.tab_widget.currentIndex())
+
     def closeEvent(self, event):
         """Handle widget close event"""
         self._running = False
@@ -80,6 +127,9 @@ class PerformanceDashboard(QWidget):
         plot_widget.setLabel('left', title)
         plot_widget.setLabel('bottom', 'Time (s)')
         plot_widget.showGrid(x=True, y=True)
+        # Only draw what is in view, reduced to about one point per pixel
+        plot_widget.setClipToView(True)
+        plot_widget.setDownsampling(auto=True, mode='peak')
         return plot_widget
         
     def add_user_tab(self, user_name):
@@ -88,55 +138,72 @@ class PerformanceDashboard(QWidget):
         user_widget = QWidget()
         layout = QVBoxLayout(user_widget)
         
-        # Create plots for this user
-        latency_plot = self.create_plot("Latency (ms)")
-        bandwidth_plot = self.create_plot("Bandwidth (MB/s)")
-        packet_loss_plot = self.create_plot("Packet Loss (%)")
-        
-        layout.addWidget(latency_plot)
-        layout.addWidget(bandwidth_plot)
-        layout.addWidget(packet_loss_plot)
+        # Create plots for this user, each with one persistent curve
+        plots = {
+            'latency': self.create_plot("Latency (ms)"),
+            'bandwidth': self.create_plot("Bandwidth (MB/s)"),
+            'packet_loss': self.create_plot("Packet Loss (%)")
+        }
+        for plot in plots.values():
+            layout.addWidget(plot)
         
-        # Store the plots for updates
+        # Store the curves and their fixed-size history for updates
         self.user_plots[user_name] = {
-            'latency': latency_plot,
-            'bandwidth': bandwidth_plot,
-            'packet_loss': packet_loss_plot
+            'widget': user_widget,
+            'curves': {name: plots[name].plot() for name in PLOT_COLUMNS},
+            'history': MetricRing(PLOT_COLUMNS, self.history_length)
         }
         
         # Add the tab
+        self._tab_users[user_widget] = user_name
         self.tab_widget.addTab(user_widget, user_name)
         
     def update_user_plots(self, user_name, metrics):
-        """Update the plots for a specific user"""
-        if user_name not in self.user_plots:
+        """Record a user's latest metrics and redraw their plots if they are on screen"""
+        if user_name not in self.user_plots or not metrics:
             return
             
-        plots = self.user_plots[user_name]
-        
-        # Update each plot with new data
-        if metrics:
-            plots['latency'].plot([metrics.avg_latency])
-            plots['bandwidth'].plot([metrics.bandwidth_utilization / (1024*1024)])  # Convert to MB/s
-            plots['packet_loss'].plot([metrics.packet_loss * 100])  # Convert to percentage
+        user = self.user_plots[user_name]
+        user['history'].append((
+            metrics.avg_latency,
+            metrics.bandwidth_utilization / (1024*1024),  # Convert to MB/s
+            metrics.packet_loss * 100  # Convert to percentage
+        ))
+        # Hidden tabs keep buffering and are drawn when they are shown
+        if self._is_on_screen(user):
+            self._render_user(user)
+
+    def _is_on_screen(self, user):
+        return self.isVisible() and self.tab_widget.currentWidget() is user['widget']
+
+    def _render_user(self, user):
+        """Replace each curve's data with the buffered history; x is seconds before now"""
+        history = user['history'].values()
+        x = np.arange(1 - len(history), 1, dtype=np.float32)
+        for i, name in enumerate(PLOT_COLUMNS):
+            user['curves'][name].setData(x, history[:, i])
+
+    def _on_tab_changed(self, index):
+        widget = self.tab_widget.widget(index)
+        if widget is self.overview['widget']:
+            self._render_user(self.overview)
+        elif widget in self._tab_users:
+            self._render_user(self.user_plots[self._tab_users[widget]])
             
     def calculate_health_score(self, metrics):
         """Calculate overall health score based on multiple metrics"""
-        if not metrics:
-            return 0.0  # Return 0 if no metrics available
-        
-        try:
-            # Calculate individual scores with safety checks
-            latency_score = max(0, 1 - (metrics.avg_latency / 200)) if metrics.avg_latency is not None else 0
-            packet_loss_score = max(0, 1 - (metrics.packet_loss * 20)) if metrics.packet_loss is not None else 0
-            bandwidth_score = min(1, metrics.bandwidth_utilization / (1024 * 1024)) if metrics.bandwidth_utilization is not None else 0
-            
-            # Calculate weighted average
-            return (latency_score * 0.4 + packet_loss_score * 0.4 + bandwidth_score * 0.2)
-            
-        except Exception as e:
-            print(f"Error calculating health score: {e}")
-            return 0.0
+        return float(self.calculate_health_scores([metrics])[0])
+
+    def calculate_health_scores(self, metrics_list):
+        """Health scores for many connections in one call, same scale as the analytics"""
+        return self.scoring.score_matrix(self._metrics_matrix(metrics_list), SCORE_METRICS)
+
+    def _metrics_matrix(self, metrics_list):
+        """One row per connection in SCORE_METRICS order; NaN rows for peers without metrics"""
+        return np.array([
+            (m.avg_latency, m.packet_loss, m.bandwidth_utilization, m.jitter) if m else (np.nan,) * 4
+            for m in metrics_list
+        ], dtype=np.float64).reshape(-1, len(SCORE_METRICS))
 
     def _cleanup(self):
         """Clean up resources"""
@@ -145,12 +212,11 @@ class PerformanceDashboard(QWidget):
     
     def remove_user_tab(self, user_name):
         """Remove a user's tab and cleanup their plots"""
-        for i in range(self.tab_widget.count()):
-            if user_name in self.tab_widget.tabText(i):
-                self.tab_widget.removeTab(i)
-                if user_name in self.user_plots:
-                    del self.user_plots[user_name]
-                break
+        user = self.user_plots.pop(user_name, None)
+        if user:
+            self._tab_users.pop(user['widget'], None)
+            self.tab_widget.removeTab(self.tab_widget.indexOf(user['widget']))
+            user['widget'].deleteLater()
         
         # Reset health score when no connections are active
         if not self.user_plots:
@@ -1,51 +1,146 @@
-from PyQt6.QtWidgets import QListWidget, QListWidgetItem
-from PyQt6.QtCore import pyqtSignal, Qt
+from PyQt6.QtWidgets import QListView
+from PyQt6.QtCore import pyqtSignal, Qt, QAbstractListModel, QModelIndex, QTimer
 from ezlan.network.discovery import DiscoveryService
 
-class UserList(QListWidget):
+class PeerListModel(QAbstractListModel):
+    """Discovered peers keyed by name, changed only through row diffs.
+
+    ``apply`` takes the peers to insert or update and the names to remove
+    and turns them into the minimal insert/remove/dataChanged notifications,
+    so the view only repaints rows that actually changed.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._keys = []   # row -> peer name
+        self._rows = {}   # peer name -> row
+        self._peers = {}  # peer name -> peer info
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._keys)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._keys):
+            return None
+        peer = self._peers[self._keys[index.row()]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{peer['name']} ({peer['ip']})"
+        if role == Qt.ItemDataRole.UserRole:
+            return peer
+        return None
+
+    def peer(self, name):
+        return self._peers.get(name)
+
+    def names(self):
+        return list(self._keys)
+
+    def apply(self, upserts, removals=()):
+        """Apply one batch of changes: upserts is name -> info, removals a set of names"""
+        # Removals, from the bottom so earlier rows keep their index
+        rows = sorted((self._rows[name] for name in removals if name in self._rows), reverse=True)
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            name = self._keys.pop(row)
+            del self._peers[name]
+            self.endRemoveRows()
+        if rows:
+            self._rows = {name: row for row, name in enumerate(self._keys)}
+
+        # Updates in place
+        changed = [self._rows[name] for name, info in upserts.items()
+                   if name in self._peers and self._peers[name] != info]
+        for name, info in upserts.items():
+            if name in self._peers:
+                self._peers[name] = info
+        if changed:
+            self.dataChanged.emit(self.index(min(changed)), self.index(max(changed)))
+
+        # New peers appended as one block
+        added = [name for name in upserts if name not in self._rows]
+        if added:
+            first = len(self._keys)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for name in added:
+                self._rows[name] = len(self._keys)
+                self._keys.append(name)
+                self._peers[name] = upserts[name]
+            self.endInsertRows()
+
+class UserList(QListView):
     user_selected = pyqtSignal(dict)
-    
+
     def __init__(self, discovery_service: DiscoveryService):
         super().__init__()
         self.discovery_service = discovery_service
-        
+        self.peer_model = PeerListModel(self)
+        self.setModel(self.peer_model)
+        self.setUniformItemSizes(True)
+
+        # Changes collected until the event loop comes round again
+        self._pending_upserts = {}
+        self._pending_removals = set()
+        self._pending_snapshot = None
+        self._flush_scheduled = False
+
         # Connect signals
         self.discovery_service.users_updated.connect(self.update_users)
         self.discovery_service.peer_discovered.connect(self._handle_peer_discovered)
         self.discovery_service.peer_lost.connect(self._handle_peer_lost)
-        
+
         # Initial population
         self.update_users(self.discovery_service.get_known_peers())
-        
+
         # Handle double click
-        self.itemDoubleClicked.connect(self.on_user_selected)
-        
+        self.doubleClicked.connect(self.on_user_selected)
+
     def update_users(self, users):
-        """Update the list with current users"""
-        self.clear()
-        for user in users:
-            self.add_user(user)
-            
+        """Replace the list with current users; applied as a diff on the next flush"""
+        self._pending_snapshot = {user['name']: user for user in users}
+        self._pending_upserts.clear()
+        self._pending_removals.clear()
+        self._schedule_flush()
+
     def add_user(self, user_info):
-        """Add a single user to the list"""
-        item = QListWidgetItem(f"{user_info['name']} ({user_info['ip']})")
-        item.setData(1, user_info)  # Store full user info in item data
-        self.addItem(item)
-        
+        """Add or update a single user"""
+        self._pending_upserts[user_info['name']] = user_info
+        self._pending_removals.discard(user_info['name'])
+        self._schedule_flush()
+
     def remove_user(self, username):
         """Remove a user from the list"""
-        items = self.findItems(username, Qt.MatchStartsWith)
-        for item in items:
-            self.takeItem(self.row(item))
-            
+        self._pending_upserts.pop(username, None)
+        self._pending_removals.add(username)
+        self._schedule_flush()
+
     def _handle_peer_discovered(self, peer_info):
         """Handle peer discovered signal"""
         self.add_user(peer_info)
-        
+
     def _handle_peer_lost(self, peer_name):
         """Handle peer lost signal"""
         self.remove_user(peer_name)
-        
-    def on_user_selected(self, item):
-        user_data = item.data(1)
-        self.user_selected.emit(user_data)
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self._flush)
+
+    def _flush(self):
+        """Apply everything queued since the last event-loop turn in one model diff"""
+        self._flush_scheduled = False
+        upserts, removals = self._pending_upserts, self._pending_removals
+        if self._pending_snapshot is not None:
+            snapshot = self._pending_snapshot
+            snapshot.update(upserts)
+            for name in removals:
+                snapshot.pop(name, None)
+            removals = {name for name in self.peer_model.names() if name not in snapshot}
+            upserts = snapshot
+        self._pending_upserts, self._pending_removals, self._pending_snapshot = {}, set(), None
+        self.peer_model.apply(upserts, removals)
+
+    def on_user_selected(self, index):
+        user_data = index.data(Qt.ItemDataRole.UserRole)
+        if user_data:
+            self.user_selected.emit(user_data)
@@ -147,10 +147,6 @@ class MainWindow(QMainWindow):
             # Add disconnect button connection
             self.disconnect_btn.clicked.connect(self._handle_disconnect)
             
-            # Add discovery service connections
-            self.discovery_service.peer_discovered.connect(self.user_list.add_user)
-            self.discovery_service.peer_lost.connect(self.user_list.remove_user)
-            
             # Add tunnel service connections
             self.tunnel_service.connection_established.connect(self._handle_connection_established)
             self.tunnel_service.connection_failed.connect(self._handle_connection_failed)
@@ -250,6 +246,7 @@ class MainWindow(QMainWindow):
     def _handle_connection_closed(self, peer_name):
         self.logger.info(f"Connection closed with {peer_name}")
         self.connection_monitor.stop_monitoring()
+        self.performance_dashboard.remove_user_tab(peer_name)
         self.optimization_feedback.clear_user()
         self.connect_btn.setEnabled(True)
         self.disconnect_btn.setEnabled(False)
@@ -275,12 +272,7 @@ class MainWindow(QMainWindow):
                 self.disconnect_btn.setEnabled(False)
                 
                 # Clean up performance dashboard
-                for i in range(self.performance_dashboard.tab_widget.count()):
-                    if peer_name in self.performance_dashboard.tab_widget.tabText(i):
-                        self.performance_dashboard.tab_widget.removeTab(i)
-                        if peer_name in self.performance_dashboard.user_plots:
-                            del self.performance_dashboard.user_plots[peer_name]
-                        break
+                self.performance_dashboard.remove_user_tab(peer_name)
                 
                 # Reset other UI elements
                 self.optimization_feedback.set_user("")
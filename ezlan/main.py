@@ -1,5 +1,6 @@
 import sys
 import ctypes
+import multiprocessing
 import traceback
 import asyncio
 import qasync
@@ -64,6 +65,9 @@ class Application:
             if hasattr(self.main_window, 'connection_monitor'):
                 if hasattr(self.main_window.connection_monitor, 'stop'):
                     self.main_window.connection_monitor.stop()
+
+            # Close tunnel transports and cancel the data plane's keepalive task
+            self.tunnel_service.secure_tunnel.data_plane.stop()
             
             # Cleanup interface last
             if hasattr(self, 'interface_manager'):
@@ -110,6 +114,8 @@ class Application:
             return 1
 
 def main():
+    # Crypto worker processes are spawned; required for frozen builds
+    multiprocessing.freeze_support()
     try:
         if not is_admin():
             if elevate():
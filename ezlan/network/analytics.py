@@ -1,11 +1,20 @@
 from PyQt6.QtCore import QObject, pyqtSignal
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
 import time
 import threading
+import numpy as np
 from ezlan.utils.logger import Logger
+from .metrics_store import get_metrics_store
+from .scheduler import get_scheduler
+from .scoring import get_scoring_engine
+from .signal_coalescer import SignalCoalescer
 
-@dataclass
+# NetworkMetrics fields in scoring order
+SCORE_METRICS = ('latency', 'packet_loss', 'bandwidth', 'jitter')
+
+@dataclass(frozen=True)
 class NetworkMetrics:
     avg_latency: float = 0.0
     packet_loss: float = 0.0
@@ -15,100 +24,127 @@ class NetworkMetrics:
     timestamp: float = 0.0
 
 class NetworkAnalytics(QObject):
+    """Per-connection metrics published as immutable snapshots.
+
+    Writers serialize on ``_lock``, build a new mapping of frozen
+    NetworkMetrics and publish it with a single reference assignment.
+    Readers such as the dashboard just read ``active_connections`` and
+    never take the lock, so a GUI refresh cannot stall the measurement
+    side and the other way round. Updates go out through a SignalCoalescer
+    after the lock is released.
+    """
     metrics_updated = pyqtSignal(str, object)  # username, metrics
     
     def __init__(self):
         super().__init__()
         self.logger = Logger("NetworkAnalytics")
-        self.active_connections: Dict[str, NetworkMetrics] = {}
+        self.active_connections: Mapping[str, NetworkMetrics] = MappingProxyType({})
         self.running = False
         self.update_interval = 1.0  # 1 second update interval
-        self._lock = threading.Lock()
+        self._lock = threading.Lock()  # Serializes writers only
+        self.metrics_store = get_metrics_store()
+        self.scoring = get_scoring_engine('connection')
+        self.signals = SignalCoalescer(self.metrics_updated, max_rate=4, name="NetworkAnalytics")
         
     def start(self):
         """Start the analytics service"""
         self.running = True
-        self.update_thread = threading.Thread(target=self._update_loop, daemon=True)
-        self.update_thread.start()
+        self._job = get_scheduler().schedule("NetworkAnalytics", self._update_metrics, self.update_interval)
         self.logger.info("Network analytics service started")
         
     def stop(self):
         """Stop the analytics service"""
         self.running = False
-        if hasattr(self, 'update_thread'):
-            self.update_thread.join(timeout=2.0)
+        if hasattr(self, '_job'):
+            get_scheduler().cancel(self._job)
+        self.signals.stop()
         self.logger.info("Network analytics service stopped")
         
     def add_connection(self, username: str):
         """Add a new connection to monitor"""
         with self._lock:
             if username not in self.active_connections:
-                self.active_connections[username] = NetworkMetrics(timestamp=time.time())
+                self._publish({username: NetworkMetrics(timestamp=time.time())})
+                self.metrics_store.add_connection(username)
                 self.logger.info(f"Started monitoring connection: {username}")
                 
     def remove_connection(self, username: str):
         """Remove a connection from monitoring"""
         with self._lock:
             if username in self.active_connections:
-                del self.active_connections[username]
+                self._publish(removed=(username,))
+                self.metrics_store.remove_connection(username)
                 self.logger.info(f"Stopped monitoring connection: {username}")
+        self.signals.discard(username)
                 
     def update_metrics(self, username: str, metrics: NetworkMetrics):
         """Update metrics for a connection"""
         with self._lock:
-            if username in self.active_connections:
-                metrics.timestamp = time.time()
-                self.active_connections[username] = metrics
-                self.metrics_updated.emit(username, metrics)
+            if username not in self.active_connections:
+                return
+            metrics = replace(metrics, timestamp=time.time())
+            self._publish({username: metrics})
+            self.metrics_store.record(
+                username,
+                latency=metrics.avg_latency,
+                jitter=metrics.jitter,
+                packet_loss=metrics.packet_loss,
+                bandwidth=metrics.bandwidth_utilization
+            )
+        self.signals.post(username, username, metrics)
                 
     def get_current_metrics(self, username: str) -> Optional[NetworkMetrics]:
-        """Get current metrics for a connection"""
-        with self._lock:
-            return self.active_connections.get(username)
+        """Get current metrics for a connection; never blocks"""
+        return self.active_connections.get(username)
+
+    def get_snapshot(self) -> Mapping[str, NetworkMetrics]:
+        """Every connection's latest metrics as one consistent, read-only mapping"""
+        return self.active_connections
+
+    def _publish(self, changed: Dict[str, NetworkMetrics] = None, removed=()):
+        """Swap in a new snapshot; callers hold _lock"""
+        snapshot = dict(self.active_connections)
+        if changed:
+            snapshot.update(changed)
+        for username in removed:
+            snapshot.pop(username, None)
+        self.active_connections = MappingProxyType(snapshot)
             
-    def _update_loop(self):
-        """Background loop to update metrics"""
-        while self.running:
-            try:
-                current_time = time.time()
-                with self._lock:
-                    # Update metrics for each connection
-                    for username, metrics in list(self.active_connections.items()):
-                        if current_time - metrics.timestamp > 10.0:  # 10 second timeout
-                            self.logger.warning(f"Connection timeout for {username}")
-                            self.remove_connection(username)
-                            continue
-                            
-                        # Calculate connection quality based on metrics
-                        quality = self._calculate_quality(metrics)
-                        metrics.connection_quality = quality
-                        self.metrics_updated.emit(username, metrics)
-                        
-                time.sleep(self.update_interval)
-                
-            except Exception as e:
-                self.logger.error(f"Error in update loop: {e}")
-                time.sleep(1.0)  # Prevent tight loop on error
-                
-    def _calculate_quality(self, metrics: NetworkMetrics) -> float:
-        """Calculate overall connection quality score"""
+    def _update_metrics(self):
+        """Refresh quality scores; runs on the shared scheduler"""
         try:
-            # Normalize metrics to 0-1 range
-            latency_score = max(0, 1 - (metrics.avg_latency / 200))  # Up to 200ms latency
-            packet_loss_score = max(0, 1 - (metrics.packet_loss * 20))  # Up to 5% loss
-            bandwidth_score = min(1, metrics.bandwidth_utilization / (1024 * 1024))  # Up to 1MB/s
-            jitter_score = max(0, 1 - (metrics.jitter / 50))  # Up to 50ms jitter
-            
-            # Weighted average of scores
-            quality = (
-                latency_score * 0.4 +
-                packet_loss_score * 0.3 +
-                bandwidth_score * 0.2 +
-                jitter_score * 0.1
-            )
-            
-            return max(0, min(1, quality))  # Ensure result is between 0 and 1
-            
+            current_time = time.time()
+            updated = {}
+            with self._lock:
+                expired = []
+                for username, metrics in self.active_connections.items():
+                    if current_time - metrics.timestamp > 10.0:  # 10 second timeout
+                        self.logger.warning(f"Connection timeout for {username}")
+                        expired.append(username)
+                    else:
+                        updated[username] = metrics
+
+                # Calculate connection quality for every connection at once
+                if updated:
+                    scores = self._calculate_quality(list(updated.values()))
+                    for (username, metrics), quality in zip(list(updated.items()), scores):
+                        updated[username] = replace(metrics, connection_quality=float(quality))
+
+                self._publish(updated, expired)
+                for username in expired:
+                    self.metrics_store.remove_connection(username)
+
+            for username, metrics in updated.items():
+                self.signals.post(username, username, metrics)
+            for username in expired:
+                self.signals.discard(username)
+                
         except Exception as e:
-            self.logger.error(f"Error calculating quality: {e}")
-            return 0.0
+            self.logger.error(f"Error in update loop: {e}")
+
+    def _calculate_quality(self, metrics_list: List[NetworkMetrics]) -> np.ndarray:
+        """Connection quality scores for many connections in one call"""
+        matrix = np.array([
+            (m.avg_latency, m.packet_loss, m.bandwidth_utilization, m.jitter) for m in metrics_list
+        ], dtype=np.float64)
+        return self.scoring.score_matrix(matrix, SCORE_METRICS)
@@ -2,6 +2,7 @@ from PyQt6.QtCore import QObject, pyqtSignal
 import threading
 import time
 from ezlan.utils.logger import Logger
+from .scheduler import get_scheduler
 
 class AutoOptimizer(QObject):
     optimization_applied = pyqtSignal(str, str)  # user, optimization_description
@@ -19,8 +20,7 @@ class AutoOptimizer(QObject):
         """Start auto optimization"""
         try:
             self.running = True
-            self.optimizer_thread = threading.Thread(target=self._optimizer_loop, daemon=True)
-            self.optimizer_thread.start()
+            self._job = get_scheduler().schedule("AutoOptimizer", self._optimize_connections, self.update_interval)
             self.logger.info("Auto optimization started")
         except Exception as e:
             self.logger.error(f"Failed to start auto optimization: {e}")
@@ -29,8 +29,8 @@ class AutoOptimizer(QObject):
     def stop(self):
         """Stop auto optimization"""
         self.running = False
-        if hasattr(self, 'optimizer_thread'):
-            self.optimizer_thread.join(timeout=2.0)
+        if hasattr(self, '_job'):
+            get_scheduler().cancel(self._job)
         self.logger.info("Auto optimization stopped")
         
     def add_connection(self, user_name):
@@ -41,24 +41,20 @@ class AutoOptimizer(QObject):
                 'optimizations_applied': []
             }
             
-    def _optimizer_loop(self):
-        """Background loop for auto optimization"""
-        while self.running:
-            try:
-                with self._lock:
-                    now = time.time()
-                    for user_name, conn in list(self.connections.items()):
-                        # Check if enough time has passed since last optimization
-                        if now - conn['last_optimization'] > 30:  # 30 second cooldown
-                            self._optimize_connection(user_name)
-                            conn['last_optimization'] = now
-                            
-                time.sleep(self.update_interval)
-                
-            except Exception as e:
-                self.logger.error(f"Error in optimizer loop: {e}")
-                time.sleep(1.0)  # Prevent tight loop on error
-                
+    def _optimize_connections(self):
+        """Optimize connections past their cooldown; runs on the shared scheduler"""
+        try:
+            with self._lock:
+                now = time.time()
+                for user_name, conn in list(self.connections.items()):
+                    # Check if enough time has passed since last optimization
+                    if now - conn['last_optimization'] > 30:  # 30 second cooldown
+                        self._optimize_connection(user_name)
+                        conn['last_optimization'] = now
+                        
+        except Exception as e:
+            self.logger.error(f"Error in optimizer loop: {e}")
+
     def _optimize_connection(self, user_name):
         """Apply optimizations for a connection"""
         try:
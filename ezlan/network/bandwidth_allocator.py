@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Dict, List
 import numpy as np
 from PyQt6.QtCore import QObject, pyqtSignal
+from .metrics_store import get_metrics_store
 
 @dataclass
 class BandwidthAllocation:
@@ -16,7 +17,7 @@ class BandwidthAllocator(QObject):
         super().__init__()
         self.total_bandwidth = total_bandwidth
         self.allocations: Dict[str, BandwidthAllocation] = {}
-        self.usage_history: Dict[str, List[float]] = {}
+        self.metrics_store = get_metrics_store()  # Bandwidth usage history per connection
         
     def add_connection(self, user_name, initial_weight=0.5):
         self.allocations[user_name] = BandwidthAllocation(
@@ -24,7 +25,11 @@ class BandwidthAllocator(QObject):
             burst_bandwidth=int(self.total_bandwidth * 0.8),
             weight=initial_weight
         )
-        self.usage_history[user_name] = []
+        self.metrics_store.add_connection(user_name)
+
+    def remove_connection(self, user_name):
+        if self.allocations.pop(user_name, None) is not None:
+            self.metrics_store.remove_connection(user_name)
         
     def update_allocation(self):
         if not self.allocations:
@@ -35,7 +40,8 @@ class BandwidthAllocator(QObject):
         
         # Calculate fair share based on weights and usage history
         for user_name, allocation in self.allocations.items():
-            usage = np.mean(self.usage_history[user_name][-10:]) if self.usage_history[user_name] else 0
+            history = self.metrics_store.get(user_name)
+            usage = history.mean('bandwidth') if history is not None else 0
             fair_share = (allocation.weight / total_weight) * available_bandwidth
             
             # Adjust based on historical usage
@@ -4,6 +4,8 @@ from collections import deque
 from threading import Lock
 import threading
 from ezlan.utils.logger import Logger
+from .scheduler import get_scheduler
+from .signal_coalescer import SignalCoalescer
 
 class BandwidthMonitor(QObject):
     bandwidth_updated = pyqtSignal(str, float, float)  # user, upload_speed, download_speed
@@ -15,13 +17,13 @@ class BandwidthMonitor(QObject):
         self.connections = {}
         self._lock = threading.Lock()
         self.update_interval = 1.0  # 1 second update interval
+        self.signals = SignalCoalescer(self.bandwidth_updated, max_rate=4, name="BandwidthMonitor")
         
     def start(self):
         """Start bandwidth monitoring"""
         try:
             self.running = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
+            self._job = get_scheduler().schedule("BandwidthMonitor", self._check_connections, self.update_interval)
             self.logger.info("Bandwidth monitoring started")
         except Exception as e:
             self.logger.error(f"Failed to start bandwidth monitoring: {e}")
@@ -30,8 +32,9 @@ class BandwidthMonitor(QObject):
     def stop(self):
         """Stop bandwidth monitoring"""
         self.running = False
-        if hasattr(self, 'monitor_thread'):
-            self.monitor_thread.join(timeout=2.0)
+        if hasattr(self, '_job'):
+            get_scheduler().cancel(self._job)
+        self.signals.stop()
         self.logger.info("Bandwidth monitoring stopped")
         
     def add_connection(self, user_name):
@@ -44,41 +47,38 @@ class BandwidthMonitor(QObject):
     
     def update_bytes(self, user_name, upload_bytes, download_bytes):
         with self._lock:
-            if user_name in self.connections:
-                now = time.time()
-                elapsed = now - self.connections[user_name]['last_update']
-                
-                # Calculate speeds in KB/s
-                upload_speed = upload_bytes / elapsed / 1024
-                download_speed = download_bytes / elapsed / 1024
-                
-                # Store measurements
-                self.connections[user_name]['upload_bytes'].append(upload_speed)
-                self.connections[user_name]['download_bytes'].append(download_speed)
-                self.connections[user_name]['last_update'] = now
-                
-                # Calculate average speeds
-                avg_upload = sum(self.connections[user_name]['upload_bytes']) / len(
-                    self.connections[user_name]['upload_bytes'])
-                avg_download = sum(self.connections[user_name]['download_bytes']) / len(
-                    self.connections[user_name]['download_bytes'])
-                
-                self.bandwidth_updated.emit(user_name, avg_upload, avg_download)
+            if user_name not in self.connections:
+                return
+            conn = self.connections[user_name]
+            now = time.time()
+            elapsed = now - conn['last_update']
+            
+            # Calculate speeds in KB/s
+            upload_speed = upload_bytes / elapsed / 1024
+            download_speed = download_bytes / elapsed / 1024
+            
+            # Store measurements
+            conn['upload_bytes'].append(upload_speed)
+            conn['download_bytes'].append(download_speed)
+            conn['last_update'] = now
+            
+            # Calculate average speeds
+            avg_upload = sum(conn['upload_bytes']) / len(conn['upload_bytes'])
+            avg_download = sum(conn['download_bytes']) / len(conn['download_bytes'])
+            
+        # Per-call updates are collapsed to the latest value per user
+        self.signals.post(user_name, user_name, avg_upload, avg_download)
 
-    def _monitor_loop(self):
-        """Background monitoring loop"""
-        while self.running:
-            try:
-                with self._lock:
-                    now = time.time()
-                    # Check for stale connections
-                    for conn_id, conn in list(self.connections.items()):
-                        if now - conn['last_update'] > 10.0:  # 10 second timeout
-                            self.logger.warning(f"Connection {conn_id} timed out")
-                            del self.connections[conn_id]
-                            
-                time.sleep(self.update_interval)
-                
-            except Exception as e:
-                self.logger.error(f"Error in monitor loop: {e}")
-                time.sleep(1.0)  # Prevent tight loop on error
+    def _check_connections(self):
+        """Drop connections that stopped reporting; runs on the shared scheduler"""
+        try:
+            with self._lock:
+                now = time.time()
+                # Check for stale connections
+                for conn_id, conn in list(self.connections.items()):
+                    if now - conn['last_update'] > 10.0:  # 10 second timeout
+                        self.logger.warning(f"Connection {conn_id} timed out")
+                        del self.connections[conn_id]
+                        
+        except Exception as e:
+            self.logger.error(f"Error in monitor loop: {e}")
\ No newline at end of file
@@ -0,0 +1,185 @@
+import math
+import os
+import zlib
+from collections import deque
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+DEFAULT_TARGET = 0.005  # seconds of standing queue delay, RFC 8289
+
+
+class _Flow:
+    __slots__ = ('packets', 'bytes', 'deficit', 'active', 'first_above_time',
+                 'drop_next', 'count', 'last_count', 'dropping')
+
+    def __init__(self):
+        self.packets = deque()  # (enqueue time, packet)
+        self.bytes = 0
+        self.deficit = 0
+        self.active = False
+        # CoDel state
+        self.first_above_time = 0.0
+        self.drop_next = 0.0
+        self.count = 0
+        self.last_count = 0
+        self.dropping = False
+
+
+class FQCoDelQueue:
+    """Flow-queueing CoDel (RFC 8290) for one user's traffic.
+
+    Packets are hashed by their IPv4 5-tuple into flow queues served by
+    deficit round robin, with new (sparse) flows ahead of old ones, so a
+    game's small packets are not stuck behind a bulk transfer. Each flow
+    runs CoDel (RFC 8289): once the sojourn time stays above ``target`` for
+    ``interval`` it drops packets at dequeue, at a rate that grows with the
+    square root of the drop count. The total is capped at ``byte_limit``;
+    on overflow the head of the fattest flow is dropped.
+    """
+
+    def __init__(self, target=DEFAULT_TARGET, interval=0.1, quantum=1514,
+                 byte_limit=1024 * 1024, flow_count=1024):
+        self.target = target
+        self.interval = interval
+        self.quantum = quantum
+        self.byte_limit = byte_limit
+        self.flow_count = flow_count
+        self.flows = {}
+        self.new_flows = deque()
+        self.old_flows = deque()
+        self.bytes = 0
+        self.packets = 0
+        self.codel_drops = 0
+        self.overflow_drops = 0
+        self._perturbation = os.urandom(4)
+
+    def __len__(self):
+        return self.packets
+
+    def enqueue(self, packet, now) -> int:
+        """Queue a packet; returns the number of packets dropped to make room"""
+        index = self.flow_index(packet)
+        flow = self.flows.get(index)
+        if flow is None:
+            flow = self.flows[index] = _Flow()
+
+        flow.packets.append((now, packet))
+        flow.bytes += len(packet)
+        self.bytes += len(packet)
+        self.packets += 1
+        if not flow.active:
+            flow.active = True
+            flow.deficit = self.quantum
+            self.new_flows.append(flow)
+
+        dropped = 0
+        while self.bytes > self.byte_limit:
+            fattest = max(self.flows.values(), key=lambda f: f.bytes)
+            self._pop(fattest)
+            dropped += 1
+        self.overflow_drops += dropped
+        return dropped
+
+    def dequeue(self, now):
+        """Return the next packet to send or None when empty"""
+        while True:
+            if self.new_flows:
+                flows = self.new_flows
+            elif self.old_flows:
+                flows = self.old_flows
+            else:
+                return None
+
+            flow = flows[0]
+            if flow.deficit <= 0:
+                flow.deficit += self.quantum
+                flows.popleft()
+                self.old_flows.append(flow)
+                continue
+
+            packet = self._codel_dequeue(flow, now)
+            if packet is None:
+                flows.popleft()
+                if flows is self.new_flows:
+                    # An emptied new flow lingers as old so it cannot jump the queue again
+                    self.old_flows.append(flow)
+                else:
+                    flow.active = False
+                continue
+
+            flow.deficit -= len(packet)
+            return packet
+
+    def flow_index(self, packet) -> int:
+        key = bytes(packet[9:10]) + bytes(packet[12:20])
+        if len(packet) >= 20 and packet[9] in (IPPROTO_TCP, IPPROTO_UDP):
+            header_length = (packet[0] & 0x0F) * 4
+            key += bytes(packet[header_length:header_length + 4])
+        return zlib.crc32(self._perturbation + key) % self.flow_count
+
+    def get_stats(self) -> dict:
+        return {
+            'packets': self.packets,
+            'bytes': self.bytes,
+            'flows': sum(1 for flow in self.flows.values() if flow.packets),
+            'codel_drops': self.codel_drops,
+            'overflow_drops': self.overflow_drops,
+        }
+
+    def _pop(self, flow):
+        timestamp, packet = flow.packets.popleft()
+        flow.bytes -= len(packet)
+        self.bytes -= len(packet)
+        self.packets -= 1
+        return timestamp, packet
+
+    def _control_law(self, t, count):
+        return t + self.interval / math.sqrt(count)
+
+    def _should_drop(self, flow, timestamp, now) -> bool:
+        sojourn = now - timestamp
+        if sojourn < self.target or flow.bytes <= self.quantum:
+            flow.first_above_time = 0.0
+            return False
+        if flow.first_above_time == 0.0:
+            flow.first_above_time = now + self.interval
+            return False
+        return now >= flow.first_above_time
+
+    def _codel_dequeue(self, flow, now):
+        if not flow.packets:
+            flow.first_above_time = 0.0
+            return None
+
+        timestamp, packet = self._pop(flow)
+        ok_to_drop = self._should_drop(flow, timestamp, now)
+
+        if flow.dropping:
+            if not ok_to_drop:
+                flow.dropping = False
+            while flow.dropping and now >= flow.drop_next:
+                self.codel_drops += 1
+                flow.count += 1
+                if not flow.packets:
+                    flow.dropping = False
+                    return None
+                timestamp, packet = self._pop(flow)
+                if self._should_drop(flow, timestamp, now):
+                    flow.drop_next = self._control_law(flow.drop_next, flow.count)
+                else:
+                    flow.dropping = False
+        elif ok_to_drop:
+            self.codel_drops += 1
+            if not flow.packets:
+                return None
+            timestamp, packet = self._pop(flow)
+            flow.dropping = True
+            delta = flow.count - flow.last_count
+            if delta > 1 and now - flow.drop_next < 16 * self.interval:
+                flow.count = delta
+            else:
+                flow.count = 1
+            flow.drop_next = self._control_law(now, flow.count)
+            flow.last_count = flow.count
+
+        return packet
@@ -0,0 +1,314 @@
+import multiprocessing
+import struct
+import threading
+import zlib
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from .record_layer import RecordError, RecordLayer
+from ..utils.logger import Logger
+
+# Operations carried in ring entries
+OP_SEAL = 1      # request: plaintext -> record
+OP_OPEN = 2      # request: record -> plaintext
+OP_SEALED = 3    # response: sealed record
+OP_OPENED = 4    # response: authenticated plaintext
+OP_DROPPED = 5   # response: request failed (bad record or unknown peer); record type is the request op
+
+RING_HEADER = struct.Struct('=QQ')      # head, tail (monotonic byte counters)
+WAITING_FLAG = struct.Struct('=Q')      # set while the consumer may be asleep on its doorbell
+DATA_OFFSET = RING_HEADER.size + WAITING_FLAG.size
+ENTRY_HEADER = struct.Struct('=IIBB')   # payload length, peer slot, op, record type
+WRAP_MARKER = 0xFFFFFFFF
+
+
+class SharedRing:
+    """Single-producer/single-consumer byte ring in shared memory.
+
+    Entries are written contiguously; when one does not fit before the end
+    of the data area the producer writes a wrap marker and starts again at
+    offset 0. The producer publishes an entry by advancing ``head`` after
+    copying it, the consumer frees space by advancing ``tail``.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.buf = shm.buf
+        self.capacity = shm.size - DATA_OFFSET
+
+    @classmethod
+    def create(cls, capacity):
+        shm = shared_memory.SharedMemory(create=True, size=DATA_OFFSET + capacity)
+        RING_HEADER.pack_into(shm.buf, 0, 0, 0)
+        WAITING_FLAG.pack_into(shm.buf, RING_HEADER.size, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        # Spawned workers share the creator's resource tracker, so attaching must not
+        # unregister the segment; the creator's unlink does that exactly once
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def is_empty(self):
+        head, tail = RING_HEADER.unpack_from(self.buf, 0)
+        return head == tail
+
+    def set_waiting(self, waiting: bool):
+        WAITING_FLAG.pack_into(self.buf, RING_HEADER.size, int(waiting))
+
+    def consumer_waiting(self) -> bool:
+        return bool(WAITING_FLAG.unpack_from(self.buf, RING_HEADER.size)[0])
+
+    def write(self, slot, op, record_type, payload) -> bool:
+        """Append one entry; returns False when the ring is full"""
+        head, tail = RING_HEADER.unpack_from(self.buf, 0)
+        size = ENTRY_HEADER.size + len(payload)
+        offset = head % self.capacity
+        skip = 0
+        if offset + size > self.capacity:
+            skip = self.capacity - offset  # wasted tail of the data area
+        if size > self.capacity or (head - tail) + skip + size > self.capacity:
+            return False
+
+        base = DATA_OFFSET
+        if skip:
+            if skip >= 4:
+                struct.pack_into('=I', self.buf, base + offset, WRAP_MARKER)
+            offset = 0
+
+        ENTRY_HEADER.pack_into(self.buf, base + offset, len(payload), slot, op, record_type)
+        start = base + offset + ENTRY_HEADER.size
+        self.buf[start:start + len(payload)] = payload
+        struct.pack_into('=Q', self.buf, 0, head + skip + size)
+        return True
+
+    def read(self):
+        """Pop one entry as (slot, op, record_type, payload) or return None"""
+        head, tail = RING_HEADER.unpack_from(self.buf, 0)
+        if head == tail:
+            return None
+
+        base = DATA_OFFSET
+        offset = tail % self.capacity
+        remaining = self.capacity - offset
+        if remaining < ENTRY_HEADER.size or struct.unpack_from('=I', self.buf, base + offset)[0] == WRAP_MARKER:
+            tail += remaining
+            offset = 0
+
+        length, slot, op, record_type = ENTRY_HEADER.unpack_from(self.buf, base + offset)
+        start = base + offset + ENTRY_HEADER.size
+        payload = bytes(self.buf[start:start + length])
+        struct.pack_into('=Q', self.buf, 8, tail + ENTRY_HEADER.size + length)
+        return slot, op, record_type, payload
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _apply_control(control, layers) -> bool:
+    """Apply every queued control message to the worker's layers; False means stop"""
+    while control.poll():
+        message = control.recv()
+        if message[0] == 'add':
+            layers[message[1]] = RecordLayer.from_state(message[2])
+        elif message[0] == 'remove':
+            layers.pop(message[1], None)
+        elif message[0] == 'stop':
+            return False
+    return True
+
+
+def _process(layers, slot, op, record_type, payload):
+    """One request -> one response; OP_DROPPED carries the request op as its record type"""
+    layer = layers.get(slot)
+    if layer is None:
+        return OP_DROPPED, op, b''
+    if op == OP_SEAL:
+        return OP_SEALED, record_type, layer.seal(payload, record_type)
+    try:
+        opened_type, plaintext = layer.open(payload)
+        return OP_OPENED, opened_type, plaintext
+    except RecordError:
+        return OP_DROPPED, op, b''
+
+
+def _worker_main(request_name, response_name, control, request_bell, response_bell):
+    """Crypto worker: seals and opens records for the peers hashed onto it"""
+    requests = SharedRing.attach(request_name)
+    responses = SharedRing.attach(response_name)
+    layers = {}
+
+    try:
+        while True:
+            # Announce the sleep before the last emptiness check, so a producer that
+            # writes after it sees the flag and rings; the timeout is only a backstop
+            requests.set_waiting(True)
+            if requests.is_empty():
+                wait([control, request_bell], timeout=0.1)
+            requests.set_waiting(False)
+            # Peers are added before their first request, so apply control messages first
+            if not _apply_control(control, layers):
+                return
+            while request_bell.poll():
+                request_bell.recv_bytes()
+
+            produced = False
+            entry = requests.read()
+            while entry is not None:
+                slot = entry[0]
+                result = _process(layers, *entry)
+                # Wait for the I/O process to make room rather than drop a sealed record
+                while not responses.write(slot, *result):
+                    response_bell.send_bytes(b'\x01')
+                    # A stalled collector must not keep the worker from stopping
+                    if wait([control], timeout=0.001) and not _apply_control(control, layers):
+                        return
+                produced = True
+                entry = requests.read()
+
+            if produced:
+                response_bell.send_bytes(b'\x01')
+    finally:
+        requests.close()
+        responses.close()
+
+
+class CryptoWorkerPool:
+    """Shards peers across worker processes that do the AEAD work.
+
+    Each worker has a request ring and a response ring in shared memory;
+    pipes are used only as doorbells and for handing over key state when
+    a peer is added. Results are delivered in order per peer on the given
+    event loop through ``result_callback(slot, op, record_type, payload)``.
+    """
+
+    def __init__(self, num_workers, loop, result_callback, ring_capacity=4 * 1024 * 1024):
+        self.logger = Logger("CryptoWorkerPool")
+        self.num_workers = num_workers
+        self.loop = loop
+        self.result_callback = result_callback
+        self.ring_capacity = ring_capacity
+        self.workers = []
+        self.peer_slots = {}
+        self.dropped = 0
+        self._next_slot = 0
+        self._running = False
+        self._collector = None
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        for _ in range(self.num_workers):
+            requests = SharedRing.create(self.ring_capacity)
+            responses = SharedRing.create(self.ring_capacity)
+            control, worker_control = context.Pipe()
+            request_bell_reader, request_bell = context.Pipe(duplex=False)
+            response_bell_reader, response_bell = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_worker_main,
+                args=(requests.name, responses.name, worker_control, request_bell_reader, response_bell),
+                daemon=True
+            )
+            process.start()
+            self.workers.append({
+                'process': process,
+                'requests': requests,
+                'responses': responses,
+                'control': control,
+                'request_bell': request_bell,
+                'response_bell': response_bell_reader,
+                'lock': threading.Lock()  # Single producer per request ring
+            })
+
+        self._running = True
+        self._collector = threading.Thread(target=self._collect_loop, daemon=True)
+        self._collector.start()
+        self.logger.info(f"Started {self.num_workers} crypto workers")
+
+    def stop(self):
+        self._running = False
+        for worker in self.workers:
+            try:
+                worker['control'].send(('stop',))
+            except OSError:
+                pass
+        for worker in self.workers:
+            worker['process'].join(timeout=2.0)
+            if worker['process'].is_alive():
+                # Unlink only once nothing still maps the rings
+                worker['process'].terminate()
+                worker['process'].join(timeout=1.0)
+        if self._collector:
+            self._collector.join(timeout=1.0)
+        for worker in self.workers:
+            worker['requests'].close()
+            worker['responses'].close()
+        self.workers = []
+
+    def worker_for(self, peer_id) -> int:
+        return zlib.crc32(str(peer_id).encode()) % self.num_workers
+
+    def add_peer(self, peer_id, record_layer) -> int:
+        """Move a peer's record layer into its worker and return its slot"""
+        slot = self._next_slot
+        self._next_slot += 1
+        self.peer_slots[slot] = self.worker_for(peer_id)
+        self.workers[self.peer_slots[slot]]['control'].send(('add', slot, record_layer.export_state()))
+        return slot
+
+    def remove_peer(self, slot):
+        worker_index = self.peer_slots.pop(slot, None)
+        if worker_index is not None:
+            self.workers[worker_index]['control'].send(('remove', slot))
+
+    def submit_seal(self, slot, payload, record_type) -> bool:
+        return self._submit(slot, OP_SEAL, record_type, payload)
+
+    def submit_open(self, slot, record) -> bool:
+        return self._submit(slot, OP_OPEN, 0, record)
+
+    def _submit(self, slot, op, record_type, payload):
+        worker = self.workers[self.peer_slots[slot]]
+        with worker['lock']:
+            if not worker['requests'].write(slot, op, record_type, payload):
+                self.dropped += 1
+                return False
+            sleeping = worker['requests'].consumer_waiting()
+        if sleeping:
+            worker['request_bell'].send_bytes(b'\x01')
+        return True
+
+    def _collect_loop(self):
+        """Drain response rings and hand results to the event loop in batches"""
+        bells = {worker['response_bell']: worker for worker in self.workers}
+        while self._running and bells:
+            for bell in wait(list(bells), timeout=0.05):
+                try:
+                    while bell.poll():
+                        bell.recv_bytes()
+                except (EOFError, OSError):
+                    # The worker is gone and its doorbell stays readable; stop polling it
+                    worker = bells.pop(bell)
+                    if self._running:
+                        self.logger.error(f"Crypto worker {worker['process'].pid} exited "
+                                          f"(exit code {worker['process'].exitcode})")
+
+            results = []
+            for worker in self.workers:
+                entry = worker['responses'].read()
+                while entry is not None:
+                    results.append(entry)
+                    entry = worker['responses'].read()
+            if results:
+                self.loop.call_soon_threadsafe(self._deliver, results)
+
+    def _deliver(self, results):
+        for slot, op, record_type, payload in results:
+            if slot in self.peer_slots:
+                self.result_callback(slot, op, record_type, payload)
@@ -0,0 +1,386 @@
+import asyncio
+import time
+from collections import deque
+from .crypto_workers import CryptoWorkerPool, OP_OPEN, OP_OPENED, OP_SEALED
+from .framing import FramingError, encode_frame
+from .path_meter import FRAME_HEADER, PathMeter
+from .record_layer import (RecordError, RECORD_DATA, RECORD_KEEPALIVE, RECORD_PROBE,
+                           KEEPALIVE_PING, KEEPALIVE_PONG, PROBE_REQUEST, PROBE_REPLY)
+from ..utils.logger import Logger
+
+
+class StreamTunnelProtocol(asyncio.BufferedProtocol):
+    """Receives framed records on a peer's TCP socket straight into its FrameReader"""
+
+    def __init__(self, data_plane, connection_info):
+        self.data_plane = data_plane
+        self.connection_info = connection_info
+        self.reader = connection_info['reader']
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.connection_info['stream_transport'] = transport
+        # Frames that arrived together with the handshake reply
+        self._dispatch()
+
+    def get_buffer(self, sizehint):
+        return self.reader.get_buffer(sizehint)
+
+    def buffer_updated(self, nbytes):
+        self.reader.buffer_updated(nbytes)
+        self._dispatch()
+
+    def connection_lost(self, exc):
+        self.data_plane.connection_lost(self.connection_info, exc)
+
+    def _dispatch(self):
+        try:
+            for frame in self.reader.drain():
+                self.data_plane.handle_record(self.connection_info, frame, datagram=False)
+        except FramingError as e:
+            self.data_plane.logger.error(f"Framing error from {self.connection_info['host']}: {e}")
+            self.transport.close()
+
+
+class DatagramTunnelProtocol(asyncio.DatagramProtocol):
+    """Receives one record per datagram on a peer's connected UDP socket"""
+
+    def __init__(self, data_plane, connection_info):
+        self.data_plane = data_plane
+        self.connection_info = connection_info
+
+    def connection_made(self, transport):
+        self.connection_info['datagram_transport'] = transport
+
+    def datagram_received(self, data, addr):
+        self.data_plane.handle_record(self.connection_info, data, datagram=True)
+
+    def error_received(self, exc):
+        self.data_plane.logger.debug(f"UDP error from {self.connection_info['host']}: {exc}")
+
+
+class HostDatagramProtocol(asyncio.DatagramProtocol):
+    """Receives records from every accepted peer on the host's shared UDP port"""
+
+    def __init__(self, data_plane):
+        self.data_plane = data_plane
+
+    def connection_made(self, transport):
+        self.data_plane.host_transport = transport
+
+    def datagram_received(self, data, addr):
+        connection_info = self.data_plane.secure_tunnel.active_connections.get(addr[0])
+        if connection_info is None or connection_info.get('role') != 'responder':
+            return  # Only peers that completed the handshake with us
+        self.data_plane.handle_record(connection_info, data, datagram=True, addr=addr)
+
+    def error_received(self, exc):
+        self.data_plane.logger.debug(f"UDP error on host port: {exc}")
+
+
+class DataPlane:
+    """Event-loop driven receive/route/send path for every tunnel connection.
+
+    All peers share the event loop the application already runs (qasync),
+    so the number of threads does not grow with the number of peers. A
+    single task sends keepalives and detects dead UDP paths.
+    """
+
+    def __init__(self, secure_tunnel, loop=None):
+        self.logger = Logger("DataPlane")
+        self.secure_tunnel = secure_tunnel
+        self.loop = loop
+        self.packet_callback = None  # Optional callable(connection_info, payload)
+        self.probe_handler = None  # Optional callable(connection_info, payload) for probe replies
+        self.keepalive_interval = 1.0  # seconds between keepalives on idle paths
+        self.keepalive_timeout = 5.0  # fall back to TCP after this much UDP silence
+        self.udp_retry_interval = 30.0  # seconds between UDP re-probes after a fallback
+        self._keepalive_task = None
+        self.crypto_pool = None
+        self._slots = {}  # crypto worker slot -> connection_info
+        self.host_transport = None  # Shared UDP endpoint for accepted peers
+
+    def enable_crypto_workers(self, num_workers):
+        """Offload sealing and opening to worker processes, sharded by peer.
+
+        Must be called before peers are attached.
+        """
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+        self.crypto_pool = CryptoWorkerPool(num_workers, self.loop, self._handle_worker_result)
+        self.crypto_pool.start()
+
+    def stop(self):
+        """Close every peer and the host port, cancel the keepalive task, stop the workers"""
+        if self.loop is not None:
+            self._call_in_loop(self._shutdown)
+        if self.crypto_pool:
+            self.crypto_pool.stop()
+            self.crypto_pool = None
+
+    def attach(self, connection_info):
+        """Hand a connected, authenticated peer over to the event loop (thread-safe)"""
+        self._call_in_loop(self._start_attach, connection_info)
+
+    def detach(self, connection_info):
+        """Close a peer's transports (thread-safe)"""
+        self._call_in_loop(self._close_transports, connection_info)
+
+    def open_host_endpoint(self, sock):
+        """Serve accepted peers' UDP traffic on a bound socket (thread-safe)"""
+        self._call_in_loop(self._start_host_endpoint, sock)
+
+    def close_host_endpoint(self, sock):
+        """Stop serving the host UDP port and close its socket (thread-safe)"""
+        self._call_in_loop(self._close_host_endpoint, sock)
+
+    def send_payload(self, connection_info, payload, record_type=RECORD_DATA):
+        """Seal a payload and send it on the peer's active transport (thread-safe)"""
+        self._call_in_loop(self._seal_and_send, connection_info, payload, record_type)
+
+    def handle_record(self, connection_info, record, datagram, addr=None):
+        """Authenticate and dispatch one received record; addr is set on the host UDP port"""
+        slot = connection_info.get('crypto_slot')
+        if slot is not None:
+            if self.crypto_pool.submit_open(slot, record):
+                # Results come back in order per peer
+                connection_info['pending_opens'].append((datagram, addr))
+            return
+
+        try:
+            record_type, payload = connection_info['record_layer'].open(record)
+        except RecordError as e:
+            self.logger.debug(f"Dropped record from {connection_info['host']}: {e}")
+            return
+        self._dispatch(connection_info, record_type, payload, datagram, addr)
+
+    def path_meter(self, connection_info) -> PathMeter:
+        """Passive quality measurement for a peer, created on first use"""
+        meter = connection_info.get('path_meter')
+        if meter is None:
+            meter = connection_info['path_meter'] = PathMeter()
+        return meter
+
+    def _dispatch(self, connection_info, record_type, payload, datagram=None, addr=None):
+        now = time.monotonic()
+        connection_info['last_received'] = now
+        if datagram:
+            # Only datagrams prove the UDP path; TCP traffic must not keep it looking alive
+            connection_info['last_datagram_received'] = now
+            if addr is not None:
+                self._learn_datagram_path(connection_info, addr)
+            elif connection_info['transport'] != 'udp' and connection_info.get('datagram_transport'):
+                connection_info['transport'] = 'udp'
+                self.logger.info(f"UDP path to {connection_info['host']} is back")
+        if record_type == RECORD_DATA:
+            if len(payload) < FRAME_HEADER.size:
+                self.logger.debug(f"Dropped short data frame from {connection_info['host']}")
+                return
+            payload = self.path_meter(connection_info).receive(payload)
+            self.secure_tunnel.data_received.emit(payload)
+            if self.packet_callback:
+                self.packet_callback(connection_info, payload)
+        elif record_type == RECORD_KEEPALIVE and payload == KEEPALIVE_PING:
+            self._seal_and_send(connection_info, KEEPALIVE_PONG, RECORD_KEEPALIVE, datagram)
+        elif record_type == RECORD_PROBE and payload:
+            if payload[:1] == PROBE_REQUEST:
+                # Echo on the path it came in on so the RTT matches the probed path
+                self._seal_and_send(connection_info, PROBE_REPLY + bytes(payload[1:]), RECORD_PROBE, datagram)
+            elif self.probe_handler:
+                self.probe_handler(connection_info, payload)
+
+    def _seal_and_send(self, connection_info, payload, record_type, datagram=None):
+        if record_type == RECORD_DATA:
+            payload = self.path_meter(connection_info).stamp() + payload
+        slot = connection_info.get('crypto_slot')
+        if slot is not None:
+            if self.crypto_pool.submit_seal(slot, payload, record_type):
+                # The path choice travels with the request, like pending_opens
+                connection_info['pending_seals'].append(datagram)
+        else:
+            self._send(connection_info, connection_info['record_layer'].seal(payload, record_type), datagram)
+
+    def _handle_worker_result(self, slot, op, record_type, payload):
+        connection_info = self._slots.get(slot)
+        if connection_info is None:
+            return
+        if op == OP_SEALED:
+            self._send(connection_info, payload, connection_info['pending_seals'].popleft())
+        elif op == OP_OPENED:
+            datagram, addr = connection_info['pending_opens'].popleft()
+            self._dispatch(connection_info, record_type, payload, datagram, addr)
+        else:
+            pending = connection_info['pending_opens' if record_type == OP_OPEN else 'pending_seals']
+            pending.popleft()
+            self.logger.debug(f"Dropped record from {connection_info['host']}")
+
+    def _learn_datagram_path(self, connection_info, addr):
+        """An accepted peer's UDP path is wherever its authenticated datagrams come from"""
+        connection_info['datagram_addr'] = addr
+        if connection_info['transport'] != 'udp' and self.host_transport:
+            connection_info['datagram_transport'] = self.host_transport
+            connection_info['transport'] = 'udp'
+            self.logger.info(f"UDP path to {connection_info['host']} is up")
+
+    def connection_lost(self, connection_info, exc):
+        if connection_info['status'] == 'connected':
+            host = connection_info['host']
+            self.logger.error(f"Connection to {host} lost: {exc or 'closed by peer'}")
+            self.secure_tunnel.close_connection(host)
+            self.secure_tunnel.connection_lost.emit(host)
+
+    def _call_in_loop(self, callback, *args):
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+        if self._in_loop_thread():
+            callback(*args)
+        else:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def _in_loop_thread(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _start_attach(self, connection_info):
+        if self.crypto_pool:
+            slot = self.crypto_pool.add_peer(connection_info['host'], connection_info['record_layer'])
+            connection_info['crypto_slot'] = slot
+            connection_info['pending_opens'] = deque()  # (datagram, addr) per submitted open
+            connection_info['pending_seals'] = deque()  # datagram flag per submitted seal
+            self._slots[slot] = connection_info
+        task = self.loop.create_task(self._attach(connection_info))
+        task.add_done_callback(self._log_task_error)
+
+    async def _attach(self, connection_info):
+        stream = datagram = None
+        if connection_info['status'] == 'connected':
+            stream, _ = await self.loop.create_connection(
+                lambda: StreamTunnelProtocol(self, connection_info),
+                sock=connection_info['socket']
+            )
+        # Accepted peers may switch to UDP on the shared host port before this point
+        # without ever owning a datagram socket of their own
+        if connection_info['status'] == 'connected' and connection_info.get('datagram_socket'):
+            datagram, _ = await self.loop.create_datagram_endpoint(
+                lambda: DatagramTunnelProtocol(self, connection_info),
+                sock=connection_info['datagram_socket']
+            )
+        if datagram:
+            connection_info['last_datagram_received'] = time.monotonic()
+        if connection_info['status'] != 'connected':
+            # Closed before or while attaching; whatever was not handed over is closed here
+            for transport, sock in ((stream, connection_info['socket']),
+                                    (datagram, connection_info.get('datagram_socket'))):
+                if transport:
+                    transport.close()
+                elif sock:
+                    sock.close()
+            return
+
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = self.loop.create_task(self._keepalive_loop())
+            self._keepalive_task.add_done_callback(self._log_task_error)
+
+    def _shutdown(self):
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        for host in list(self.secure_tunnel.active_connections):
+            self.secure_tunnel.close_connection(host)
+        transport, self.host_transport = self.host_transport, None
+        if transport:
+            transport.close()
+
+    def _start_host_endpoint(self, sock):
+        task = self.loop.create_task(
+            self.loop.create_datagram_endpoint(lambda: HostDatagramProtocol(self), sock=sock)
+        )
+        task.add_done_callback(self._log_task_error)
+
+    def _close_host_endpoint(self, sock):
+        transport, self.host_transport = self.host_transport, None
+        if transport:
+            transport.close()
+        else:
+            sock.close()
+
+    def _send(self, connection_info, record, datagram=None):
+        if connection_info['status'] != 'connected':
+            return
+        if datagram is None:
+            datagram = connection_info['transport'] == 'udp'
+
+        if datagram and connection_info.get('datagram_transport'):
+            # datagram_addr is only set for peers on the shared host port
+            connection_info['datagram_transport'].sendto(record, connection_info.get('datagram_addr'))
+        elif connection_info.get('stream_transport'):
+            connection_info['stream_transport'].write(encode_frame(record))
+
+    def _close_transports(self, connection_info):
+        slot = connection_info.pop('crypto_slot', None)
+        if slot is not None:
+            self._slots.pop(slot, None)
+            self.crypto_pool.remove_peer(slot)
+        transport = connection_info.pop('stream_transport', None)
+        if transport:
+            transport.close()
+        self._drop_datagram_transport(connection_info)
+
+    def _drop_datagram_transport(self, connection_info):
+        transport = connection_info.pop('datagram_transport', None)
+        if transport and transport is not self.host_transport:
+            transport.close()
+
+    async def _keepalive_loop(self):
+        """Keep idle UDP paths open and fall back to TCP when they go silent"""
+        while self.secure_tunnel.active_connections:
+            await asyncio.sleep(self.keepalive_interval)
+            self._check_paths(time.monotonic())
+
+    def _check_paths(self, now):
+        for connection_info in list(self.secure_tunnel.active_connections.values()):
+            if connection_info['transport'] != 'udp':
+                self._retry_udp(connection_info, now)
+                continue
+
+            idle = now - connection_info.get('last_datagram_received', connection_info['last_received'])
+            if idle > self.keepalive_timeout:
+                self.logger.warning(
+                    f"UDP path to {connection_info['host']} silent for {idle:.1f}s, falling back to TCP"
+                )
+                connection_info['transport'] = 'tcp'
+                self._drop_datagram_transport(connection_info)
+                if connection_info.get('role') != 'responder':
+                    # The host follows wherever our datagrams come from, so only we re-probe
+                    connection_info['udp_retry_at'] = now + self.udp_retry_interval
+            elif idle > self.keepalive_interval:
+                self._seal_and_send(connection_info, KEEPALIVE_PING, RECORD_KEEPALIVE)
+
+    def _retry_udp(self, connection_info, now):
+        """Re-probe UDP from a fresh socket; the PONG switches the peer back to UDP"""
+        retry_at = connection_info.get('udp_retry_at')
+        if retry_at is None or now < retry_at:
+            return
+        connection_info['udp_retry_at'] = now + self.udp_retry_interval
+        if connection_info.get('datagram_transport'):
+            self._seal_and_send(connection_info, KEEPALIVE_PING, RECORD_KEEPALIVE, datagram=True)
+        else:
+            task = self.loop.create_task(self._open_datagram_path(connection_info))
+            task.add_done_callback(self._log_task_error)
+
+    async def _open_datagram_path(self, connection_info):
+        await self.loop.create_datagram_endpoint(
+            lambda: DatagramTunnelProtocol(self, connection_info),
+            remote_addr=(connection_info['host'], connection_info['port'])
+        )
+        if connection_info['status'] != 'connected':
+            self._drop_datagram_transport(connection_info)
+            return
+        self._seal_and_send(connection_info, KEEPALIVE_PING, RECORD_KEEPALIVE, datagram=True)
+
+    def _log_task_error(self, task):
+        if not task.cancelled() and task.exception():
+            self.logger.error(f"Data plane task failed: {task.exception()}")
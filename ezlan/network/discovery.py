@@ -1,8 +1,10 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 from ezlan.utils.logger import Logger
-import netifaces
+from .interface_inventory import get_interface_inventory
+from PyQt6.QtCore import Qt
 import socket
 import json
+import selectors
 import threading
 import time
 
@@ -20,6 +22,18 @@ class DiscoveryService(QObject):
         self.PORT = 12346  # Define discovery port
         self._running = False
         self._discovery_thread = None
+        self._wakeup = None  # Write end of the socketpair that interrupts the receive wait
+        self._wakeup_reader = None
+        self.broadcast_interval = 1.0  # seconds between presence broadcasts
+        # Broadcast sockets per (address, broadcast address), kept open between rounds
+        self._broadcast_targets = {}
+        self._presence_payload = b''
+        self._interfaces_stale = True
+        self._targets_refreshed = 0.0
+        self.interface_refresh_interval = 30.0  # seconds between interface rescans
+        self.interfaces = get_interface_inventory()
+        # Direct: only sets a flag, and must work while the discovery thread runs
+        self.interfaces.changed.connect(self._on_interfaces_changed, Qt.ConnectionType.DirectConnection)
         self.setup_socket()
         
     def setup_socket(self):
@@ -71,8 +85,10 @@ class DiscoveryService(QObject):
                     self.socket.bind(('', 0))  # Let OS choose port
                     
             self.socket.setblocking(False)
+            # Writing to _wakeup interrupts the receive wait; closed by stop_discovery after the join
+            self._wakeup_reader, self._wakeup = socket.socketpair()
             self._running = True
-            self._discovery_thread = threading.Thread(target=self._discovery_loop)
+            self._discovery_thread = threading.Thread(target=self._discovery_loop, args=(self._wakeup_reader,))
             self._discovery_thread.daemon = True
             self._discovery_thread.start()
             self.logger.info("Discovery service started")
@@ -83,82 +99,97 @@ class DiscoveryService(QObject):
     def _broadcast_presence(self):
         """Broadcast presence to network"""
         try:
-            presence_data = {
-                'name': socket.gethostname(),
-                'ip': self._get_local_ip(),
-                'type': 'presence'
-            }
-            message = json.dumps(presence_data).encode()
+            if self._interfaces_stale or time.monotonic() - self._targets_refreshed > self.interface_refresh_interval:
+                self._refresh_broadcast_targets()
+
+            # Steady state: one sendto per interface on sockets kept open between rounds
+            successful_broadcasts = 0
+            for key, (broadcast_socket, destination) in self._broadcast_targets.items():
+                try:
+                    broadcast_socket.sendto(self._presence_payload, destination)
+                    successful_broadcasts += 1
+                except OSError as e:
+                    self.logger.error(f"Failed to broadcast on {key[0]}: {e}")
+                    self._interfaces_stale = True  # Address probably went away; rescan next round
+
+            # Only log when the number of interfaces changes
+            if successful_broadcasts != getattr(self, '_last_broadcast_count', None):
+                self.logger.info(f"Broadcasting presence on {successful_broadcasts} interfaces")
+                self._last_broadcast_count = successful_broadcasts
             
-            # Create a new socket for each broadcast
+        except Exception as e:
+            self.logger.error(f"Failed to broadcast presence: {e}")
+
+    def invalidate_interfaces(self):
+        """Rebuild the broadcast sockets and presence payload before the next broadcast"""
+        self._interfaces_stale = True
+
+    def _on_interfaces_changed(self, addresses):
+        self.invalidate_interfaces()
+
+    def _refresh_broadcast_targets(self):
+        """Open one bound broadcast socket per interface address, reusing unchanged ones"""
+        targets = {
+            (entry.address, entry.broadcast): entry.interface
+            for entry in self.interfaces.addresses if entry.broadcast
+        }
+
+        pool = {}
+        for key, (broadcast_socket, destination) in self._broadcast_targets.items():
+            if key in targets:
+                pool[key] = (broadcast_socket, destination)
+            else:
+                broadcast_socket.close()
+        for key, interface in targets.items():
+            if key in pool:
+                continue
+            address, broadcast = key
             broadcast_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            
             try:
-                # Get all network interfaces
-                successful_broadcasts = 0
-                for interface in netifaces.interfaces():
-                    addrs = netifaces.ifaddresses(interface)
-                    if netifaces.AF_INET in addrs:  # Only IPv4
-                        for addr in addrs[netifaces.AF_INET]:
-                            if 'addr' in addr and not addr['addr'].startswith('127.'):
-                                try:
-                                    # Bind to specific interface
-                                    broadcast_socket.bind((addr['addr'], 0))
-                                    # Send to broadcast address
-                                    if 'broadcast' in addr:
-                                        broadcast_socket.sendto(message, (addr['broadcast'], self.broadcast_port))
-                                        successful_broadcasts += 1
-                                except Exception as e:
-                                    # Only log actual errors, not routine failures
-                                    if "already bound" not in str(e):
-                                        self.logger.error(f"Failed to broadcast on interface {interface}: {e}")
-                                finally:
-                                    # Unbind for next interface
-                                    broadcast_socket.close()
-                                    broadcast_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                                    broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-                                    broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                
-                # Only log once per successful broadcast cycle
-                if successful_broadcasts > 0 and not hasattr(self, '_last_broadcast_count'):
-                    self.logger.info(f"Broadcasting presence on {successful_broadcasts} interfaces")
-                    self._last_broadcast_count = successful_broadcasts
-                elif successful_broadcasts != getattr(self, '_last_broadcast_count', None):
-                    self.logger.info(f"Broadcasting presence on {successful_broadcasts} interfaces")
-                    self._last_broadcast_count = successful_broadcasts
-                
-            finally:
+                broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                broadcast_socket.bind((address, 0))
+                broadcast_socket.setblocking(False)
+            except OSError as e:
+                self.logger.error(f"Failed to open broadcast socket on interface {interface}: {e}")
                 broadcast_socket.close()
-            
-        except Exception as e:
-            self.logger.error(f"Failed to broadcast presence: {e}")
+                continue
+            pool[key] = (broadcast_socket, (broadcast, self.broadcast_port))
+        self._broadcast_targets = pool
+
+        # The presence message only changes with the addresses, so encode it once here
+        self._presence_payload = json.dumps({
+            'name': socket.gethostname(),
+            'ip': self._get_local_ip(),
+            'type': 'presence'
+        }).encode()
+        self._targets_refreshed = time.monotonic()
+        self._interfaces_stale = False
+
+    def _close_broadcast_targets(self):
+        for broadcast_socket, _ in self._broadcast_targets.values():
+            broadcast_socket.close()
+        self._broadcast_targets = {}
+        self._interfaces_stale = True
             
     def _get_broadcast_addresses(self):
         """Get list of broadcast addresses for all interfaces"""
-        broadcast_list = ['255.255.255.255']  # Default broadcast
-        try:
-            import netifaces
-            for interface in netifaces.interfaces():
-                addrs = netifaces.ifaddresses(interface)
-                if netifaces.AF_INET in addrs:
-                    for addr in addrs[netifaces.AF_INET]:
-                        if 'broadcast' in addr:
-                            broadcast_list.append(addr['broadcast'])
-        except Exception as e:
-            self.logger.debug(f"Failed to get broadcast addresses: {e}")
-        return list(set(broadcast_list))  # Remove duplicates
+        # Default broadcast plus every interface's, from the cached inventory
+        return list({'255.255.255.255', *self.interfaces.broadcast_addresses()})
             
     def _start_listening(self):
         """Listen for peer broadcasts"""
         try:
             while True:
                 try:
-                    data, addr = self.socket.recvfrom(1024)
-                    peer_info = json.loads(data.decode())
+                    data, addr = self.socket.recvfrom(65535)
+                    try:
+                        peer_info = json.loads(data.decode())
+                    except ValueError:
+                        self.logger.debug(f"Ignored malformed discovery packet from {addr[0]}")
+                        continue
                     
-                    if peer_info['type'] == 'presence':
+                    if isinstance(peer_info, dict) and peer_info.get('type') == 'presence':
                         if peer_info['name'] not in self.known_peers:
                             self.known_peers[peer_info['name']] = peer_info
                             self.peer_discovered.emit(peer_info)
@@ -177,24 +208,23 @@ class DiscoveryService(QObject):
             
     def _get_local_ip(self):
         """Get local IP address"""
-        try:
-            interfaces = netifaces.interfaces()
-            for interface in interfaces:
-                addrs = netifaces.ifaddresses(interface)
-                if netifaces.AF_INET in addrs:
-                    for addr in addrs[netifaces.AF_INET]:
-                        ip = addr['addr']
-                        if not ip.startswith('127.'):
-                            return ip
-            return '127.0.0.1'  # Fallback to localhost
-        except Exception as e:
-            self.logger.error(f"Failed to get local IP: {e}")
-            return '127.0.0.1'
+        return self.interfaces.local_ip()
             
     def stop_discovery(self):
         """Stop discovery service"""
         try:
+            self._running = False
+            if self._wakeup:
+                self._wakeup.send(b'\x00')
+            if self._discovery_thread and self._discovery_thread is not threading.current_thread():
+                self._discovery_thread.join(timeout=2.0)
+                self._discovery_thread = None
+            if self._wakeup:
+                self._wakeup.close()
+                self._wakeup_reader.close()
+                self._wakeup = self._wakeup_reader = None
             self.socket.close()
+            self._close_broadcast_targets()
             self.logger.info("Discovery service stopped")
         except Exception as e:
             self.logger.error(f"Error stopping discovery service: {e}")
@@ -218,13 +248,28 @@ class DiscoveryService(QObject):
             self.peer_lost.emit(peer_name)
             self.logger.info(f"Lost peer: {peer_name}")
 
-    def _discovery_loop(self):
-        """Background loop for discovery service"""
-        while self._running:
-            try:
-                self._broadcast_presence()
-                self._start_listening()
-                time.sleep(1)  # Wait before next iteration
-            except Exception as e:
-                self.logger.error(f"Error in discovery loop: {e}")
-                time.sleep(1)  # Prevent tight loop on error
+    def _discovery_loop(self, wakeup_reader):
+        """Background loop: handle datagrams as they arrive, broadcast on a fixed cadence"""
+        selector = selectors.DefaultSelector()
+        selector.register(self.socket, selectors.EVENT_READ)
+        selector.register(wakeup_reader, selectors.EVENT_READ)
+        next_broadcast = time.monotonic()
+        try:
+            while self._running:
+                try:
+                    now = time.monotonic()
+                    if now >= next_broadcast:
+                        self._broadcast_presence()
+                        next_broadcast = now + self.broadcast_interval
+                    
+                    # Sleep until a packet arrives or the next broadcast is due
+                    for key, _ in selector.select(max(0.0, next_broadcast - time.monotonic())):
+                        if key.fileobj is self.socket:
+                            self._start_listening()
+                        else:
+                            wakeup_reader.recv(64)
+                except Exception as e:
+                    self.logger.error(f"Error in discovery loop: {e}")
+                    time.sleep(1)  # Prevent tight loop on error
+        finally:
+            selector.close()
@@ -0,0 +1,119 @@
+import struct
+
+# Every frame on a stream socket is prefixed with its length
+FRAME_HEADER = struct.Struct('!I')
+MAX_FRAME_SIZE = 1 << 20  # 1MB, far above any tunneled packet
+
+
+class FramingError(Exception):
+    """Raised when the peer sends a frame we refuse to buffer"""
+
+
+def encode_frame(payload) -> bytes:
+    """Prefix payload with its length"""
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class FrameReader:
+    """Reassembles length-prefixed frames from a stream socket.
+
+    Data is received with ``recv_into`` straight into one preallocated
+    buffer, so a single syscall can yield many frames. Frames are returned
+    as ``memoryview`` slices of that buffer and are only valid until the
+    next read; callers that keep a frame must copy it.
+
+    Without a socket the reader can be fed by an ``asyncio.BufferedProtocol``
+    through ``get_buffer``/``buffer_updated`` followed by ``drain``.
+    """
+
+    def __init__(self, sock=None, buffer_size=256 * 1024, max_frame_size=MAX_FRAME_SIZE):
+        self.sock = sock
+        self.max_frame_size = max_frame_size
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # first unconsumed byte
+        self._end = 0    # end of received data
+        self.bytes_received = 0
+        self.recv_calls = 0
+
+    def read_frames(self):
+        """Return every complete frame available, receiving at most once"""
+        frames = self.drain()
+        if frames:
+            return frames
+        self._fill()
+        return self.drain()
+
+    def read_frame(self) -> bytes:
+        """Block until one complete frame is available and return a copy of it"""
+        while True:
+            frame = self._next_frame()
+            if frame is not None:
+                return bytes(frame)
+            self._fill()
+
+    def get_buffer(self, sizehint=-1):
+        """Return the writable tail of the buffer"""
+        self._make_room()
+        return self._view[self._end:]
+
+    def buffer_updated(self, nbytes):
+        """Account for nbytes written into the buffer returned by get_buffer"""
+        self._end += nbytes
+        self.bytes_received += nbytes
+
+    def drain(self):
+        """Return every complete frame already buffered"""
+        frames = []
+        frame = self._next_frame()
+        while frame is not None:
+            frames.append(frame)
+            frame = self._next_frame()
+        return frames
+
+    def _next_frame(self):
+        available = self._end - self._start
+        if available < FRAME_HEADER.size:
+            return None
+
+        length = FRAME_HEADER.unpack_from(self._buffer, self._start)[0]
+        if length > self.max_frame_size:
+            raise FramingError(f"Frame of {length} bytes exceeds limit of {self.max_frame_size}")
+        if available < FRAME_HEADER.size + length:
+            return None
+
+        start = self._start + FRAME_HEADER.size
+        self._start = start + length
+        return self._view[start:self._start]
+
+    def _fill(self):
+        received = self.sock.recv_into(self.get_buffer())
+        if not received:
+            raise ConnectionError("Connection closed by peer")
+        self.buffer_updated(received)
+        self.recv_calls += 1
+
+    def _make_room(self):
+        """Compact or grow the buffer so the pending frame can complete"""
+        pending = self._end - self._start
+        if pending == 0:
+            self._start = self._end = 0
+            return
+
+        needed = FRAME_HEADER.size
+        if pending >= FRAME_HEADER.size:
+            needed += FRAME_HEADER.unpack_from(self._buffer, self._start)[0]
+
+        if needed > len(self._buffer):
+            # Frame larger than the buffer; views handed out earlier keep the old one alive
+            buffer = bytearray(max(needed, 2 * len(self._buffer)))
+            buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+        elif self._start + needed > len(self._buffer) or self._end == len(self._buffer):
+            self._view[:pending] = self._view[self._start:self._end]
+        else:
+            return
+
+        self._start = 0
+        self._end = pending
@@ -2,6 +2,7 @@ from PyQt6.QtCore import QObject, pyqtSignal
 from dataclasses import dataclass
 import numpy as np
 from typing import Dict, List
+from .scoring import get_scoring_engine
 
 @dataclass
 class GamingMetrics:
@@ -17,6 +18,7 @@ class GamingOptimizer(QObject):
         super().__init__()
         self.tunnel_service = tunnel_service
         self.optimization_history: Dict[str, List[dict]] = {}
+        self.scoring = get_scoring_engine('gaming')
         self.gaming_thresholds = {
             'frame_time': 16.67,  # 60 FPS target
             'ping_stability': 0.95,
@@ -44,19 +46,10 @@ class GamingOptimizer(QObject):
         return True
         
     def _calculate_gaming_score(self, metrics: GamingMetrics) -> float:
-        # Weight different aspects based on gaming importance
-        weights = {
-            'frame_time': 0.4,
-            'ping_stability': 0.3,
-            'jitter': 0.2,
-            'packet_loss': 0.1
-        }
-        
-        scores = {
-            'frame_time': max(0, 1 - (metrics.frame_time / self.gaming_thresholds['frame_time'])),
-            'ping_stability': metrics.ping_stability / self.gaming_thresholds['ping_stability'],
-            'jitter': max(0, 1 - (metrics.jitter / self.gaming_thresholds['jitter'])),
-            'packet_loss': max(0, 1 - (metrics.packet_loss / self.gaming_thresholds['packet_loss']))
-        }
-        
-        return sum(scores[k] * weights[k] for k in weights)
\ No newline at end of file
+        # Weights per aspect come from the 'gaming' scoring profile
+        return self.scoring.score(
+            frame_time=metrics.frame_time,
+            ping_stability=metrics.ping_stability,
+            jitter=metrics.jitter,
+            packet_loss=metrics.packet_loss
+        )
\ No newline at end of file
@@ -1,6 +1,6 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 from dataclasses import dataclass
-import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 @dataclass
@@ -21,6 +21,8 @@ class GamingRecoveryManager(QObject):
         self.recovery_config = GamingRecoveryConfig()
         self.active_recoveries = {}
         self.gaming_optimizer = self.tunnel_service.gaming_optimizer
+        # Shared workers instead of a thread per recovering peer
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="GamingRecovery")
         
     def start_recovery(self, user_name, connection_info):
         if user_name in self.active_recoveries:
@@ -33,8 +35,4 @@ class GamingRecoveryManager(QObject):
         }
         
         self.recovery_started.emit(user_name)
-        threading.Thread(
-            target=self._gaming_recovery_loop,
-            args=(user_name,),
-            daemon=True
-        ).start() 
\ No newline at end of file
+        self._executor.submit(self._gaming_recovery_loop, user_name) 
\ No newline at end of file
@@ -0,0 +1,140 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import select
+import socket
+import sys
+import threading
+import netifaces
+from ezlan.utils.logger import Logger
+
+# rtnetlink multicast groups for link and IPv4 address changes
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+
+
+@dataclass(frozen=True)
+class InterfaceAddress:
+    interface: str
+    address: str
+    netmask: Optional[str] = None
+    broadcast: Optional[str] = None
+
+
+class InterfaceInventory(QObject):
+    """Cached table of local IPv4 addresses shared by every network service.
+
+    The table is read without enumerating interfaces; it is rebuilt only
+    when the kernel reports an address or link change over rtnetlink
+    (Linux) or, elsewhere, when a slow poll sees a difference. Each
+    rebuild that changes anything publishes a new immutable snapshot and
+    emits ``changed(snapshot)`` from the watcher thread.
+    """
+
+    changed = pyqtSignal(object)  # tuple of InterfaceAddress
+
+    def __init__(self, poll_interval=5.0, settle_time=0.2):
+        super().__init__()
+        self.logger = Logger("InterfaceInventory")
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time  # netlink events arrive in bursts; refresh once per burst
+        self.addresses: Tuple[InterfaceAddress, ...] = ()
+        self.primary_address = '127.0.0.1'
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refresh()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            watcher = self._netlink_loop if sys.platform.startswith('linux') else self._poll_loop
+            self._thread = threading.Thread(target=watcher, daemon=True, name="InterfaceInventory")
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def local_ip(self) -> str:
+        """Address of the interface holding the default route"""
+        return self.primary_address
+
+    def broadcast_addresses(self) -> List[str]:
+        return sorted({entry.broadcast for entry in self.addresses if entry.broadcast})
+
+    def refresh(self) -> bool:
+        """Re-read the interface table; returns True and emits changed if it differs"""
+        with self._refresh_lock:
+            addresses = self._enumerate()
+            primary = self._route_address(addresses)
+            if addresses == self.addresses and primary == self.primary_address:
+                return False
+            self.addresses, self.primary_address = addresses, primary
+        self.logger.info(f"Interface addresses: {', '.join(entry.address for entry in addresses) or 'none'}")
+        self.changed.emit(addresses)
+        return True
+
+    def _enumerate(self) -> Tuple[InterfaceAddress, ...]:
+        entries = []
+        try:
+            for interface in netifaces.interfaces():
+                for addr in netifaces.ifaddresses(interface).get(netifaces.AF_INET, []):
+                    if 'addr' in addr and not addr['addr'].startswith('127.'):
+                        entries.append(InterfaceAddress(interface, addr['addr'],
+                                                        addr.get('netmask'), addr.get('broadcast')))
+        except Exception as e:
+            self.logger.error(f"Failed to enumerate interfaces: {e}")
+        return tuple(entries)
+
+    def _route_address(self, addresses) -> str:
+        """Source address the kernel would pick for the internet; no packet is sent"""
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect(('8.8.8.8', 80))
+                return s.getsockname()[0]
+        except OSError:
+            return addresses[0].address if addresses else '127.0.0.1'
+
+    def _netlink_loop(self):
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR))
+        except (AttributeError, OSError) as e:
+            self.logger.warning(f"rtnetlink unavailable ({e}), polling interfaces instead")
+            self._poll_loop()
+            return
+
+        with sock:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([sock], [], [], 1.0)
+                if not ready:
+                    continue
+                # Drain the burst (RTM_NEWADDR/RTM_DELADDR/RTM_NEWLINK...) and refresh once
+                while ready:
+                    try:
+                        sock.recv(65535)
+                    except OSError:
+                        break
+                    ready, _, _ = select.select([sock], [], [], self.settle_time)
+                self.refresh()
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_interface_inventory() -> InterfaceInventory:
+    """Return the running inventory shared by discovery, the tunnel and the configurator"""
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = InterfaceInventory()
+            _inventory.start()
+        return _inventory
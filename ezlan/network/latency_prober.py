@@ -0,0 +1,142 @@
+import asyncio
+import itertools
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from .record_layer import RECORD_PROBE, PROBE_REPLY, PROBE_REQUEST
+from ..utils.logger import Logger
+
+# Probe payload: kind (request/reply) + probe id + sender's monotonic send time
+PROBE_FORMAT = struct.Struct('!cId')
+
+
+@dataclass
+class ProbeStats:
+    sent: int = 0
+    received: int = 0
+    rtt: float = 0.0     # last round trip, ms
+    srtt: float = 0.0    # smoothed round trip, ms
+    jitter: float = 0.0  # RFC 3550 interarrival jitter over round trips, ms
+    outcomes: deque = field(default_factory=lambda: deque(maxlen=30))  # True = answered
+
+    @property
+    def packet_loss(self) -> float:
+        """Fraction of recent probes that were not answered in time"""
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def record_reply(self, rtt):
+        if self.received:
+            # J += (|D| - J) / 16, D being the change in transit time
+            self.jitter += (abs(rtt - self.rtt) - self.jitter) / 16
+            self.srtt += (rtt - self.srtt) / 8
+        else:
+            self.srtt = rtt
+        self.rtt = rtt
+        self.received += 1
+        self.outcomes.append(True)
+
+
+class LatencyProber:
+    """Measures RTT, jitter and loss to every peer with in-band probe records.
+
+    Probes travel as RECORD_PROBE records over each peer's existing tunnel
+    (UDP when available), so they need no raw-socket privileges and no
+    thread per peer: one task on the data plane's event loop probes every
+    peer each ``interval``. Peers answer probes in the data plane itself.
+    Peers with live two-way traffic are measured passively by their
+    PathMeter and are not probed.
+    ``result_callback(host, rtt_ms_or_None, stats)`` is called per answer
+    or timeout.
+    """
+
+    def __init__(self, data_plane, interval=1.0, timeout=1.0, result_callback=None):
+        self.logger = Logger("LatencyProber")
+        self.data_plane = data_plane
+        self.interval = interval
+        self.timeout = timeout
+        self.result_callback = result_callback
+        self.stats = {}    # host -> ProbeStats
+        self._pending = {}  # (host, probe id) -> send time
+        self._ids = itertools.count(1)
+        self._task = None
+        data_plane.probe_handler = self.handle_reply
+
+    def watch(self, host):
+        self.stats.setdefault(host, ProbeStats())
+        if self._task is None:
+            self.data_plane.loop.call_soon_threadsafe(self._start)
+
+    def unwatch(self, host=None):
+        hosts = list(self.stats) if host is None else [host]
+        for host in hosts:
+            self.stats.pop(host, None)
+        for key in [key for key in self._pending if key[0] not in self.stats]:
+            del self._pending[key]
+
+    def stop(self):
+        self.unwatch()
+        if self._task:
+            self.data_plane.loop.call_soon_threadsafe(self._task.cancel)
+            self._task = None
+
+    def handle_reply(self, connection_info, payload):
+        """Called by the data plane for every probe reply"""
+        try:
+            _, probe_id, sent_at = PROBE_FORMAT.unpack(payload)
+        except struct.error:
+            return
+        host = connection_info['host']
+        if self._pending.pop((host, probe_id), None) is None:
+            return  # Late or unknown; already counted as lost
+
+        rtt = (time.monotonic() - sent_at) * 1000
+        stats = self.stats.get(host)
+        if stats:
+            stats.record_reply(rtt)
+            self._report(host, rtt, stats)
+
+    def _start(self):
+        if self._task is None:
+            self._task = self.data_plane.loop.create_task(self._probe_loop())
+
+    async def _probe_loop(self):
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+            connections = self.data_plane.secure_tunnel.active_connections
+            for host, stats in list(self.stats.items()):
+                connection_info = connections.get(host)
+                meter = connection_info.get('path_meter') if connection_info else None
+                if meter and meter.srtt_us is not None and now - meter.last_received < self.interval:
+                    continue  # Live traffic already measures this path
+                stats.sent += 1
+                if connection_info is None or connection_info['status'] != 'connected':
+                    # No tunnel to probe through counts as a lost probe
+                    stats.outcomes.append(False)
+                    self._report(host, None, stats)
+                    continue
+                probe_id = next(self._ids) & 0xFFFFFFFF
+                self._pending[(host, probe_id)] = now
+                self.data_plane.send_payload(
+                    connection_info, PROBE_FORMAT.pack(PROBE_REQUEST, probe_id, now), RECORD_PROBE
+                )
+            await asyncio.sleep(self.interval)
+
+    def _expire(self, now):
+        for key, sent_at in list(self._pending.items()):
+            if now - sent_at > self.timeout:
+                del self._pending[key]
+                stats = self.stats.get(key[0])
+                if stats:
+                    stats.outcomes.append(False)
+                    self._report(key[0], None, stats)
+
+    def _report(self, host, rtt, stats):
+        if self.result_callback:
+            try:
+                self.result_callback(host, rtt, stats)
+            except Exception as e:
+                self.logger.error(f"Probe result handler failed: {e}")
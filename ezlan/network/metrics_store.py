@@ -0,0 +1,154 @@
+import threading
+from typing import Dict, Iterable, Optional
+import numpy as np
+
+METRICS = ('latency', 'jitter', 'packet_loss', 'bandwidth')
+
+
+class MetricRing:
+    """Fixed-capacity ring of float32 samples, one column per metric.
+
+    Appending is O(1): the oldest row is overwritten in place and the
+    windowed mean and variance of every column are updated with Welford's
+    method (adding the new sample, removing the evicted one). The sums are
+    recomputed exactly once per revolution so rounding error cannot build up.
+    """
+
+    def __init__(self, columns: Iterable[str] = METRICS, capacity: int = 60):
+        self.columns = tuple(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(self.columns)), dtype=np.float32)
+        self.count = 0
+        self.head = 0  # next row to write
+        self.appended = 0
+        self._mean = np.zeros(len(self.columns))
+        self._m2 = np.zeros(len(self.columns))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, values):
+        """Add one sample; values is a sequence in column order or a dict by column"""
+        with self._lock:
+            if isinstance(values, dict):
+                # Columns not reported this time repeat their previous sample
+                previous = self.data[(self.head - 1) % self.capacity]
+                row = np.array([values.get(name, previous[i]) for i, name in enumerate(self.columns)],
+                               dtype=np.float32)
+            else:
+                row = np.asarray(values, dtype=np.float32)
+            new = row.astype(np.float64)
+
+            if self.count == self.capacity:
+                old = self.data[self.head].astype(np.float64)
+                self.data[self.head] = row
+                delta = new - old
+                old_mean = self._mean
+                self._mean = old_mean + delta / self.count
+                self._m2 += delta * (new - self._mean + old - old_mean)
+            else:
+                self.data[self.head] = row
+                self.count += 1
+                delta = new - self._mean
+                self._mean = self._mean + delta / self.count
+                self._m2 += delta * (new - self._mean)
+
+            self.head = (self.head + 1) % self.capacity
+            self.appended += 1
+            if self.appended % self.capacity == 0:
+                self._recompute()
+
+    def mean(self, column: str) -> float:
+        with self._lock:
+            return float(self._mean[self.index[column]]) if self.count else 0.0
+
+    def variance(self, column: str) -> float:
+        with self._lock:
+            if self.count < 2:
+                return 0.0
+            return max(0.0, float(self._m2[self.index[column]] / self.count))
+
+    def std(self, column: str) -> float:
+        return float(np.sqrt(self.variance(column)))
+
+    def latest(self, column: str) -> Optional[float]:
+        with self._lock:
+            if not self.count:
+                return None
+            return float(self.data[(self.head - 1) % self.capacity, self.index[column]])
+
+    def values(self, column: str = None) -> np.ndarray:
+        """Samples oldest first; one column or all of them"""
+        with self._lock:
+            if self.count < self.capacity:
+                rows = self.data[:self.count]
+            else:
+                rows = np.concatenate((self.data[self.head:], self.data[:self.head]))
+            rows = rows.copy()
+        return rows if column is None else rows[:, self.index[column]]
+
+    def _recompute(self):
+        rows = self.data[:self.count].astype(np.float64)
+        self._mean = rows.mean(axis=0)
+        self._m2 = ((rows - self._mean) ** 2).sum(axis=0)
+
+
+class MetricsStore:
+    """Per-connection metric history shared by analytics and optimizers.
+
+    Every consumer that registers a connection with ``add_connection``
+    holds a reference to its ring; the ring is dropped when the last of
+    them calls ``remove_connection``.
+    """
+
+    def __init__(self, capacity: int = 60, columns: Iterable[str] = METRICS):
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self.rings: Dict[str, MetricRing] = {}
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_connection(self, user_name: str) -> MetricRing:
+        with self._lock:
+            self._refs[user_name] = self._refs.get(user_name, 0) + 1
+            return self._ring(user_name)
+
+    def remove_connection(self, user_name: str):
+        with self._lock:
+            refs = self._refs.pop(user_name, 0) - 1
+            if refs > 0:
+                self._refs[user_name] = refs
+            else:
+                self.rings.pop(user_name, None)
+
+    def get(self, user_name: str) -> Optional[MetricRing]:
+        return self.rings.get(user_name)
+
+    def record(self, user_name: str, **values) -> Optional[MetricRing]:
+        """Append a sample; dropped unless a consumer holds the connection"""
+        ring = self.rings.get(user_name)
+        if ring is None:
+            return None  # Released, or never added; recreating it here would leak
+        ring.append(values)
+        return ring
+
+    def _ring(self, user_name: str) -> MetricRing:
+        ring = self.rings.get(user_name)
+        if ring is None:
+            ring = self.rings[user_name] = MetricRing(self.columns, self.capacity)
+        return ring
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store() -> MetricsStore:
+    """Return the store every analytics and optimizer module reads from"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetricsStore()
+        return _store
@@ -1,44 +1,81 @@
 from PyQt6.QtCore import QObject, pyqtSignal
-import threading
-import time
-import ping3
+from .latency_prober import LatencyProber
+from .scheduler import get_scheduler
 
 class ConnectionMonitor(QObject):
     status_changed = pyqtSignal(str, bool)  # user_name, is_connected
     latency_updated = pyqtSignal(str, float)  # user_name, latency_ms
 
-    def __init__(self, tunnel_service):
+    def __init__(self, tunnel_service, quality_monitor=None):
         super().__init__()
         self.tunnel_service = tunnel_service
-        self.active_monitors = {}
+        self.quality_monitor = quality_monitor or getattr(tunnel_service, 'quality_monitor', None)
+        self.active_monitors = {}  # user_name -> peer address
+        self.consecutive_failures = {}
         self.running = True
+        self.secure_tunnel = tunnel_service.secure_tunnel
+        # One in-band prober on the tunnel's event loop serves every idle peer
+        self.prober = LatencyProber(self.secure_tunnel.data_plane,
+                                    result_callback=self._handle_result)
+        # Peers with traffic are measured from the data frames themselves
+        self._job = get_scheduler().schedule("ConnectionMonitor", self._sample_paths, 1.0)
 
     def start_monitoring(self, user_name, ip_address):
         if user_name not in self.active_monitors:
             self.active_monitors[user_name] = ip_address
-            threading.Thread(target=self._monitor_connection,
-                           args=(user_name, ip_address),
-                           daemon=True).start()
-
-    def stop_monitoring(self, user_name):
-        if user_name in self.active_monitors:
-            del self.active_monitors[user_name]
-
-    def _monitor_connection(self, user_name, ip_address):
-        consecutive_failures = 0
-        while self.running and user_name in self.active_monitors:
-            try:
-                latency = ping3.ping(ip_address, timeout=1)
-                if latency is not None:
-                    consecutive_failures = 0
-                    self.latency_updated.emit(user_name, latency * 1000)
-                    self.status_changed.emit(user_name, True)
-                else:
-                    consecutive_failures += 1
-            except Exception:
-                consecutive_failures += 1
-
-            if consecutive_failures >= 3:
-                self.status_changed.emit(user_name, False)
-
-            time.sleep(1)
+            self.consecutive_failures[user_name] = 0
+            if self.quality_monitor and user_name not in self.quality_monitor.connections:
+                self.quality_monitor.add_connection(user_name)
+            self.prober.watch(ip_address)
+
+    def stop_monitoring(self, user_name=None):
+        if user_name is None:
+            self.active_monitors.clear()
+            self.consecutive_failures.clear()
+            self.prober.unwatch()
+        elif user_name in self.active_monitors:
+            ip_address = self.active_monitors.pop(user_name)
+            self.consecutive_failures.pop(user_name, None)
+            if ip_address not in self.active_monitors.values():
+                self.prober.unwatch(ip_address)
+
+    def stop(self):
+        self.running = False
+        get_scheduler().cancel(self._job)
+        self.stop_monitoring()
+        self.prober.stop()
+
+    def _sample_paths(self):
+        """Report passive measurements for every peer that had traffic in the last second"""
+        for user_name, ip_address in list(self.active_monitors.items()):
+            connection_info = self.secure_tunnel.active_connections.get(ip_address)
+            meter = connection_info.get('path_meter') if connection_info else None
+            if meter is None:
+                continue
+            sample = meter.sample()
+            if not sample.frames:
+                continue  # Idle; the prober covers it
+
+            self.consecutive_failures[user_name] = 0
+            self.status_changed.emit(user_name, True)
+            if sample.rtt:
+                self.latency_updated.emit(user_name, sample.rtt)
+            if self.quality_monitor and meter.srtt_us is not None:
+                # One-way traffic has no RTT yet; the prober keeps reporting until it does
+                self.quality_monitor.update_metrics(user_name, sample.rtt, sample.packet_loss, sample.jitter)
+
+    def _handle_result(self, ip_address, latency, stats):
+        for user_name, address in list(self.active_monitors.items()):
+            if address != ip_address:
+                continue
+
+            if latency is not None:
+                self.consecutive_failures[user_name] = 0
+                self.latency_updated.emit(user_name, latency)
+                self.status_changed.emit(user_name, True)
+                if self.quality_monitor:
+                    self.quality_monitor.update_metrics(user_name, stats.srtt, stats.packet_loss, stats.jitter)
+            else:
+                self.consecutive_failures[user_name] += 1
+                if self.consecutive_failures[user_name] >= 3:
+                    self.status_changed.emit(user_name, False)
@@ -2,13 +2,20 @@ import logging
 import socket
 import subprocess
 import sys
+import threading
 from ezlan.network.upnp import UPnPClient
+from ezlan.network.interface_inventory import get_interface_inventory
 from ezlan.utils.logger import Logger
 
 class NetworkConfigurator:
     def __init__(self):
         self.logger = Logger("NetworkConfigurator")
         self.upnp = None
+        self.forwarded_ports = set()
+        self._lock = threading.RLock()  # Serializes UPnP calls and guards forwarded_ports
+        self.interfaces = get_interface_inventory()
+        self._mapped_address = self.interfaces.local_ip()
+        self.interfaces.changed.connect(self._on_interfaces_changed)
         
     def setup(self, port):
         """Setup network configuration"""
@@ -65,14 +72,16 @@ class NetworkConfigurator:
     def setup_port_forwarding(self, port):
         """Setup port forwarding using UPnP"""
         try:
-            # Only try UPnP if we haven't already failed
-            if self.upnp is None:
-                self.upnp = UPnPClient()
-                
-            if self.upnp and self.upnp.add_port_mapping(port):
-                self.logger.info(f"Successfully set up port forwarding for port {port}")
-                return True
-                
+            with self._lock:
+                # Only try UPnP if we haven't already failed
+                if self.upnp is None:
+                    self.upnp = UPnPClient()
+
+                if self.upnp and self.upnp.add_port_mapping(port):
+                    self.logger.info(f"Successfully set up port forwarding for port {port}")
+                    self.forwarded_ports.add(port)
+                    return True
+
             return False
             
         except Exception as e:
@@ -82,12 +91,33 @@ class NetworkConfigurator:
     def remove_port_forwarding(self, port):
         """Remove port forwarding"""
         try:
-            if self.upnp:
-                self.upnp.remove_port_mapping(port)
-                self.logger.info(f"Removed port forwarding for port {port}")
+            with self._lock:
+                self.forwarded_ports.discard(port)
+                if self.upnp:
+                    self.upnp.remove_port_mapping(port)
+                    self.logger.info(f"Removed port forwarding for port {port}")
         except Exception as e:
             self.logger.warning(f"Failed to remove port forwarding: {e}")
 
+    def _on_interfaces_changed(self, addresses):
+        """Point existing UPnP mappings at the new address when the primary address moves"""
+        address = self.interfaces.local_ip()
+        if address == self._mapped_address:
+            return
+        self._mapped_address = address
+        # UPnP discovery and SOAP calls block for seconds; keep them off the watcher thread
+        threading.Thread(target=self._renew_port_forwarding, args=(address,),
+                         daemon=True, name="UPnPRenewal").start()
+
+    def _renew_port_forwarding(self, address):
+        with self._lock:
+            if address != self._mapped_address:
+                return  # A later change superseded this one
+            self.upnp = None  # The new address may sit behind a different gateway
+            for port in list(self.forwarded_ports):
+                self.logger.info(f"Local address changed to {address}, renewing port forwarding for {port}")
+                self.setup_port_forwarding(port)
+
     def cleanup(self):
         """Cleanup network configuration"""
         try:
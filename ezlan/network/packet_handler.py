@@ -3,7 +3,8 @@ import socket
 import struct
 import threading
 from typing import Dict, Optional
-from cryptography.fernet import Fernet
+from .port_classifier import get_port_classifier
+from .record_layer import RECORD_DATA, RecordError
 from ..utils.logger import Logger
 
 class CustomNetworkInterface(QObject):
@@ -16,7 +17,7 @@ class CustomNetworkInterface(QObject):
         self.bound_ip = None
         self.running = False
         self.packet_buffer_size = 65535
-        self.gaming_ports = {3074, 3075, 27015, 27016, 7777, 8080}
+        self.port_classifier = get_port_classifier()
         self.receive_thread = None
         self.packet_handlers = {}
         
@@ -41,22 +42,25 @@ class SecurePacketHandler:
     def __init__(self, tunnel_service):
         self.tunnel_service = tunnel_service
         self.logger = Logger("SecurePacketHandler")
-        self.gaming_ports = {3074, 3075, 27015, 27016, 7777, 8080}
+        self.port_classifier = get_port_classifier()
         
     def handle_packet(self, encrypted_data: bytes, connection_info: dict) -> bool:
         try:
-            # Decrypt packet
-            data = Fernet(connection_info['encryption_key']).decrypt(encrypted_data)
+            # Authenticate and decrypt the record
+            record_type, data = connection_info['record_layer'].open(encrypted_data)
+            if record_type != RECORD_DATA:
+                return False
             
             # Check for gaming packet
-            if len(data) > 28:  # IP + UDP header
-                dst_port = struct.unpack('!H', data[22:24])[0]
-                if dst_port in self.gaming_ports:
-                    return self._handle_gaming_packet(data, connection_info)
+            if self.port_classifier.is_gaming(data):
+                return self._handle_gaming_packet(data, connection_info)
                     
             # Handle regular packet
             return self._handle_regular_packet(data, connection_info)
             
+        except RecordError as e:
+            self.logger.debug(f"Dropped record: {e}")
+            return False
         except Exception as e:
             self.logger.error(f"Packet handling error: {e}")
             return False
\ No newline at end of file
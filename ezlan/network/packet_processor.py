@@ -2,10 +2,13 @@ from PyQt6.QtCore import QObject, pyqtSignal
 import socket
 import struct
 import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
 from typing import Dict, Optional
 from .packet_router import PacketRouter
+from .port_classifier import get_port_classifier
 from ..utils.logger import Logger
-from queue import Queue
 
 class CustomNetworkInterface(QObject):
     packet_received = pyqtSignal(bytes)
@@ -18,7 +21,7 @@ class CustomNetworkInterface(QObject):
         self.bound_ip = None
         self.running = False
         self.packet_router = PacketRouter()
-        self.gaming_ports = {3074, 3075, 27015, 27016, 7777, 8080}
+        self.port_classifier = get_port_classifier()
         self.monitor = self._setup_monitoring()
         
     def initialize(self, ip_address: str) -> bool:
@@ -39,27 +42,141 @@ class CustomNetworkInterface(QObject):
             self.logger.error(f"Interface initialization failed: {e}")
             return False
 
+@dataclass
+class LaneStats:
+    enqueued: int = 0
+    dequeued: int = 0
+    dropped: int = 0
+    max_depth: int = 0
+    avg_latency: float = 0.0  # seconds between enqueue and dequeue (EWMA)
+    max_latency: float = 0.0
+
+    def record_latency(self, latency):
+        self.dequeued += 1
+        self.avg_latency += 0.1 * (latency - self.avg_latency)
+        self.max_latency = max(self.max_latency, latency)
+
+
 class PacketProcessor:
-    def __init__(self, interface):
+    """Classifies packets at enqueue time into strict-priority lanes.
+
+    Gaming traffic is always served first, then interactive traffic (small
+    packets and latency-sensitive ports), then bulk. Each lane is a bounded
+    deque: the gaming and interactive lanes drop their oldest packet when
+    full, since a stale game frame is worth less than a fresh one, while
+    bulk drops the arriving packet (drop-tail) and leaves retransmission to
+    TCP.
+    """
+
+    LANES = ('gaming', 'interactive', 'bulk')
+    INTERACTIVE_PORTS = {22, 53, 3389, 5060}  # SSH, DNS, RDP, SIP
+    INTERACTIVE_SIZE = 256  # bytes; small packets are usually chat, voice or ACKs
+
+    def __init__(self, interface, lane_limits=None, port_classifier=None):
         self.interface = interface
         self.logger = Logger("PacketProcessor")
-        self.gaming_ports = interface.gaming_ports
-        self.packet_queue = Queue(maxsize=1000)
+        self.port_classifier = port_classifier or get_port_classifier()
+        limits = {'gaming': 256, 'interactive': 256, 'bulk': 1000}
+        limits.update(lane_limits or {})
+        self.lane_limits = limits
+        self.lanes = {lane: deque() for lane in self.LANES}
+        self.lane_stats = {lane: LaneStats() for lane in self.LANES}
+        self._condition = threading.Condition()
+        self.running = False
         self.processing_thread = None
         
     def start(self):
+        self.running = True
         self.processing_thread = threading.Thread(target=self._process_packets, daemon=True)
         self.processing_thread.start()
+
+    def stop(self):
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+        if self.processing_thread:
+            self.processing_thread.join(timeout=1.0)
+
+    def submit(self, packet) -> bool:
+        """Queue a packet on its lane; returns False if it was dropped"""
+        with self._condition:
+            accepted = self._enqueue(self.classify(packet), packet)
+            self._condition.notify()
+        return accepted
+
+    def submit_batch(self, packets) -> int:
+        """Classify and queue many packets at once; returns how many were accepted"""
+        gaming = self.port_classifier.classify_batch(packets)
+        lanes = ['gaming' if is_gaming else self._non_gaming_lane(packet)
+                 for packet, is_gaming in zip(packets, gaming)]
+        with self._condition:
+            accepted = sum(self._enqueue(lane, packet) for lane, packet in zip(lanes, packets))
+            self._condition.notify()
+        return accepted
+
+    def classify(self, packet) -> str:
+        if self._is_gaming_packet(packet):
+            return 'gaming'
+        return self._non_gaming_lane(packet)
+
+    def _non_gaming_lane(self, packet) -> str:
+        if len(packet) <= self.INTERACTIVE_SIZE or self._destination_port(packet) in self.INTERACTIVE_PORTS:
+            return 'interactive'
+        return 'bulk'
+
+    def _enqueue(self, lane, packet) -> bool:
+        queue = self.lanes[lane]
+        stats = self.lane_stats[lane]
+        stats.enqueued += 1
+        if len(queue) >= self.lane_limits[lane]:
+            stats.dropped += 1
+            if lane == 'bulk':
+                return False
+            queue.popleft()
+        queue.append((time.perf_counter(), packet))
+        stats.max_depth = max(stats.max_depth, len(queue))
+        return True
+
+    def get_lane_stats(self) -> Dict[str, dict]:
+        """Current depth plus counters and latency for every lane"""
+        with self._condition:
+            return {
+                lane: {'depth': len(self.lanes[lane]), **asdict(self.lane_stats[lane])}
+                for lane in self.LANES
+            }
         
     def _process_packets(self):
         while True:
+            with self._condition:
+                while self.running and not any(self.lanes.values()):
+                    self._condition.wait()
+                if not self.running:
+                    return
+                # Strict priority: always take from the highest non-empty lane
+                for lane in self.LANES:
+                    if self.lanes[lane]:
+                        queued_at, packet = self.lanes[lane].popleft()
+                        self.lane_stats[lane].record_latency(time.perf_counter() - queued_at)
+                        break
+
             try:
-                packet = self.packet_queue.get()
-                if self._is_gaming_packet(packet):
+                if lane == 'gaming':
                     self._handle_gaming_packet(packet)
                 else:
                     self._handle_regular_packet(packet)
                     
             except Exception as e:
                 self.logger.error(f"Packet processing error: {e}")
-                continue 
\ No newline at end of file
+                continue
+
+    def _destination_port(self, packet) -> Optional[int]:
+        return self.port_classifier.destination_port(packet)
+
+    def _is_gaming_packet(self, packet) -> bool:
+        return self.port_classifier.is_gaming(packet)
+
+    def _handle_gaming_packet(self, packet):
+        self.interface.packet_received.emit(packet)
+
+    def _handle_regular_packet(self, packet):
+        self.interface.packet_received.emit(packet)
@@ -1,62 +1,119 @@
+import ipaddress
 import socket
 import threading
 from ezlan.utils.logger import Logger
+from .send_batcher import BatchingStage
+
+class RoutingTable:
+    """Immutable longest-prefix-match table over IPv4 networks.
+
+    Routes are grouped by prefix length into dicts keyed by the integer
+    network address, so a lookup is at most one masked dict probe per
+    distinct prefix length (33 worst case), longest first.
+    """
+
+    def __init__(self, routes=None):
+        self.routes = dict(routes or {})  # ip_network -> route
+        by_length = {}
+        for network, route in self.routes.items():
+            by_length.setdefault(network.prefixlen, {})[int(network.network_address)] = route
+        self._levels = tuple(
+            (int(ipaddress.IPv4Network(f"0.0.0.0/{length}").netmask), by_length[length])
+            for length in sorted(by_length, reverse=True)
+        )
+
+    def lookup(self, ip: int):
+        """Return the most specific route containing ip, or None"""
+        for mask, table in self._levels:
+            route = table.get(ip & mask)
+            if route is not None:
+                return route
+        return None
+
+    def with_route(self, network, route):
+        routes = dict(self.routes)
+        routes[network] = route
+        return RoutingTable(routes)
+
+    def without_route(self, network):
+        routes = dict(self.routes)
+        routes.pop(network, None)
+        return RoutingTable(routes)
 
 class PacketRouter:
-    def __init__(self):
+    def __init__(self, batch_window=0.0002, max_batch=64):
         self.logger = Logger("PacketRouter")
-        self.routing_table = {}  # Maps IP ranges to destinations
-        self._lock = threading.Lock()
-        
+        self._table = RoutingTable()
+        self._lock = threading.Lock()  # Serializes writers only; lookups read the current snapshot
+        # Socket destinations are coalesced for batch_window seconds; 0 sends immediately
+        self.batching = BatchingStage(batch_window, max_batch) if batch_window > 0 else None
+
+    @property
+    def routing_table(self):
+        """Maps networks to routes"""
+        return self._table.routes
+
     def add_route(self, source_ip, dest_network, destination):
         """Add a route to the routing table"""
+        network = ipaddress.IPv4Network(dest_network, strict=False)
         with self._lock:
-            self.routing_table[dest_network] = {
+            self._table = self._table.with_route(network, {
                 'source_ip': source_ip,
                 'destination': destination
-            }
-            self.logger.info(f"Added route from {source_ip} to {dest_network}")
-            
+            })
+            self.logger.info(f"Added route from {source_ip} to {network}")
+
     def remove_route(self, dest_network):
         """Remove a route from the routing table"""
+        network = ipaddress.IPv4Network(dest_network, strict=False)
         with self._lock:
-            if dest_network in self.routing_table:
-                del self.routing_table[dest_network]
-                self.logger.info(f"Removed route to {dest_network}")
-                
+            if network in self._table.routes:
+                route = self._table.routes[network]
+                self._table = self._table.without_route(network)
+                destination = route['destination']
+                # Other networks may still be routed through the same socket
+                if self.batching and not any(
+                    other['destination'] is destination for other in self._table.routes.values()
+                ):
+                    self.batching.remove(destination)
+                self.logger.info(f"Removed route to {network}")
+
+    def lookup(self, dest_ip):
+        """Return the route for dest_ip (string, int or packed bytes)"""
+        if not isinstance(dest_ip, int):
+            dest_ip = int(ipaddress.IPv4Address(dest_ip))
+        return self._table.lookup(dest_ip)
+
     def route_packet(self, source_ip, dest_ip, packet):
         """Route a packet to its destination"""
         try:
-            with self._lock:
-                # Find matching route
-                for network, route in self.routing_table.items():
-                    if self._ip_in_network(dest_ip, network):
-                        destination = route['destination']
-                        if isinstance(destination, socket.socket):
-                            destination.send(packet)
-                        else:
-                            destination.write_packet(packet)
-                        return True
-                        
-            # No route found
-            self.logger.debug(f"No route found for packet from {source_ip} to {dest_ip}")
-            return False
-            
+            route = self.lookup(dest_ip)
+            if route is None:
+                self.logger.debug(f"No route found for packet from {source_ip} to {dest_ip}")
+                return False
+
+            destination = route['destination']
+            if isinstance(destination, socket.socket):
+                if self.batching:
+                    self.batching.submit(destination, packet)
+                else:
+                    destination.send(packet)
+            else:
+                destination.write_packet(packet)
+            return True
+
         except Exception as e:
             self.logger.error(f"Error routing packet: {e}")
             return False
-            
-    def _ip_in_network(self, ip, network):
-        """Check if IP is in network range"""
-        try:
-            # Simple string comparison for now
-            # Could be enhanced with proper IP address handling
-            return ip.startswith(network.split('.')[0])
-        except:
-            return False
-            
+
+    def get_batch_stats(self):
+        """Return achieved batch sizes per destination socket"""
+        return self.batching.get_stats() if self.batching else {}
+
     def clear(self):
         """Clear all routes"""
         with self._lock:
-            self.routing_table.clear()
+            self._table = RoutingTable()
+            if self.batching:
+                self.batching.clear()
             self.logger.info("Cleared all routes")
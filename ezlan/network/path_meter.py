@@ -0,0 +1,119 @@
+import struct
+import threading
+import time
+from dataclasses import dataclass
+
+# Carried in front of every data frame inside the encrypted record:
+# frame sequence, sender timestamp, echoed peer timestamp (all 32-bit, wrapping)
+FRAME_HEADER = struct.Struct('!III')
+
+_WRAP = 1 << 32
+_HALF = 1 << 31
+
+
+def _now_us() -> int:
+    return int(time.monotonic() * 1_000_000) % _WRAP
+
+
+def _diff(a, b) -> int:
+    """a - b on the 32-bit circle, as a signed value"""
+    d = (a - b) % _WRAP
+    return d - _WRAP if d >= _HALF else d
+
+
+@dataclass
+class PathSample:
+    """Path quality measured from live traffic over one sampling interval"""
+    frames: int = 0            # data frames received in the interval
+    packet_loss: float = 0.0   # fraction of expected frames that never arrived
+    reordered: int = 0         # frames that arrived after a later one
+    jitter: float = 0.0        # RFC 3550 one-way delay variation, ms
+    rtt: float = 0.0           # smoothed round trip from echoed timestamps, ms
+
+
+class PathMeter:
+    """Passive RTT, loss, reordering and jitter measurement for one peer.
+
+    Every outgoing data frame carries a sequence number, the sender's clock
+    and the last timestamp received from the peer advanced by how long it
+    was held here. The peer does the same, so the receiver gets RTT as
+    ``now - echo`` on its own clock, loss and reordering from sequence gaps
+    and one-way delay variation from the sender timestamps, without sending
+    any extra packets.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._send_seq = 0
+        # Last peer timestamp and when it arrived, echoed in our next frame
+        self._peer_ts = None
+        self._peer_ts_at = 0
+        # Receive state
+        self._highest = None
+        self._transit = None
+        self.jitter_us = 0.0
+        self.srtt_us = None
+        self.last_received = 0.0
+        # Counters since the last sample()
+        self._received = 0
+        self._expected = 0
+        self._reordered = 0
+
+    def stamp(self) -> bytes:
+        """Header for the next outgoing frame"""
+        now = _now_us()
+        with self._lock:
+            seq = self._send_seq
+            self._send_seq = (seq + 1) % _WRAP
+            if self._peer_ts is None:
+                echo = 0
+            else:
+                # 0 means "nothing to echo", so never send it as a real value
+                echo = (self._peer_ts + (now - self._peer_ts_at) % _WRAP) % _WRAP or 1
+        return FRAME_HEADER.pack(seq, now, echo)
+
+    def receive(self, frame):
+        """Account for one received frame and return its payload without the header"""
+        seq, sent_at, echo = FRAME_HEADER.unpack_from(frame)
+        now = _now_us()
+        with self._lock:
+            self.last_received = time.monotonic()
+            self._received += 1
+            if self._highest is None:
+                self._expected += 1
+                self._highest = seq
+            else:
+                gap = _diff(seq, self._highest)
+                if gap > 0:
+                    self._expected += gap
+                    self._highest = seq
+                else:
+                    self._reordered += 1
+
+            # RFC 3550: J += (|D| - J) / 16, D the change in relative transit time
+            transit = _diff(now, sent_at)
+            if self._transit is not None:
+                self.jitter_us += (abs(transit - self._transit) - self.jitter_us) / 16
+            self._transit = transit
+
+            self._peer_ts = sent_at
+            self._peer_ts_at = now
+            if echo:
+                rtt = _diff(now, echo)
+                if 0 <= rtt < 60_000_000:
+                    self.srtt_us = rtt if self.srtt_us is None else self.srtt_us + (rtt - self.srtt_us) / 8
+        return frame[FRAME_HEADER.size:]
+
+    def sample(self) -> PathSample:
+        """Stats since the previous call; loss is per interval, RTT and jitter smoothed"""
+        with self._lock:
+            received, expected, reordered = self._received, self._expected, self._reordered
+            self._received = self._expected = self._reordered = 0
+            srtt = self.srtt_us or 0.0
+            jitter = self.jitter_us
+
+        loss = 0.0
+        if expected:
+            # Late frames from the previous interval can push received past expected
+            loss = max(0.0, 1.0 - received / expected)
+        return PathSample(received, loss, reordered, jitter / 1000, srtt / 1000)
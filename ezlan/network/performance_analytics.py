@@ -3,6 +3,7 @@ from typing import List, Dict
 import numpy as np
 from PyQt6.QtCore import QObject, pyqtSignal
 import time
+from .metrics_store import MetricRing, get_metrics_store
 
 @dataclass
 class PerformanceMetrics:
@@ -18,34 +19,22 @@ class NetworkAnalytics(QObject):
     
     def __init__(self):
         super().__init__()
-        self.metrics_history: Dict[str, Dict[str, List[float]]] = {}
-        self.analysis_window = 60  # 60 seconds of history
+        self.metrics_store = get_metrics_store()
+        self.analysis_window = self.metrics_store.capacity  # samples of history
         
     def add_connection(self, user_name):
-        self.metrics_history[user_name] = {
-            'latency': [],
-            'jitter': [],
-            'packet_loss': [],
-            'bandwidth': []
-        }
+        self.metrics_store.add_connection(user_name)
+
+    def remove_connection(self, user_name):
+        self.metrics_store.remove_connection(user_name)
         
     def update_metrics(self, user_name, latency, jitter, packet_loss, bandwidth):
-        if user_name not in self.metrics_history:
-            self.add_connection(user_name)
-            
-        history = self.metrics_history[user_name]
-        current_time = time.time()
-        
         # Update history
-        history['latency'].append(latency)
-        history['jitter'].append(jitter)
-        history['packet_loss'].append(packet_loss)
-        history['bandwidth'].append(bandwidth)
-        
-        # Trim old data
-        for metric in history.values():
-            if len(metric) > self.analysis_window:
-                metric.pop(0)
+        history = self.metrics_store.record(
+            user_name, latency=latency, jitter=jitter, packet_loss=packet_loss, bandwidth=bandwidth
+        )
+        if history is None:
+            return  # Connection already removed
         
         # Calculate performance metrics
         metrics = self._calculate_metrics(history)
@@ -54,11 +43,12 @@ class NetworkAnalytics(QObject):
         # Check for performance issues
         self._check_alerts(user_name, metrics)
     
-    def _calculate_metrics(self, history) -> PerformanceMetrics:
-        avg_latency = np.mean(history['latency'])
-        jitter = np.std(history['latency'])
-        packet_loss = np.mean(history['packet_loss'])
-        bandwidth_util = np.mean(history['bandwidth'])
+    def _calculate_metrics(self, history: MetricRing) -> PerformanceMetrics:
+        # Running window statistics, no pass over the history
+        avg_latency = history.mean('latency')
+        jitter = history.std('latency')
+        packet_loss = history.mean('packet_loss')
+        bandwidth_util = history.mean('bandwidth')
         
         # Calculate connection stability score
         stability = 1.0
@@ -0,0 +1,149 @@
+import json
+import struct
+import threading
+from pathlib import Path
+import numpy as np
+from .qos_profiles import GamingQoSProfile, QoSProfileManager
+from ..utils.logger import Logger
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+MIN_IP_HEADER = 20
+
+
+class PortClassifier:
+    """Decides whether IPv4 packets are gaming traffic by destination port.
+
+    Gaming ports come from the QoS profiles plus any custom ports the user
+    registered (persisted in ``~/.ezlan/game_ports.json``). They are compiled
+    into a 65536-bit bitmap, so a lookup is one byte index and a shift. The
+    port is read after the real IP header length, and only for the first
+    fragment of TCP or UDP packets.
+    """
+
+    def __init__(self, storage_path=None):
+        self.logger = Logger("PortClassifier")
+        self.storage_path = Path(storage_path) if storage_path else Path.home() / '.ezlan' / 'game_ports.json'
+        self.profile_ports = self._profile_ports()
+        self.custom_ports = set()
+        self._lock = threading.Lock()
+        self._load_custom_ports()
+        self._bitmap = self._build_bitmap()
+
+    @property
+    def gaming_ports(self):
+        return self.profile_ports | self.custom_ports
+
+    def add_custom_port(self, port: int):
+        self._check_port(port)
+        with self._lock:
+            self.custom_ports.add(port)
+            self._rebuild()
+
+    def remove_custom_port(self, port: int):
+        with self._lock:
+            self.custom_ports.discard(port)
+            self._rebuild()
+
+    def is_gaming_port(self, port) -> bool:
+        return port is not None and bool(self._bitmap[port >> 3] >> (port & 7) & 1)
+
+    def destination_port(self, packet):
+        """Destination port of a TCP/UDP IPv4 packet, None for anything else"""
+        if len(packet) < MIN_IP_HEADER or packet[0] >> 4 != 4:
+            return None
+        header_length = (packet[0] & 0x0F) * 4
+        if header_length < MIN_IP_HEADER or len(packet) < header_length + 4:
+            return None
+        if packet[9] not in (IPPROTO_TCP, IPPROTO_UDP):
+            return None
+        if struct.unpack_from('!H', packet, 6)[0] & 0x1FFF:
+            return None  # Later fragments carry no transport header
+        return struct.unpack_from('!H', packet, header_length + 2)[0]
+
+    def is_gaming(self, packet) -> bool:
+        return self.is_gaming_port(self.destination_port(packet))
+
+    def classify_batch(self, packets) -> np.ndarray:
+        """Classify many packets at once; returns a boolean array"""
+        count = len(packets)
+        if not count:
+            return np.zeros(0, dtype=bool)
+
+        lengths = np.fromiter((len(packet) for packet in packets), dtype=np.int64, count=count)
+        starts = np.zeros(count, dtype=np.int64)
+        np.cumsum(lengths[:-1], out=starts[1:])
+        # Pad so header reads past a short packet stay inside the buffer
+        data = np.frombuffer(b''.join(packets) + bytes(64), dtype=np.uint8)
+
+        first = data[starts]
+        header_length = (first & 0x0F).astype(np.int64) * 4
+        protocol = data[starts + 9]
+        fragment = ((data[starts + 6].astype(np.int64) & 0x1F) << 8) | data[starts + 7]
+        valid = (
+            (lengths >= MIN_IP_HEADER)
+            & (first >> 4 == 4)
+            & (header_length >= MIN_IP_HEADER)
+            & (lengths >= header_length + 4)
+            & ((protocol == IPPROTO_TCP) | (protocol == IPPROTO_UDP))
+            & (fragment == 0)
+        )
+
+        port_offset = np.minimum(starts + header_length + 2, len(data) - 2)
+        ports = (data[port_offset].astype(np.int64) << 8) | data[port_offset + 1]
+        bits = (self._bitmap[ports >> 3] >> (ports & 7)) & 1
+        return valid & (bits == 1)
+
+    def _rebuild(self):
+        self._save_custom_ports()
+        # Readers keep using the old bitmap until the new one is swapped in
+        self._bitmap = self._build_bitmap()
+
+    def _build_bitmap(self) -> np.ndarray:
+        bitmap = np.zeros(65536 // 8, dtype=np.uint8)
+        for port in self.gaming_ports:
+            bitmap[port >> 3] |= 1 << (port & 7)
+        return bitmap
+
+    def _profile_ports(self):
+        ports = set()
+        for preset in QoSProfileManager().presets.values():
+            if preset.priority >= 9:  # Gaming preset
+                ports.update(preset.ports)
+        for preset in GamingQoSProfile().presets.values():
+            ports.update(preset.get('ports', []))
+        return ports
+
+    def _check_port(self, port):
+        if not isinstance(port, int) or not 0 < port < 65536:
+            raise ValueError(f"Invalid port: {port}")
+
+    def _load_custom_ports(self):
+        try:
+            if self.storage_path.exists():
+                with open(self.storage_path, 'r') as f:
+                    self.custom_ports = {int(port) for port in json.load(f) if 0 < int(port) < 65536}
+        except Exception as e:
+            self.logger.error(f"Failed to load custom game ports: {e}")
+            self.custom_ports = set()
+
+    def _save_custom_ports(self):
+        try:
+            self.storage_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.storage_path, 'w') as f:
+                json.dump(sorted(self.custom_ports), f)
+        except Exception as e:
+            self.logger.error(f"Failed to save custom game ports: {e}")
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_port_classifier() -> PortClassifier:
+    """Return the classifier shared by every packet path"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = PortClassifier()
+        return _classifier
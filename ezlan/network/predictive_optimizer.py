@@ -3,6 +3,9 @@ import threading
 import time
 import numpy as np
 from ezlan.utils.logger import Logger
+from .metrics_store import get_metrics_store
+from .scheduler import get_scheduler
+from .trend_forecaster import HoltForecaster
 
 class PredictiveOptimizer(QObject):
     prediction_made = pyqtSignal(str, str)  # user, prediction_description
@@ -14,15 +17,18 @@ class PredictiveOptimizer(QObject):
         self.running = False
         self.connections = {}
         self._lock = threading.Lock()
-        self.update_interval = 10.0  # 10 second update interval
-        self.history_length = 60  # Keep 60 data points
+        self.update_interval = 1.0  # 1 second update interval
+        self.forecast_horizon = 10.0  # samples (seconds) ahead
+        self.action_cooldown = 30.0  # seconds between preemptive actions per connection
+        self.metrics_store = get_metrics_store()  # History is recorded by NetworkAnalytics
+        self.forecaster = HoltForecaster(('latency', 'packet_loss'))
+        self._seen = {}  # user -> store samples already fed to the forecaster
         
     def start(self):
         """Start predictive optimization"""
         try:
             self.running = True
-            self.optimizer_thread = threading.Thread(target=self._optimizer_loop, daemon=True)
-            self.optimizer_thread.start()
+            self._job = get_scheduler().schedule("PredictiveOptimizer", self._run_predictions, self.update_interval)
             self.logger.info("Predictive optimization started")
         except Exception as e:
             self.logger.error(f"Failed to start predictive optimization: {e}")
@@ -31,94 +37,94 @@ class PredictiveOptimizer(QObject):
     def stop(self):
         """Stop predictive optimization"""
         self.running = False
-        if hasattr(self, 'optimizer_thread'):
-            self.optimizer_thread.join(timeout=2.0)
+        if hasattr(self, '_job'):
+            get_scheduler().cancel(self._job)
         self.logger.info("Predictive optimization stopped")
         
     def add_connection(self, user_name):
         """Add a connection to monitor"""
         with self._lock:
+            if user_name not in self.connections:
+                self.metrics_store.add_connection(user_name)
             self.connections[user_name] = {
-                'latency_history': [],
-                'packet_loss_history': [],
-                'bandwidth_history': [],
-                'last_update': time.time(),
+                'last_update': 0.0,  # time of the last preemptive action
                 'predictions': {}
             }
+            self.forecaster.add(user_name)
+
+    def remove_connection(self, user_name):
+        with self._lock:
+            if self.connections.pop(user_name, None) is not None:
+                self.metrics_store.remove_connection(user_name)
+            self.forecaster.remove(user_name)
+            self._seen.pop(user_name, None)
             
-    def _optimizer_loop(self):
-        """Background loop for predictive optimization"""
-        while self.running:
-            try:
-                with self._lock:
-                    now = time.time()
-                    for user_name, conn in list(self.connections.items()):
-                        # Update metrics history
-                        self._update_metrics_history(user_name)
-                        # Make predictions
-                        self._make_predictions(user_name)
-                        
-                time.sleep(self.update_interval)
-                
-            except Exception as e:
-                self.logger.error(f"Error in optimizer loop: {e}")
-                time.sleep(1.0)  # Prevent tight loop on error
-                
-    def _update_metrics_history(self, user_name):
-        """Update metrics history for a connection"""
+    def _run_predictions(self):
+        """Update every connection's trend in one pass; runs on the shared scheduler"""
         try:
-            metrics = self.tunnel_service.network_analytics.get_current_metrics(user_name)
-            if not metrics:
+            with self._lock:
+                users = list(self.forecaster.names)
+            if not users:
                 return
-                
-            conn = self.connections[user_name]
-            
-            # Add new metrics to history
-            conn['latency_history'].append(metrics.avg_latency)
-            conn['packet_loss_history'].append(metrics.packet_loss)
-            conn['bandwidth_history'].append(metrics.bandwidth_utilization)
-            
-            # Keep only last N points
-            if len(conn['latency_history']) > self.history_length:
-                conn['latency_history'] = conn['latency_history'][-self.history_length:]
-                conn['packet_loss_history'] = conn['packet_loss_history'][-self.history_length:]
-                conn['bandwidth_history'] = conn['bandwidth_history'][-self.history_length:]
-                
+
+            # Latest sample of every connection that has one since the last pass
+            values = np.zeros((len(users), len(self.forecaster.columns)))
+            fresh = np.zeros(len(users), dtype=bool)
+            for row, user_name in enumerate(users):
+                history = self.metrics_store.get(user_name)
+                if history is None or history.appended == self._seen.get(user_name, 0):
+                    continue
+                self._seen[user_name] = history.appended
+                fresh[row] = True
+                values[row] = [history.latest(column) for column in self.forecaster.columns]
+
+            with self._lock:
+                if users != self.forecaster.names:
+                    return  # Connections changed meanwhile; next pass picks them up
+                self.forecaster.update(values, fresh)
+                point, lower, upper = self.forecaster.forecast(self.forecast_horizon)
+                level = self.forecaster.level.copy()
+                trend = self.forecaster.trend.copy()
+                samples = self.forecaster.samples.copy()
+
+            self._make_predictions(users, samples, level, trend, point, lower)
+                    
         except Exception as e:
-            self.logger.error(f"Error updating metrics history: {e}")
+            self.logger.error(f"Error in optimizer loop: {e}")
             
-    def _make_predictions(self, user_name):
-        """Make predictions based on historical data"""
+    def _make_predictions(self, users, samples, level, trend, point, lower):
+        """Act on connections whose metrics are forecast to rise"""
         try:
-            conn = self.connections[user_name]
-            if len(conn['latency_history']) < 10:  # Need at least 10 points
-                return
-                
-            # Simple trend analysis
-            latency_trend = np.polyfit(
-                range(len(conn['latency_history'])), 
-                conn['latency_history'], 
-                1
-            )[0]
-            
-            packet_loss_trend = np.polyfit(
-                range(len(conn['packet_loss_history'])), 
-                conn['packet_loss_history'], 
-                1
-            )[0]
-            
-            # Make predictions
-            predictions = []
-            
-            if latency_trend > 0.5:  # Latency increasing
-                predictions.append("Latency likely to increase")
-                self._apply_preemptive_optimization(user_name, 'latency')
-                
-            if packet_loss_trend > 0.01:  # Packet loss increasing
-                predictions.append("Packet loss likely to increase")
-                self._apply_preemptive_optimization(user_name, 'packet_loss')
-                
-            if predictions:
+            latency = self.forecaster.index['latency']
+            packet_loss = self.forecaster.index['packet_loss']
+            ready = samples >= 10  # Need at least 10 points
+            # Rising, and confidently above the current level at the horizon
+            rising_latency = ready & (trend[:, latency] > 0.5) & (lower[:, latency] > level[:, latency])
+            rising_loss = ready & (trend[:, packet_loss] > 0.01) & (lower[:, packet_loss] > level[:, packet_loss])
+
+            now = time.time()
+            for row in np.flatnonzero(rising_latency | rising_loss):
+                user_name = users[row]
+                conn = self.connections.get(user_name)
+                if conn is None or now - conn['last_update'] < self.action_cooldown:
+                    continue
+                conn['last_update'] = now
+
+                # Make predictions
+                predictions = []
+                if rising_latency[row]:  # Latency increasing
+                    predictions.append(
+                        f"Latency likely to increase to {point[row, latency]:.0f}ms "
+                        f"in {self.forecast_horizon:.0f}s"
+                    )
+                    self._apply_preemptive_optimization(user_name, 'latency')
+
+                if rising_loss[row]:  # Packet loss increasing
+                    predictions.append("Packet loss likely to increase")
+                    self._apply_preemptive_optimization(user_name, 'packet_loss')
+
+                conn['predictions'] = {'latency': float(point[row, latency]),
+                                       'packet_loss': float(point[row, packet_loss])}
                 self.prediction_made.emit(user_name, ", ".join(predictions))
                 
         except Exception as e:
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Dict
+from dataclasses import dataclass, field
+from typing import Dict, List
 
 @dataclass
 class QoSPreset:
@@ -8,16 +8,39 @@ class QoSPreset:
     bandwidth_limit: int  # KB/s
     latency_target: int  # ms
     description: str
+    ports: List[int] = field(default_factory=list)  # destination ports that select this preset
+
+@dataclass
+class ScoreWeight:
+    weight: float
+    scale: float  # value at which the metric scores 0 (or 1 when higher is better)
+    higher_is_better: bool = False
 
 class QoSProfileManager:
     def __init__(self):
+        # Weights for the shared scoring engine, per scoring profile
+        self.score_weights: Dict[str, Dict[str, ScoreWeight]] = {
+            'connection': {
+                'latency': ScoreWeight(0.4, 200.0),  # Up to 200ms latency
+                'packet_loss': ScoreWeight(0.3, 0.05),  # Up to 5% loss
+                'bandwidth': ScoreWeight(0.2, 1024 * 1024, higher_is_better=True),  # Up to 1MB/s
+                'jitter': ScoreWeight(0.1, 50.0)  # Up to 50ms jitter
+            },
+            'gaming': {
+                'frame_time': ScoreWeight(0.4, 16.67),  # 60 FPS target
+                'ping_stability': ScoreWeight(0.3, 0.95, higher_is_better=True),
+                'jitter': ScoreWeight(0.2, 5.0),
+                'packet_loss': ScoreWeight(0.1, 0.01)
+            }
+        }
         self.presets: Dict[str, QoSPreset] = {
             'gaming': QoSPreset(
                 name='Gaming',
                 priority=9,
                 bandwidth_limit=1024,  # 1MB/s
                 latency_target=20,
-                description='Optimized for online gaming with low latency'
+                description='Optimized for online gaming with low latency',
+                ports=[3074, 3075, 27015, 27016, 7777, 8080]
             ),
             'streaming': QoSPreset(
                 name='Media Streaming',
@@ -49,12 +72,14 @@ class GamingQoSProfile:
                 'priority': 8,
                 'bandwidth_limit': 2048 * 1024,  # 2MB/s
                 'latency_target': 20,
-                'buffer_size': 32 * 1024  # 32KB buffer
+                'buffer_size': 32 * 1024,  # 32KB buffer
+                'ports': [3074, 3075, 27015, 27016]  # Xbox Live, Source engine
             },
             'MOBA': {
                 'priority': 7,
                 'bandwidth_limit': 1024 * 1024,  # 1MB/s
                 'latency_target': 30,
-                'buffer_size': 64 * 1024  # 64KB buffer
+                'buffer_size': 64 * 1024,  # 64KB buffer
+                'ports': [7777, 8080]
             }
         }
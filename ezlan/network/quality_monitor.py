@@ -2,6 +2,8 @@ from PyQt6.QtCore import QObject, pyqtSignal
 import threading
 import time
 from ezlan.utils.logger import Logger
+from .scheduler import get_scheduler
+from .scoring import get_scoring_engine
 
 class QualityMonitor(QObject):
     quality_updated = pyqtSignal(str, float)  # user, quality_score
@@ -13,13 +15,13 @@ class QualityMonitor(QObject):
         self.connections = {}
         self._lock = threading.Lock()
         self.update_interval = 1.0  # 1 second update interval
+        self.scoring = get_scoring_engine('connection')
         
     def start(self):
         """Start quality monitoring"""
         try:
             self.running = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
+            self._job = get_scheduler().schedule("QualityMonitor", self._check_connections, self.update_interval)
             self.logger.info("Quality monitoring started")
         except Exception as e:
             self.logger.error(f"Failed to start quality monitoring: {e}")
@@ -28,8 +30,8 @@ class QualityMonitor(QObject):
     def stop(self):
         """Stop quality monitoring"""
         self.running = False
-        if hasattr(self, 'monitor_thread'):
-            self.monitor_thread.join(timeout=2.0)
+        if hasattr(self, '_job'):
+            get_scheduler().cancel(self._job)
         self.logger.info("Quality monitoring stopped")
         
     def add_connection(self, user_name):
@@ -65,43 +67,28 @@ class QualityMonitor(QObject):
     def _calculate_quality(self, metrics):
         """Calculate overall quality score from metrics"""
         try:
-            # Get average values
-            avg_latency = sum(metrics['latency']) / len(metrics['latency'])
-            avg_packet_loss = sum(metrics['packet_loss']) / len(metrics['packet_loss'])
-            avg_jitter = sum(metrics['jitter']) / len(metrics['jitter'])
-            
-            # Calculate individual scores (0-1 range)
-            latency_score = max(0, 1 - (avg_latency / 200))  # Up to 200ms latency
-            packet_loss_score = max(0, 1 - (avg_packet_loss * 20))  # Up to 5% loss
-            jitter_score = max(0, 1 - (avg_jitter / 50))  # Up to 50ms jitter
-            
-            # Weighted average
-            quality_score = (
-                latency_score * 0.4 +
-                packet_loss_score * 0.4 +
-                jitter_score * 0.2
+            # Averages of the recent window, scored like every other connection view
+            return self.scoring.score(
+                latency=sum(metrics['latency']) / len(metrics['latency']),
+                packet_loss=sum(metrics['packet_loss']) / len(metrics['packet_loss']),
+                jitter=sum(metrics['jitter']) / len(metrics['jitter']),
+                metrics=('latency', 'packet_loss', 'jitter')
             )
             
-            return max(0, min(1, quality_score))  # Ensure result is between 0 and 1
-            
         except Exception as e:
             self.logger.error(f"Error calculating quality score: {e}")
             return 0.0
             
-    def _monitor_loop(self):
-        """Background monitoring loop"""
-        while self.running:
-            try:
-                with self._lock:
-                    now = time.time()
-                    # Check for stale connections
-                    for user_name, conn in list(self.connections.items()):
-                        if now - conn['last_update'] > 10.0:  # 10 second timeout
-                            self.logger.warning(f"Connection {user_name} timed out")
-                            del self.connections[user_name]
-                            
-                time.sleep(self.update_interval)
-                
-            except Exception as e:
-                self.logger.error(f"Error in monitor loop: {e}")
-                time.sleep(1.0)  # Prevent tight loop on error
+    def _check_connections(self):
+        """Drop connections that stopped reporting; runs on the shared scheduler"""
+        try:
+            with self._lock:
+                now = time.time()
+                # Check for stale connections
+                for user_name, conn in list(self.connections.items()):
+                    if now - conn['last_update'] > 10.0:  # 10 second timeout
+                        self.logger.warning(f"Connection {user_name} timed out")
+                        del self.connections[user_name]
+                        
+        except Exception as e:
+            self.logger.error(f"Error in monitor loop: {e}")
\ No newline at end of file
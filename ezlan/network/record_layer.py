@@ -0,0 +1,230 @@
+import itertools
+import os
+import struct
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey, X25519PublicKey
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+PROTOCOL_VERSION = 2  # 2: data frames start with a path measurement header
+
+# Preference order used by the initiator when offering ciphers
+SUPPORTED_CIPHERS = {
+    'chacha20-poly1305': ChaCha20Poly1305,
+    'aes-256-gcm': AESGCM,
+}
+
+# Record types
+RECORD_DATA = 0x01
+RECORD_KEEPALIVE = 0x02
+RECORD_PROBE = 0x03
+
+# Keepalive payloads
+KEEPALIVE_PING = b'\x00'
+KEEPALIVE_PONG = b'\x01'
+
+# First byte of a probe payload; the rest is echoed back unchanged
+PROBE_REQUEST = b'\x00'
+PROBE_REPLY = b'\x01'
+
+# Record header: type (1 byte) + sequence number (8 bytes), authenticated as AAD
+RECORD_HEADER = struct.Struct('!BQ')
+TAG_SIZE = 16
+RECORD_OVERHEAD = RECORD_HEADER.size + TAG_SIZE
+
+KEY_SIZE = 32
+SALT_SIZE = 4
+
+
+class RecordError(Exception):
+    """Raised when a record fails authentication or replay checks"""
+
+
+class ReplayWindow:
+    """Sliding bitmap of recently accepted sequence numbers (RFC 6479 style)"""
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.highest = -1
+        self.bitmap = 0
+        self._mask = (1 << size) - 1
+
+    def check(self, seq):
+        """Return True if seq has not been seen and is inside the window"""
+        if seq > self.highest:
+            return True
+        offset = self.highest - seq
+        if offset >= self.size:
+            return False
+        return not (self.bitmap >> offset) & 1
+
+    def update(self, seq):
+        """Mark seq as received; only call after the record authenticated"""
+        if seq > self.highest:
+            shift = seq - self.highest
+            self.bitmap = ((self.bitmap << shift) | 1) & self._mask
+            self.highest = seq
+        else:
+            self.bitmap |= 1 << (self.highest - seq)
+
+
+class RecordLayer:
+    """Binary AEAD record protection for tunneled packets.
+
+    Each direction has its own key, a 4-byte nonce salt and a 64-bit
+    sequence counter. The 12-byte nonce is salt || sequence, so it never
+    repeats for the lifetime of a key.
+    """
+
+    def __init__(self, cipher_name, send_key, recv_key, send_salt, recv_salt, replay_window=1024, send_seq=0):
+        if cipher_name not in SUPPORTED_CIPHERS:
+            raise ValueError(f"Unsupported cipher: {cipher_name}")
+        self.cipher_name = cipher_name
+        self._keys = (send_key, recv_key)
+        self._send_aead = SUPPORTED_CIPHERS[cipher_name](send_key)
+        self._recv_aead = SUPPORTED_CIPHERS[cipher_name](recv_key)
+        self._send_salt = send_salt
+        self._recv_salt = recv_salt
+        self._send_seq = itertools.count(send_seq)
+        self.replay_window = ReplayWindow(replay_window)
+
+    @classmethod
+    def from_shared_secret(cls, cipher_name, shared_secret, transcript, initiator):
+        """Derive directional keys from an ECDH secret and the handshake transcript"""
+        material = HKDF(
+            algorithm=hashes.SHA256(),
+            length=2 * (KEY_SIZE + SALT_SIZE),
+            salt=None,
+            info=b'ezlan record layer v1' + transcript,
+        ).derive(shared_secret)
+
+        block = KEY_SIZE + SALT_SIZE
+        initiator_key, initiator_salt = material[:KEY_SIZE], material[KEY_SIZE:block]
+        responder_key = material[block:block + KEY_SIZE]
+        responder_salt = material[block + KEY_SIZE:]
+
+        if initiator:
+            return cls(cipher_name, initiator_key, responder_key, initiator_salt, responder_salt)
+        return cls(cipher_name, responder_key, initiator_key, responder_salt, initiator_salt)
+
+    def export_state(self) -> dict:
+        """Snapshot keys, counters and replay window so another process can take over.
+
+        The layer must not seal records after exporting; the receiver of the
+        state continues the send sequence where this one stopped.
+        """
+        return {
+            'cipher_name': self.cipher_name,
+            'send_key': self._keys[0],
+            'recv_key': self._keys[1],
+            'send_salt': self._send_salt,
+            'recv_salt': self._recv_salt,
+            'send_seq': next(self._send_seq),
+            'replay_window': (self.replay_window.size, self.replay_window.highest, self.replay_window.bitmap)
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        size, highest, bitmap = state['replay_window']
+        layer = cls(state['cipher_name'], state['send_key'], state['recv_key'],
+                    state['send_salt'], state['recv_salt'], size, state['send_seq'])
+        layer.replay_window.highest = highest
+        layer.replay_window.bitmap = bitmap
+        return layer
+
+    def seal(self, payload, record_type=RECORD_DATA) -> bytes:
+        """Encrypt payload into a single record"""
+        seq = next(self._send_seq)
+        header = RECORD_HEADER.pack(record_type, seq)
+        nonce = self._send_salt + seq.to_bytes(8, 'big')
+        return header + self._send_aead.encrypt(nonce, bytes(payload), header)
+
+    def open(self, record):
+        """Authenticate and decrypt a record, returning (record_type, payload)"""
+        if len(record) < RECORD_OVERHEAD:
+            raise RecordError("Record too short")
+
+        record = memoryview(record)
+        header = bytes(record[:RECORD_HEADER.size])
+        record_type, seq = RECORD_HEADER.unpack(header)
+
+        # Cheap rejection before spending time on decryption
+        if not self.replay_window.check(seq):
+            raise RecordError(f"Replayed or stale record {seq}")
+
+        nonce = self._recv_salt + seq.to_bytes(8, 'big')
+        try:
+            payload = self._recv_aead.decrypt(nonce, record[RECORD_HEADER.size:], header)
+        except InvalidTag:
+            raise RecordError(f"Authentication failed for record {seq}")
+
+        self.replay_window.update(seq)
+        return record_type, payload
+
+
+class Handshake:
+    """X25519 key agreement with cipher negotiation.
+
+    The initiator offers its cipher list and public key, the responder picks
+    the first offered cipher it supports and answers with its own key. Both
+    sides then derive the same RecordLayer from the exchanged messages.
+    """
+
+    def __init__(self, ciphers=None):
+        self.ciphers = list(ciphers or SUPPORTED_CIPHERS.keys())
+        self._private_key = X25519PrivateKey.generate()
+        self.public_key = self._private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        self.nonce = os.urandom(16)
+
+    def client_hello(self) -> dict:
+        return {
+            'version': PROTOCOL_VERSION,
+            'ciphers': self.ciphers,
+            'public_key': self.public_key.hex(),
+            'nonce': self.nonce.hex()
+        }
+
+    def server_hello(self, client_hello: dict):
+        """Answer a client hello, returning (reply, record_layer)"""
+        if client_hello.get('version') != PROTOCOL_VERSION:
+            raise RecordError(f"Unsupported protocol version: {client_hello.get('version')}")
+
+        cipher_name = next((c for c in client_hello.get('ciphers', []) if c in self.ciphers), None)
+        if cipher_name is None:
+            raise RecordError("No common cipher")
+
+        reply = {
+            'version': PROTOCOL_VERSION,
+            'cipher': cipher_name,
+            'public_key': self.public_key.hex(),
+            'nonce': self.nonce.hex()
+        }
+        record_layer = self._derive(cipher_name, client_hello, reply, initiator=False)
+        return reply, record_layer
+
+    def finish(self, client_hello: dict, server_hello: dict) -> RecordLayer:
+        """Complete the handshake on the initiator side"""
+        if server_hello.get('version') != PROTOCOL_VERSION:
+            raise RecordError(f"Unsupported protocol version: {server_hello.get('version')}")
+        cipher_name = server_hello.get('cipher')
+        if cipher_name not in client_hello['ciphers']:
+            raise RecordError(f"Peer selected a cipher we did not offer: {cipher_name}")
+        return self._derive(cipher_name, client_hello, server_hello, initiator=True)
+
+    def _derive(self, cipher_name, client_hello, server_hello, initiator):
+        peer_key = server_hello['public_key'] if initiator else client_hello['public_key']
+        shared_secret = self._private_key.exchange(
+            X25519PublicKey.from_public_bytes(bytes.fromhex(peer_key))
+        )
+        transcript = b''.join([
+            bytes.fromhex(client_hello['public_key']),
+            bytes.fromhex(client_hello['nonce']),
+            bytes.fromhex(server_hello['public_key']),
+            bytes.fromhex(server_hello['nonce']),
+            cipher_name.encode()
+        ])
+        return RecordLayer.from_shared_secret(cipher_name, shared_secret, transcript, initiator)
@@ -2,6 +2,7 @@ from PyQt6.QtCore import QObject, pyqtSignal
 import threading
 import time
 from ezlan.utils.logger import Logger
+from .scheduler import get_scheduler
 
 class ConnectionRecoveryManager(QObject):
     recovery_started = pyqtSignal(str)  # user_name
@@ -22,8 +23,7 @@ class ConnectionRecoveryManager(QObject):
         """Start connection recovery monitoring"""
         try:
             self.running = True
-            self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-            self.monitor_thread.start()
+            self._job = get_scheduler().schedule("ConnectionRecoveryManager", self._check_connections, self.update_interval, blocking=True)
             self.logger.info("Connection recovery monitoring started")
         except Exception as e:
             self.logger.error(f"Failed to start connection recovery: {e}")
@@ -32,8 +32,8 @@ class ConnectionRecoveryManager(QObject):
     def stop(self):
         """Stop connection recovery monitoring"""
         self.running = False
-        if hasattr(self, 'monitor_thread'):
-            self.monitor_thread.join(timeout=2.0)
+        if hasattr(self, '_job'):
+            get_scheduler().cancel(self._job)
         self.logger.info("Connection recovery monitoring stopped")
         
     def add_connection(self, user_name):
@@ -45,23 +45,18 @@ class ConnectionRecoveryManager(QObject):
                 'recovering': False
             }
             
-    def _monitor_loop(self):
-        """Background loop for connection monitoring"""
-        while self.running:
-            try:
-                with self._lock:
-                    now = time.time()
-                    for user_name, conn in list(self.connections.items()):
-                        # Check connection health
-                        if self._needs_recovery(user_name):
-                            self._attempt_recovery(user_name)
-                            
-                time.sleep(self.update_interval)
-                
-            except Exception as e:
-                self.logger.error(f"Error in monitor loop: {e}")
-                time.sleep(1.0)  # Prevent tight loop on error
-                
+    def _check_connections(self):
+        """Recover unhealthy connections; runs on the scheduler's worker pool"""
+        try:
+            with self._lock:
+                for user_name, conn in list(self.connections.items()):
+                    # Check connection health
+                    if self._needs_recovery(user_name):
+                        self._attempt_recovery(user_name)
+                        
+        except Exception as e:
+            self.logger.error(f"Error in monitor loop: {e}")
+
     def _needs_recovery(self, user_name):
         """Check if connection needs recovery"""
         try:
@@ -0,0 +1,206 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict
+from ezlan.utils.logger import Logger
+
+
+@dataclass
+class JobStats:
+    runs: int = 0
+    overruns: int = 0        # periods skipped because a run was late or still going
+    avg_jitter: float = 0.0  # seconds between the scheduled and actual start (EWMA)
+    max_jitter: float = 0.0
+    avg_duration: float = 0.0
+    max_duration: float = 0.0
+
+    def record(self, jitter, duration):
+        self.runs += 1
+        self.avg_jitter += 0.1 * (jitter - self.avg_jitter)
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.avg_duration += 0.1 * (duration - self.avg_duration)
+        self.max_duration = max(self.max_duration, duration)
+
+
+class ScheduledJob:
+    def __init__(self, name, callback, interval, due, blocking):
+        self.name = name
+        self.callback = callback
+        self.interval = interval
+        self.due = due            # monotonic time of the next run
+        self.blocking = blocking  # run on the worker pool instead of the wheel thread
+        self.rounds = 0           # full wheel revolutions left before it fires
+        self.cancelled = False
+        self.in_flight = False
+        self.stats = JobStats()
+
+
+class TimerWheel:
+    """Hashed timer wheel running every periodic job from one thread.
+
+    Jobs are hashed into ``slots`` buckets by their due tick, so scheduling
+    and cancelling are O(1) and each tick only looks at one bucket. The
+    thread sleeps until the next occupied tick rather than waking on every
+    tick. Callbacks run on the wheel thread and must be short; jobs marked
+    ``blocking`` run on a small worker pool and a period is skipped while
+    the previous run is still going.
+    """
+
+    def __init__(self, tick=0.01, slots=512):
+        self.logger = Logger("TimerWheel")
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._origin = time.monotonic()
+        self._current_tick = 0
+        self._condition = threading.Condition()
+        self._executor = None
+        self._running = False
+        self._thread = None
+
+    def schedule(self, name: str, callback: Callable, interval: float,
+                 delay: float = None, blocking: bool = False) -> ScheduledJob:
+        """Run callback every interval seconds, first after delay (default: interval)"""
+        with self._condition:
+            unique_name, suffix = name, 1
+            while unique_name in self.jobs:
+                suffix += 1
+                unique_name = f"{name}#{suffix}"
+            job = ScheduledJob(unique_name, callback, interval,
+                               time.monotonic() + (interval if delay is None else delay), blocking)
+            self.jobs[unique_name] = job
+            self._insert(job)
+            self._ensure_running()
+            self._condition.notify()
+        return job
+
+    def cancel(self, job: ScheduledJob):
+        with self._condition:
+            job.cancelled = True
+            if self.jobs.get(job.name) is job:
+                del self.jobs[job.name]
+
+    def get_stats(self) -> Dict[str, JobStats]:
+        with self._condition:
+            return {name: job.stats for name, job in self.jobs.items()}
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _tick_of(self, when) -> int:
+        return max(math.ceil((when - self._origin) / self.tick), self._current_tick + 1)
+
+    def _insert(self, job):
+        due_tick = self._tick_of(job.due)
+        job.rounds = (due_tick - self._current_tick - 1) // len(self.slots)
+        self.slots[due_tick % len(self.slots)].append(job)
+
+    def _ensure_running(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _advance(self, now):
+        """Move the wheel up to now and return the jobs that fired"""
+        fired = []
+        target_tick = int((now - self._origin) / self.tick)
+        while self._current_tick < target_tick:
+            self._current_tick += 1
+            bucket = self.slots[self._current_tick % len(self.slots)]
+            if not bucket:
+                continue
+            remaining = []
+            for job in bucket:
+                if job.cancelled:
+                    continue
+                if job.rounds > 0:
+                    job.rounds -= 1
+                    remaining.append(job)
+                else:
+                    fired.append(job)
+            bucket[:] = remaining
+        return fired
+
+    def _next_wait(self, now):
+        """Seconds until the next occupied tick, at most one revolution"""
+        for offset in range(1, len(self.slots) + 1):
+            bucket = self.slots[(self._current_tick + offset) % len(self.slots)]
+            if any(job.rounds == 0 and not job.cancelled for job in bucket):
+                return max(0.0, self._origin + (self._current_tick + offset) * self.tick - now)
+        if any(self.slots):
+            return len(self.slots) * self.tick
+        return None
+
+    def _reschedule(self, job, now):
+        job.due += job.interval
+        if job.due <= now:
+            missed = int((now - job.due) / job.interval) + 1
+            job.stats.overruns += missed
+            job.due += missed * job.interval
+        if not job.cancelled:
+            self._insert(job)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                fired = [(job, job.due) for job in self._advance(now)]
+                for job, _ in fired:
+                    self._reschedule(job, now)
+                if not fired:
+                    self._condition.wait(self._next_wait(now))
+                    continue
+
+            for job, scheduled in fired:
+                self._dispatch(job, scheduled)
+
+    def _dispatch(self, job, scheduled):
+        if job.cancelled:
+            return
+        if not job.blocking:
+            self._execute(job, scheduled)
+            return
+        if job.in_flight:
+            job.stats.overruns += 1
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="TimerWheel")
+        job.in_flight = True
+        self._executor.submit(self._execute, job, scheduled)
+
+    def _execute(self, job, scheduled):
+        start = time.monotonic()
+        try:
+            job.callback()
+        except Exception as e:
+            self.logger.error(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            end = time.monotonic()
+            job.in_flight = False
+            job.stats.record(max(0.0, start - scheduled), end - start)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> TimerWheel:
+    """Return the scheduler shared by every periodic monitor"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TimerWheel()
+        return _scheduler
@@ -0,0 +1,60 @@
+import threading
+from typing import Dict, Iterable, Sequence
+import numpy as np
+from .qos_profiles import QoSProfileManager, ScoreWeight
+
+
+class ScoringEngine:
+    """Weighted quality score for many connections in one call.
+
+    Each metric is mapped onto 0-1 against its scale (falling linearly to
+    0 at the scale, or rising to 1 at it when higher is better) and the
+    weighted average is taken across a (connections x metrics) matrix.
+    Missing values (NaN) score 0. Scoring a subset of the metrics
+    renormalizes the weights over that subset.
+    """
+
+    def __init__(self, weights: Dict[str, ScoreWeight]):
+        self.weights = dict(weights)
+        self.metrics = tuple(self.weights)
+
+    @classmethod
+    def from_profile(cls, profile: str, profiles: QoSProfileManager = None) -> 'ScoringEngine':
+        profiles = profiles or QoSProfileManager()
+        return cls(profiles.score_weights[profile])
+
+    def score_matrix(self, matrix, metrics: Sequence[str] = None) -> np.ndarray:
+        """Scores for each row of matrix, whose columns are metrics (default: all)"""
+        metrics = tuple(metrics or self.metrics)
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(-1, len(metrics))
+        weights = np.array([self.weights[name].weight for name in metrics])
+        scales = np.array([self.weights[name].scale for name in metrics])
+        higher = np.array([self.weights[name].higher_is_better for name in metrics])
+
+        ratio = matrix / scales
+        scores = np.clip(np.where(higher, ratio, 1.0 - ratio), 0.0, 1.0)
+        scores = np.nan_to_num(scores, nan=0.0)
+        return np.clip(scores @ (weights / weights.sum()), 0.0, 1.0)
+
+    def score_rows(self, rows: Iterable[Dict[str, float]], metrics: Sequence[str] = None) -> np.ndarray:
+        """Scores for a list of {metric: value} dicts"""
+        metrics = tuple(metrics or self.metrics)
+        matrix = [[np.nan if row.get(name) is None else row[name] for name in metrics] for row in rows]
+        return self.score_matrix(np.array(matrix, dtype=np.float64).reshape(-1, len(metrics)), metrics)
+
+    def score(self, metrics: Sequence[str] = None, **values) -> float:
+        """Score of a single connection"""
+        return float(self.score_rows([values], metrics)[0])
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_scoring_engine(profile: str = 'connection') -> ScoringEngine:
+    """Return the shared engine for a scoring profile"""
+    with _engines_lock:
+        engine = _engines.get(profile)
+        if engine is None:
+            engine = _engines[profile] = ScoringEngine.from_profile(profile)
+        return engine
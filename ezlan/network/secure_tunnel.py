@@ -1,8 +1,13 @@
 from PyQt6.QtCore import QObject, pyqtSignal
+import asyncio
 import socket
-import threading
 import json
-from cryptography.fernet import Fernet
+import threading
+import time
+from .data_plane import DataPlane
+from .framing import FrameReader, encode_frame
+from .record_layer import (Handshake, RecordError, RECORD_KEEPALIVE,
+                           KEEPALIVE_PING, KEEPALIVE_PONG)
 from ..utils.logger import Logger
 
 class SecureTunnel(QObject):
@@ -16,22 +21,49 @@ class SecureTunnel(QObject):
         self.logger = Logger("SecureTunnel")
         self.active_connections = {}
         self.packet_handlers = {}
+        self.max_datagram_size = 65535
+        self.udp_probe_timeout = 0.5  # seconds to wait for a UDP keepalive reply
+        self.udp_probe_attempts = 3
+        self.listener = None
+        self.host_datagram = None
+        self.data_plane = DataPlane(self, self._get_event_loop())
         
-    def create_connection(self, host: str, port: int) -> bool:
+    def create_connection(self, host: str, port: int, transport: str = 'udp') -> bool:
+        """Connect to a peer; the data plane uses UDP when available, TCP otherwise"""
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.settimeout(10)
             sock.connect((host, port))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             
-            if self._setup_secure_channel(sock):
+            reader = FrameReader(sock)
+            record_layer = self._setup_secure_channel(sock, reader)
+            if record_layer:
                 connection_info = {
                     'socket': sock,
+                    'reader': reader,
                     'host': host,
                     'port': port,
+                    'record_layer': record_layer,
+                    'transport': 'tcp',
+                    'datagram_socket': None,
+                    'last_received': time.monotonic(),
                     'status': 'connected'
                 }
+                
+                if transport == 'udp':
+                    dgram = self._setup_datagram_channel(host, port, record_layer)
+                    if dgram:
+                        connection_info['datagram_socket'] = dgram
+                        connection_info['transport'] = 'udp'
+                    else:
+                        self.logger.warning(f"UDP blocked to {host}:{port}, falling back to TCP")
+                        
+                sock.settimeout(None)
+                self.close_connection(host)  # Reconnecting replaces the old tunnel to this host
                 self.active_connections[host] = connection_info
                 self._start_packet_handler(host)
+                self.connection_established.emit(connection_info)
                 return True
                 
             return False
@@ -40,35 +72,202 @@ class SecureTunnel(QObject):
             self.logger.error(f"Connection failed: {e}")
             return False 
 
-    def _setup_secure_channel(self, sock):
-        """Setup secure channel with authentication"""
+    def start_listening(self, port: int, host: str = '0.0.0.0') -> int:
+        """Accept peers on a TCP port; returns the bound port"""
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            # Generate session key
-            key = Fernet.generate_key()
-            f = Fernet(key)
-            
-            # Exchange keys and authenticate
-            sock.send(key)
-            response = sock.recv(1024)
-            
-            if response:
-                # Verify connection
-                test_message = f.encrypt(b"connection_test")
-                sock.send(test_message)
-                verification = sock.recv(1024)
-                
-                return verification == b"verified"
-                
-            return False
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((host, port))
+            listener.listen()
+            listener.settimeout(0.5)  # Lets the accept loop notice stop_listening
+        except OSError:
+            listener.close()
+            raise
+
+        self.listener = listener
+        port = listener.getsockname()[1]
+        self._open_host_datagram(host, port)
+        threading.Thread(target=self._accept_loop, args=(listener,),
+                         daemon=True, name="SecureTunnelAccept").start()
+        self.logger.info(f"Accepting tunnels on port {port}")
+        return port
+
+    def stop_listening(self):
+        listener, self.listener = self.listener, None
+        if listener:
+            listener.close()
+        dgram, self.host_datagram = self.host_datagram, None
+        if dgram:
+            self.data_plane.close_host_endpoint(dgram)
+
+    def _open_host_datagram(self, host, port):
+        """Answer accepted peers' UDP probes and traffic on the same port number"""
+        dgram = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            dgram.bind((host, port))
+        except OSError as e:
+            dgram.close()
+            self.logger.warning(f"UDP port {port} unavailable ({e}), peers will use TCP")
+            return
+        self.host_datagram = dgram
+        self.data_plane.open_host_endpoint(dgram)
+
+    def _accept_loop(self, listener):
+        while self.listener is listener:
+            try:
+                sock, (host, port) = listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            # Handshake per peer so one slow client cannot hold up the others
+            threading.Thread(target=self._accept_connection, args=(sock, host, port),
+                             daemon=True).start()
+
+    def _accept_connection(self, sock, host, port):
+        """Run the responder handshake on an accepted socket and register the peer"""
+        connection_info = {
+            'socket': sock,
+            'reader': FrameReader(sock),
+            'host': host,
+            'port': port,
+            'record_layer': None,
+            'transport': 'tcp',
+            'datagram_socket': None,
+            'last_received': time.monotonic(),
+            'status': 'connected',
+            'role': 'responder'
+        }
+
+        def register(record_layer):
+            # Before the peer hears "verified", so its first UDP probe already finds us
+            connection_info['record_layer'] = record_layer
+            self.close_connection(host)  # A reconnecting peer replaces its old tunnel
+            self.active_connections[host] = connection_info
+
+        try:
+            sock.settimeout(10)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if not self._accept_secure_channel(sock, connection_info['reader'], register):
+                if self.active_connections.get(host) is connection_info:
+                    del self.active_connections[host]
+                sock.close()
+                return
+
+            sock.settimeout(None)
+            self._start_packet_handler(host)
+            self.logger.info(f"Accepted secure channel from {host}:{port}")
+            self.connection_established.emit(connection_info)
+        except Exception as e:
+            self.logger.error(f"Failed to accept connection from {host}: {e}")
+            if self.active_connections.get(host) is connection_info:
+                del self.active_connections[host]
+            sock.close()
+
+    def _get_event_loop(self):
+        """The application's qasync loop, which must be set before the tunnel is created"""
+        try:
+            return asyncio.get_event_loop()
+        except RuntimeError:
+            return None
+
+    def _setup_secure_channel(self, sock, reader=None):
+        """Run the initiator side of the handshake and return a RecordLayer"""
+        reader = reader or FrameReader(sock)
+        try:
+            handshake = Handshake()
+            client_hello = handshake.client_hello()
+            self._send_message(sock, json.dumps(client_hello).encode())
+            server_hello = json.loads(reader.read_frame())
+            record_layer = handshake.finish(client_hello, server_hello)
+
+            # Verify both sides derived the same keys
+            self._send_message(sock, record_layer.seal(b"connection_test"))
+            _, verification = record_layer.open(reader.read_frame())
+
+            if verification != b"verified":
+                return None
+
+            self.logger.info(f"Secure channel established using {record_layer.cipher_name}")
+            return record_layer
+        except (RecordError, ValueError, KeyError) as e:
+            self.logger.error(f"Handshake rejected: {e}")
+            return None
         except Exception as e:
             self.logger.error(f"Failed to setup secure channel: {e}")
+            return None
+
+    def _accept_secure_channel(self, sock, reader=None, on_verified=None):
+        """Run the responder side of the handshake and return a RecordLayer
+
+        on_verified(record_layer) runs once the initiator proved its keys,
+        just before the final confirmation is sent.
+        """
+        reader = reader or FrameReader(sock)
+        try:
+            handshake = Handshake()
+            client_hello = json.loads(reader.read_frame())
+            server_hello, record_layer = handshake.server_hello(client_hello)
+            self._send_message(sock, json.dumps(server_hello).encode())
+
+            _, test_message = record_layer.open(reader.read_frame())
+            if test_message != b"connection_test":
+                return None
+
+            if on_verified:
+                on_verified(record_layer)
+            self._send_message(sock, record_layer.seal(b"verified"))
+            return record_layer
+        except (RecordError, ValueError, KeyError) as e:
+            self.logger.error(f"Handshake rejected: {e}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Failed to accept secure channel: {e}")
+            return None
+
+    def _send_message(self, sock, data: bytes):
+        sock.sendall(encode_frame(data))
+
+    def _setup_datagram_channel(self, host, port, record_layer):
+        """Probe the UDP path with keepalives; returns a connected socket or None"""
+        dgram = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            dgram.connect((host, port))
+            dgram.settimeout(self.udp_probe_timeout)
+            for _ in range(self.udp_probe_attempts):
+                dgram.send(record_layer.seal(KEEPALIVE_PING, RECORD_KEEPALIVE))
+                try:
+                    record_type, payload = record_layer.open(dgram.recv(self.max_datagram_size))
+                except (socket.timeout, RecordError):
+                    continue
+                if record_type == RECORD_KEEPALIVE and payload == KEEPALIVE_PONG:
+                    return dgram
+        except OSError as e:
+            # ICMP port unreachable surfaces here as ConnectionRefusedError
+            self.logger.debug(f"UDP probe to {host}:{port} failed: {e}")
+            
+        dgram.close()
+        return None
+
+    def send_packet(self, host, packet) -> bool:
+        """Encrypt and send one captured frame to a peer"""
+        connection_info = self.active_connections.get(host)
+        if not connection_info:
             return False
+            
+        self.data_plane.send_payload(connection_info, packet)
+        return True
+
+    def close_connection(self, host):
+        """Close a peer connection and both of its sockets"""
+        connection_info = self.active_connections.pop(host, None)
+        if not connection_info:
+            return
+            
+        connection_info['status'] = 'closed'
+        # Once attached the sockets belong to their transports, which close them
+        self.data_plane.detach(connection_info)
 
     def _start_packet_handler(self, host):
-        """Start packet handler thread"""
-        handler = threading.Thread(
-            target=self._handle_packets,
-            args=(host,),
-            daemon=True
-        )
-        handler.start()
\ No newline at end of file
+        """Move the peer's sockets onto the shared event loop"""
+        self.data_plane.attach(self.active_connections[host])
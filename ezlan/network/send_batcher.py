@@ -0,0 +1,243 @@
+import ctypes
+import heapq
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from ezlan.utils.logger import Logger
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ('msg_name', ctypes.c_void_p),
+        ('msg_namelen', ctypes.c_uint32),
+        ('msg_iov', ctypes.POINTER(_IOVec)),
+        ('msg_iovlen', ctypes.c_size_t),
+        ('msg_control', ctypes.c_void_p),
+        ('msg_controllen', ctypes.c_size_t),
+        ('msg_flags', ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [('msg_hdr', _MsgHdr), ('msg_len', ctypes.c_uint)]
+
+
+def _load_sendmmsg():
+    """Return libc's sendmmsg on Linux, None elsewhere"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        sendmmsg = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    return sendmmsg
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+def sendmmsg(sock, packets) -> int:
+    """Send each packet as its own datagram on a connected socket in one syscall.
+
+    Returns the number of datagrams the kernel accepted.
+    """
+    count = len(packets)
+    iovecs = (_IOVec * count)()
+    messages = (_MMsgHdr * count)()
+    # bytearray and memoryview packets are copied once; bytes are used in place
+    buffers = [packet if isinstance(packet, bytes) else bytes(packet) for packet in packets]
+    pointers = [ctypes.c_char_p(buffer) for buffer in buffers]  # keeps pointers valid
+    for i, buffer in enumerate(buffers):
+        iovecs[i].iov_base = ctypes.cast(pointers[i], ctypes.c_void_p)
+        iovecs[i].iov_len = len(buffer)
+        messages[i].msg_hdr.msg_iov = ctypes.pointer(iovecs[i])
+        messages[i].msg_hdr.msg_iovlen = 1
+
+    sent = _sendmmsg(sock.fileno(), messages, count, 0)
+    if sent < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f"sendmmsg failed: {errno}")
+    return sent
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    packets: int = 0
+    bytes: int = 0
+    max_batch_size: int = 0
+    batch_sizes: Counter = field(default_factory=Counter)  # batch size -> number of flushes
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.packets / self.batches if self.batches else 0.0
+
+    def record(self, packets, size):
+        self.batches += 1
+        self.packets += packets
+        self.bytes += size
+        self.max_batch_size = max(self.max_batch_size, packets)
+        self.batch_sizes[packets] += 1
+
+
+class SendBatcher:
+    """Gathers packets for one destination socket and flushes them together.
+
+    Stream sockets are flushed with one scatter-gather ``sendmsg`` (writev).
+    Datagram sockets keep their packet boundaries and use ``sendmmsg`` on
+    Linux, falling back to one ``send`` per packet elsewhere.
+    """
+
+    def __init__(self, sock, max_batch=64):
+        self.sock = sock
+        self.max_batch = max_batch
+        self.is_stream = sock.type == socket.SOCK_STREAM
+        self.stats = BatchStats()
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Keeps batches in order across flushing threads
+
+    def add(self, packet) -> int:
+        """Queue a packet and return the number of packets now pending"""
+        with self._lock:
+            self._pending.append(packet)
+            return len(self._pending)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                packets, self._pending = self._pending, []
+            if not packets:
+                return
+
+            if self.is_stream:
+                self._flush_stream(packets)
+            else:
+                self._flush_datagrams(packets)
+            self.stats.record(len(packets), sum(len(packet) for packet in packets))
+
+    def _flush_stream(self, packets):
+        if not hasattr(self.sock, 'sendmsg'):
+            self.sock.sendall(b''.join(packets))
+            return
+
+        sent = self.sock.sendmsg(packets)
+        total = sum(len(packet) for packet in packets)
+        if sent < total:
+            self.sock.sendall(b''.join(packets)[sent:])
+
+    def _flush_datagrams(self, packets):
+        sent = 0
+        if _sendmmsg is not None and len(packets) > 1:
+            sent = sendmmsg(self.sock, packets)
+        for packet in packets[sent:]:
+            self.sock.send(packet)
+
+
+class BatchingStage:
+    """Per-destination batching with a bounded micro-window.
+
+    The first packet queued for a destination arms a deadline ``window``
+    seconds out; a single flusher thread sends every batch whose deadline
+    has passed. A batch that reaches ``max_batch`` is flushed immediately
+    by the submitting thread.
+    """
+
+    def __init__(self, window=0.0002, max_batch=64):
+        self.logger = Logger("BatchingStage")
+        self.window = window
+        self.max_batch = max_batch
+        self.batchers = {}
+        self._deadlines = []  # heap of (deadline, sequence, batcher)
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def submit(self, sock, packet):
+        batcher = self.batchers.get(sock)
+        if batcher is None:
+            batcher = self.batchers.setdefault(sock, SendBatcher(sock, self.max_batch))
+
+        pending = batcher.add(packet)
+        if pending >= self.max_batch:
+            batcher.flush()
+        elif pending == 1:
+            with self._condition:
+                self._sequence += 1
+                heapq.heappush(self._deadlines, (time.perf_counter() + self.window, self._sequence, batcher))
+                self._ensure_running()
+                self._condition.notify()
+
+    def flush(self):
+        """Flush every destination now"""
+        for batcher in list(self.batchers.values()):
+            self._flush(batcher)
+
+    def remove(self, sock):
+        batcher = self.batchers.pop(sock, None)
+        if batcher:
+            with self._condition:
+                self._deadlines = [entry for entry in self._deadlines if entry[2] is not batcher]
+                heapq.heapify(self._deadlines)
+            self._flush(batcher)
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._deadlines.clear()  # Everything pending is flushed below
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.flush()
+
+    def clear(self):
+        """Flush and forget every destination"""
+        self.stop()
+        self.batchers.clear()
+
+    def get_stats(self):
+        """Return batch statistics per destination socket"""
+        return {sock: batcher.stats for sock, batcher in self.batchers.items()}
+
+    def _ensure_running(self):
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while self._running and not self._deadlines:
+                    self._condition.wait()
+                if not self._running:
+                    return
+
+                due = []
+                now = time.perf_counter()
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    due.append(heapq.heappop(self._deadlines)[2])
+                if not due:
+                    self._condition.wait(self._deadlines[0][0] - now)
+                    continue
+
+            for batcher in due:
+                self._flush(batcher)
+
+    def _flush(self, batcher):
+        try:
+            batcher.flush()
+        except OSError as e:
+            self.logger.error(f"Failed to flush batch: {e}")
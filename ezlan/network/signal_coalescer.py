@@ -0,0 +1,56 @@
+import threading
+from typing import Dict, Hashable, Tuple
+from .scheduler import get_scheduler
+
+
+class SignalCoalescer:
+    """Rate-limits a Qt signal by keeping only the latest value per key.
+
+    Network threads ``post(key, *args)`` as often as they like; the
+    arguments replace whatever was still pending for that key. At most
+    ``max_rate`` times per second the pending values are emitted in one
+    batch from the shared scheduler, so the GUI event loop receives one
+    queued event per key per flush instead of one per packet.
+    """
+
+    def __init__(self, signal, max_rate: float = 10.0, name: str = "SignalCoalescer"):
+        self.signal = signal
+        self.interval = 1.0 / max_rate
+        self.name = name
+        self.superseded = 0  # values replaced before they were delivered
+        self.delivered = 0
+        self._pending: Dict[Hashable, Tuple] = {}
+        self._lock = threading.Lock()
+        self._job = None
+
+    @property
+    def backlog(self) -> int:
+        """Keys waiting for the next flush"""
+        return len(self._pending)
+
+    def post(self, key: Hashable, *args):
+        with self._lock:
+            if key in self._pending:
+                self.superseded += 1
+            self._pending[key] = args
+            if self._job is None:
+                self._job = get_scheduler().schedule(self.name, self.flush, self.interval)
+
+    def discard(self, key: Hashable):
+        """Forget a pending value, e.g. when its connection goes away"""
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for args in pending.values():
+            self.signal.emit(*args)
+        self.delivered += len(pending)
+
+    def stop(self):
+        with self._lock:
+            job, self._job = self._job, None
+            self._pending.clear()
+        if job:
+            get_scheduler().cancel(job)
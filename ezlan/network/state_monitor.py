@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from typing import Dict, Optional
 import threading
 import time
+from .scheduler import get_scheduler
 
 @dataclass
 class ConnectionState:
@@ -45,15 +46,17 @@ class ConnectionStateMonitor:
         self._start_monitoring()
         
     def _start_monitoring(self):
-        def monitor_loop():
-            while self.monitoring:
-                current_time = time.time()
-                for user_name, state in self.connection_manager.connections.items():
-                    if current_time - state.last_seen > 5:  # 5 seconds timeout
-                        self._handle_connection_timeout(user_name, state)
-                time.sleep(self.check_interval)
-                
-        threading.Thread(target=monitor_loop, daemon=True).start()
+        self._job = get_scheduler().schedule("ConnectionStateMonitor", self._check_states, self.check_interval)
+
+    def stop(self):
+        self.monitoring = False
+        get_scheduler().cancel(self._job)
+
+    def _check_states(self):
+        current_time = time.time()
+        for user_name, state in list(self.connection_manager.connections.items()):
+            if current_time - state.last_seen > 5:  # 5 seconds timeout
+                self._handle_connection_timeout(user_name, state)
         
     def _handle_connection_timeout(self, user_name: str, state: ConnectionState):
         if state.retry_count < self.connection_manager.max_retries:
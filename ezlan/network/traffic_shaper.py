@@ -1,9 +1,10 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 import threading
 import time
-from collections import deque
 from dataclasses import dataclass
 from ezlan.utils.logger import Logger
+from .codel import DEFAULT_TARGET, FQCoDelQueue
+from .signal_coalescer import SignalCoalescer
 
 @dataclass
 class QoSPolicy:
@@ -11,18 +12,71 @@ class QoSPolicy:
     bandwidth_limit: int = 0  # bytes per second, 0 for unlimited
     latency_target: float = 0.0  # target latency in ms, 0 for best effort
 
+class TokenBucket:
+    """Byte token bucket; a rate of 0 means unlimited"""
+
+    MIN_BURST = 3000  # two full-size packets
+
+    def __init__(self, rate, burst_time=0.005):
+        self.rate = rate
+        self.burst = max(rate * burst_time, self.MIN_BURST)
+        self.tokens = self.burst
+        self.last_refill = time.monotonic()
+
+    def refill(self, now):
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def delay(self, size) -> float:
+        """Seconds until a packet of size bytes may be sent (0 if now)"""
+        if not self.rate:
+            return 0.0
+        # Packets larger than the burst go out once the bucket is full and leave it in debt
+        needed = min(size, self.burst)
+        return max(0.0, (needed - self.tokens) / self.rate)
+
+    def consume(self, size):
+        if self.rate:
+            self.tokens -= size
+
 class TrafficShaper(QObject):
+    """Hierarchical token-bucket shaper.
+
+    Every user has a bucket refilled at its ``QoSPolicy.bandwidth_limit``
+    under an optional root bucket for the whole link (``link_rate``). Users
+    are served in strict priority order; a lower priority user only sends
+    when every higher priority user is empty or out of tokens. The shaper
+    thread sleeps until a packet is queued or the earliest bucket deadline,
+    so there is no fixed tick. Shaped packets are passed to
+    ``output_callback(user_name, packet)``.
+
+    Each user's backlog is an FQ-CoDel queue bounded to ``queue_limit``
+    bytes, so a bulk flow cannot inflate another flow's latency and memory
+    stays capped under load.
+    """
+
     shaping_updated = pyqtSignal(str, float)  # user, bandwidth_usage
     
-    def __init__(self):
+    def __init__(self, link_rate=0, queue_limit=1024 * 1024):
         super().__init__()
         self.logger = Logger("TrafficShaper")
         self.running = False
         self.connections = {}
-        self._lock = threading.Lock()
-        self.update_interval = 0.1  # 100ms update interval
+        self._lock = threading.Condition()
+        self.update_interval = 0.1  # seconds between bandwidth usage updates
+        self.max_batch = 64  # packets handed to output per scheduling round
         self.packet_queues = {}
         self.policies = {}
+        self.buckets = {}
+        self.queue_limit = queue_limit  # bytes per user
+        self._held = {}  # user -> packet dequeued but still waiting for tokens
+        self.root_bucket = TokenBucket(link_rate)
+        self.output_callback = None
+        self._priority_order = []
+        self._last_stats = time.monotonic()
+        # Usage updates reach the GUI at most 10 times a second per user
+        self.signals = SignalCoalescer(self.shaping_updated, max_rate=10, name="TrafficShaper")
         
     def start(self):
         """Start traffic shaping"""
@@ -37,9 +91,12 @@ class TrafficShaper(QObject):
             
     def stop(self):
         """Stop traffic shaping"""
-        self.running = False
+        with self._lock:
+            self.running = False
+            self._lock.notify()
         if hasattr(self, 'shaper_thread'):
             self.shaper_thread.join(timeout=2.0)
+        self.signals.stop()
         self.logger.info("Traffic shaping stopped")
         
     def add_connection(self, user_name, policy: QoSPolicy = None):
@@ -47,80 +104,136 @@ class TrafficShaper(QObject):
         with self._lock:
             self.connections[user_name] = {
                 'bytes_sent': 0,
-                'last_update': time.time(),
+                'last_update': time.monotonic(),
                 'bandwidth_usage': 0.0
             }
-            self.packet_queues[user_name] = deque()
-            self.policies[user_name] = policy or QoSPolicy()
+            self.packet_queues[user_name] = FQCoDelQueue(byte_limit=self.queue_limit)
+            self._set_policy(user_name, policy or QoSPolicy())
+
+    def remove_connection(self, user_name):
+        with self._lock:
+            self.connections.pop(user_name, None)
+            self.packet_queues.pop(user_name, None)
+            self.policies.pop(user_name, None)
+            self.buckets.pop(user_name, None)
+            self._held.pop(user_name, None)
+            self._update_priority_order()
+        self.signals.discard(user_name)
             
     def update_policy(self, user_name, policy: QoSPolicy):
         """Update QoS policy for a connection"""
         with self._lock:
             if user_name in self.policies:
-                self.policies[user_name] = policy
+                self._set_policy(user_name, policy)
+                self._lock.notify()
                 
     def enqueue_packet(self, user_name, packet):
         """Add packet to user's queue"""
         with self._lock:
             if user_name in self.packet_queues:
-                self.packet_queues[user_name].append((time.time(), packet))
-                
-    def _process_queue(self, user_name):
-        """Process packets in queue according to QoS policy"""
+                self.packet_queues[user_name].enqueue(packet, time.monotonic())
+                self._lock.notify()
+
+    def get_queue_stats(self, user_name) -> dict:
         with self._lock:
-            if user_name not in self.packet_queues:
-                return []
+            queue = self.packet_queues.get(user_name)
+            return queue.get_stats() if queue else {}
+
+    def _set_policy(self, user_name, policy):
+        self.policies[user_name] = policy
+        if policy.latency_target > 0:
+            # Keep standing queue delay well inside the latency budget
+            self.packet_queues[user_name].target = min(DEFAULT_TARGET, policy.latency_target / 4000)
+        else:
+            self.packet_queues[user_name].target = DEFAULT_TARGET
+        bucket = self.buckets.get(user_name)
+        if bucket is None or bucket.rate != policy.bandwidth_limit:
+            self.buckets[user_name] = TokenBucket(policy.bandwidth_limit)
+        self._update_priority_order()
+
+    def _update_priority_order(self):
+        self._priority_order = sorted(self.policies, key=lambda user: -self.policies[user].priority)
                 
+    def _dequeue_ready(self, now):
+        """Pop every packet the buckets allow right now.
+
+        Returns the packets and the delay until the next one becomes
+        sendable (None when all queues are empty).
+        """
+        sent = []
+        next_deadline = None
+        self.root_bucket.refill(now)
+
+        for user_name in self._priority_order:
             queue = self.packet_queues[user_name]
-            policy = self.policies[user_name]
-            now = time.time()
-            processed_packets = []
-            
-            while queue:
-                timestamp, packet = queue[0]
-                
-                # Check bandwidth limit
-                if policy.bandwidth_limit > 0:
-                    conn = self.connections[user_name]
-                    if conn['bandwidth_usage'] >= policy.bandwidth_limit:
+            bucket = self.buckets[user_name]
+            bucket.refill(now)
+
+            while True:
+                if len(sent) >= self.max_batch:
+                    return sent, 0.0
+
+                packet = self._held.pop(user_name, None)
+                if packet is None:
+                    packet = queue.dequeue(now)
+                    if packet is None:
                         break
-                        
-                # Check latency target
-                if policy.latency_target > 0:
-                    latency = (now - timestamp) * 1000  # Convert to ms
-                    if latency > policy.latency_target:
-                        # Packet is too old, drop it
-                        queue.popleft()
-                        continue
-                        
-                # Process packet
-                packet_data = queue.popleft()[1]
-                processed_packets.append(packet_data)
-                
-                # Update bandwidth usage
-                if user_name in self.connections:
-                    conn = self.connections[user_name]
-                    conn['bytes_sent'] += len(packet_data)
-                    elapsed = now - conn['last_update']
-                    if elapsed > 0:
-                        conn['bandwidth_usage'] = conn['bytes_sent'] / elapsed
-                        conn['last_update'] = now
-                        conn['bytes_sent'] = 0
-                        self.shaping_updated.emit(user_name, conn['bandwidth_usage'])
-                        
-            return processed_packets
+
+                delay = max(bucket.delay(len(packet)), self.root_bucket.delay(len(packet)))
+                if delay > 0:
+                    self._held[user_name] = packet
+                    if next_deadline is None or delay < next_deadline:
+                        next_deadline = delay
+                    if self.root_bucket.delay(len(packet)) > 0:
+                        # The link itself is out of tokens; nobody below may send
+                        return sent, next_deadline
+                    break
+
+                bucket.consume(len(packet))
+                self.root_bucket.consume(len(packet))
+                self.connections[user_name]['bytes_sent'] += len(packet)
+                sent.append((user_name, packet))
+
+        return sent, next_deadline
+
+    def _collect_usage(self, now):
+        """Bandwidth per user since the last update, if one is due"""
+        if now - self._last_stats < self.update_interval:
+            return []
+        self._last_stats = now
+        usage = []
+        for user_name, conn in self.connections.items():
+            elapsed = now - conn['last_update']
+            if elapsed > 0:
+                conn['bandwidth_usage'] = conn['bytes_sent'] / elapsed
+                conn['last_update'] = now
+                conn['bytes_sent'] = 0
+                usage.append((user_name, conn['bandwidth_usage']))
+        return usage
             
     def _shaper_loop(self):
-        """Background loop for traffic shaping"""
-        while self.running:
+        """Send packets as tokens allow, sleeping until the next deadline"""
+        while True:
             try:
                 with self._lock:
-                    now = time.time()
-                    # Process each connection's queue
-                    for user_name in list(self.connections.keys()):
-                        self._process_queue(user_name)
-                        
-                time.sleep(self.update_interval)
+                    if not self.running:
+                        return
+                    now = time.monotonic()
+                    sent, delay = self._dequeue_ready(now)
+                    usage = self._collect_usage(now)
+                    if not sent:
+                        if any(conn['bandwidth_usage'] or conn['bytes_sent'] for conn in self.connections.values()):
+                            # Keep reporting until usage has decayed to zero
+                            stats_delay = self._last_stats + self.update_interval - now
+                            delay = stats_delay if delay is None else min(delay, stats_delay)
+                        self._lock.wait(delay)
+
+                # Hand packets and signals over outside the lock
+                if self.output_callback:
+                    for user_name, packet in sent:
+                        self.output_callback(user_name, packet)
+                for user_name, bandwidth in usage:
+                    self.signals.post(user_name, user_name, bandwidth)
                 
             except Exception as e:
                 self.logger.error(f"Error in shaper loop: {e}")
@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, List
+import numpy as np
+
+
+class HoltForecaster:
+    """Holt double exponential smoothing for many series at once.
+
+    Each connection is a row and each metric a column. An update is O(1)
+    per sample and runs over every connection in one array operation. The
+    one-step forecast error variance is tracked as an EWMA, which gives the
+    prediction interval for any horizon.
+    """
+
+    def __init__(self, columns: Iterable[str], alpha: float = 0.3, beta: float = 0.1,
+                 error_decay: float = 0.1):
+        self.columns = tuple(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.alpha = alpha
+        self.beta = beta
+        self.error_decay = error_decay
+        self.rows: Dict[str, int] = {}
+        self.names: List[str] = []
+        width = len(self.columns)
+        self.level = np.zeros((0, width))
+        self.trend = np.zeros((0, width))
+        self.error_var = np.zeros((0, width))
+        self.samples = np.zeros(0, dtype=np.int64)
+
+    def add(self, name: str):
+        if name in self.rows:
+            return
+        self.rows[name] = len(self.names)
+        self.names.append(name)
+        width = len(self.columns)
+        self.level = np.vstack((self.level, np.zeros((1, width))))
+        self.trend = np.vstack((self.trend, np.zeros((1, width))))
+        self.error_var = np.vstack((self.error_var, np.zeros((1, width))))
+        self.samples = np.append(self.samples, 0)
+
+    def remove(self, name: str):
+        row = self.rows.pop(name, None)
+        if row is None:
+            return
+        # Move the last row into the hole
+        last = len(self.names) - 1
+        if row != last:
+            moved = self.names[last]
+            self.names[row] = moved
+            self.rows[moved] = row
+            for array in (self.level, self.trend, self.error_var, self.samples):
+                array[row] = array[last]
+        self.names.pop()
+        self.level = self.level[:last]
+        self.trend = self.trend[:last]
+        self.error_var = self.error_var[:last]
+        self.samples = self.samples[:last]
+
+    def update(self, values: np.ndarray, mask: np.ndarray = None):
+        """Feed one sample per row; rows where mask is False are left untouched"""
+        if mask is None:
+            mask = np.ones(len(self.names), dtype=bool)
+        values = np.asarray(values, dtype=np.float64)
+
+        first = mask & (self.samples == 0)
+        rest = mask & (self.samples > 0)
+
+        self.level[first] = values[first]
+        self.trend[first] = 0.0
+
+        forecast = self.level[rest] + self.trend[rest]
+        error = values[rest] - forecast
+        level = forecast + self.alpha * error
+        self.trend[rest] = self.beta * (level - self.level[rest]) + (1 - self.beta) * self.trend[rest]
+        self.level[rest] = level
+        self.error_var[rest] += self.error_decay * (error ** 2 - self.error_var[rest])
+
+        self.samples[mask] += 1
+
+    def forecast(self, horizon: float, z: float = 1.96):
+        """Point forecast and prediction interval horizon samples ahead.
+
+        Returns (point, lower, upper), each of shape (rows, columns).
+        """
+        point = self.level + horizon * self.trend
+        # Var(h) = sigma^2 * (1 + sum_{j=1}^{h-1} alpha^2 (1 + j*beta)^2)
+        h = max(horizon, 1.0)
+        steps = h - 1
+        growth = steps + self.beta * h * steps + self.beta ** 2 * steps * h * (2 * h - 1) / 6
+        spread = z * np.sqrt(self.error_var * (1 + self.alpha ** 2 * growth))
+        return point, point - spread, point + spread
@@ -5,6 +5,7 @@ from ..utils.logger import Logger
 from .interface_manager import InterfaceManager
 import aiohttp
 from .secure_tunnel import SecureTunnel
+from .interface_inventory import get_interface_inventory
 
 class TunnelService(QObject):
     # Define all required signals
@@ -16,12 +17,18 @@ class TunnelService(QObject):
     connection_failed = pyqtSignal(str)        # Emits error message when connection fails
     connection_closed = pyqtSignal(str)        # Emits peer name when disconnected
 
-    def __init__(self):
+    def __init__(self, crypto_workers=0):
         super().__init__()
         self.logger = Logger("TunnelService")
         self.interface_manager = InterfaceManager()
         self.active_tunnels = {}
+        self.transport = 'udp'  # Preferred data plane transport, falls back to 'tcp'
         self.secure_tunnel = SecureTunnel(self)
+        self.interfaces = get_interface_inventory()
+        self.interfaces.changed.connect(self._on_interfaces_changed)
+        if crypto_workers:
+            # Seal/open records in worker processes, peers sharded across them
+            self.secure_tunnel.data_plane.enable_crypto_workers(crypto_workers)
         
         # Connect secure tunnel signals
         self.secure_tunnel.connection_established.connect(self._handle_secure_connection)
@@ -46,20 +53,17 @@ class TunnelService(QObject):
 
     def _get_local_ip(self) -> str:
         """Get local IP address as fallback"""
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(('8.8.8.8', 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
-            return '127.0.0.1'
+        return self.interfaces.local_ip()
+
+    def _on_interfaces_changed(self, addresses):
+        self.logger.info(f"Local address is now {self.interfaces.local_ip()}")
 
     async def start_hosting(self, host_info):
         """Start hosting a network"""
         try:
             # Get IP synchronously to avoid task conflicts
             public_ip = self.get_public_ip()
+            self.secure_tunnel.start_listening(host_info['port'])
             
             # Merge provided host info with system info
             host_info.update({
@@ -87,11 +91,11 @@ class TunnelService(QObject):
         """Stop hosting and cleanup"""
         try:
             self.logger.info("Stopping hosting...")
+            self.secure_tunnel.stop_listening()
             # Close all connections first
             for tunnel in list(self.active_tunnels.values()):
                 try:
-                    if 'socket' in tunnel:
-                        tunnel['socket'].close()
+                    self.secure_tunnel.close_connection(tunnel['host'])
                 except Exception as e:
                     self.logger.error(f"Error closing socket: {e}")
             
@@ -108,18 +112,19 @@ class TunnelService(QObject):
         except Exception as e:
             self.logger.error(f"Failed to stop hosting: {e}")
 
-    def connect_to_peer(self, host: str, port: int, password: str = None):
+    def connect_to_peer(self, host: str, port: int, password: str = None, transport: str = None):
         """Connect to a peer"""
         try:
-            if self.secure_tunnel.create_connection(host, port):
+            if self.secure_tunnel.create_connection(host, port, transport or self.transport):
                 peer_info = {
                     'name': f"Peer-{host}",
                     'host': host,
-                    'port': port
+                    'port': port,
+                    'transport': self.secure_tunnel.active_connections[host]['transport']
                 }
                 self.active_tunnels[peer_info['name']] = peer_info
                 self.connection_established.emit(peer_info)
-                self.logger.info(f"Connected to peer at {host}:{port}")
+                self.logger.info(f"Connected to peer at {host}:{port} over {peer_info['transport'].upper()}")
             else:
                 error_msg = "Failed to establish secure connection"
                 self.logger.error(error_msg)
@@ -132,6 +137,16 @@ class TunnelService(QObject):
     def _handle_secure_connection(self, connection_info):
         """Handle successful secure connection"""
         self.logger.info(f"Secure connection established with {connection_info['host']}")
+        if connection_info.get('role') == 'responder':
+            # Peers that connected to us; outgoing tunnels are registered by the caller
+            peer_info = {
+                'name': f"Peer-{connection_info['host']}",
+                'host': connection_info['host'],
+                'port': connection_info['port'],
+                'transport': connection_info['transport']
+            }
+            self.active_tunnels[peer_info['name']] = peer_info
+            self.connection_established.emit(peer_info)
 
     def _handle_connection_lost(self, host):
         """Handle lost connection"""
@@ -142,24 +157,28 @@ class TunnelService(QObject):
         """Disconnect from a peer"""
         try:
             if peer_name in self.active_tunnels:
-                del self.active_tunnels[peer_name]
+                tunnel = self.active_tunnels.pop(peer_name)
+                self.secure_tunnel.close_connection(tunnel['host'])
                 self.connection_closed.emit(peer_name)
                 self.logger.info(f"Disconnected from {peer_name}")
         except Exception as e:
             self.logger.error(f"Error disconnecting: {e}")
 
-    async def connect_to_host(self, host: str, port: int, password: str = None):
+    async def connect_to_host(self, host: str, port: int, password: str = None, transport: str = None):
         """Connect to a host with authentication"""
         try:
-            # Create socket connection
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            await asyncio.get_event_loop().sock_connect(sock, (host, port))
+            # Handshake and UDP probing block, so keep them off the event loop
+            connected = await asyncio.get_event_loop().run_in_executor(
+                None, self.secure_tunnel.create_connection, host, port, transport or self.transport
+            )
+            if not connected:
+                raise ConnectionError("Failed to establish secure connection")
             
             peer_info = {
                 'name': f"Host-{host}",
                 'host': host,
                 'port': port,
-                'socket': sock
+                'transport': self.secure_tunnel.active_connections[host]['transport']
             }
             
             self.active_tunnels[peer_info['name']] = peer_info
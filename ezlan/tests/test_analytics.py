@@ -0,0 +1,28 @@
+import unittest
+from ezlan.network.analytics import NetworkAnalytics, NetworkMetrics
+
+class TestAnalyticsSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.analytics = NetworkAnalytics()
+        self.analytics.add_connection('alice')
+        self.addCleanup(self.analytics.remove_connection, 'alice')
+
+    def test_published_snapshot_is_never_mutated(self):
+        before = self.analytics.get_snapshot()
+        self.analytics.update_metrics('alice', NetworkMetrics(avg_latency=42.0))
+        self.analytics._update_metrics()
+
+        self.assertEqual(before['alice'].avg_latency, 0.0)
+        after = self.analytics.get_current_metrics('alice')
+        self.assertEqual(after.avg_latency, 42.0)
+        self.assertLess(after.connection_quality, 1.0)
+        with self.assertRaises(TypeError):
+            self.analytics.get_snapshot()['bob'] = NetworkMetrics()
+
+    def test_readers_do_not_wait_for_writers(self):
+        with self.analytics._lock:  # A writer is mid-update
+            self.assertIsNotNone(self.analytics.get_current_metrics('alice'))
+            self.assertIn('alice', self.analytics.get_snapshot())
+
+if __name__ == '__main__':
+    unittest.main()
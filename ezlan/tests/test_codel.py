@@ -0,0 +1,47 @@
+import struct
+import unittest
+from ezlan.network.codel import FQCoDelQueue
+
+def udp_packet(src_port, dst_port, size):
+    header = bytearray(28)
+    header[0] = 0x45
+    header[9] = 17
+    header[12:20] = bytes([10, 0, 0, 1, 10, 0, 0, 2])
+    header[20:24] = struct.pack('!HH', src_port, dst_port)
+    return bytes(header) + b'\x00' * (size - 28)
+
+class TestFQCoDelQueue(unittest.TestCase):
+    def test_sparse_flow_skips_bulk_backlog(self):
+        queue = FQCoDelQueue()
+        for _ in range(50):
+            queue.enqueue(udp_packet(5000, 445, 1400), 0.0)
+        queue.dequeue(0.0)
+        game = udp_packet(6000, 27015, 80)
+        queue.enqueue(game, 0.0)
+        self.assertIn(game, [queue.dequeue(0.0) for _ in range(2)])
+
+    def test_byte_limit_drops_from_fattest_flow(self):
+        queue = FQCoDelQueue(byte_limit=10000)
+        game = udp_packet(6000, 27015, 100)
+        queue.enqueue(game, 0.0)
+        dropped = sum(queue.enqueue(udp_packet(5000, 445, 1000), 0.0) for _ in range(20))
+        self.assertLessEqual(queue.bytes, 10000)
+        self.assertEqual(dropped, queue.overflow_drops)
+        self.assertEqual(queue.dequeue(0.0), game)
+
+    def test_standing_queue_is_dropped(self):
+        queue = FQCoDelQueue(target=0.005, interval=0.1)
+        now = 0.0
+        sent = 0
+        # Arrivals at twice the departure rate build a standing queue
+        for step in range(2000):
+            now = step * 0.001
+            queue.enqueue(udp_packet(5000, 445, 1000), now)
+            queue.enqueue(udp_packet(5000, 445, 1000), now)
+            if queue.dequeue(now) is not None:
+                sent += 1
+        self.assertGreater(queue.codel_drops, 0)
+        self.assertEqual(queue.packets + sent + queue.codel_drops + queue.overflow_drops, 4000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import unittest
+from ezlan.network.crypto_workers import (CryptoWorkerPool, SharedRing, _worker_main,
+                                          OP_DROPPED, OP_OPENED, OP_SEAL, OP_SEALED)
+from ezlan.network.record_layer import RECORD_DATA, RecordLayer
+
+class TestSharedRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = SharedRing.create(256)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_entries_survive_wraparound(self):
+        for i in range(50):
+            payload = bytes([i]) * (i % 40 + 1)
+            self.assertTrue(self.ring.write(i, OP_SEAL, RECORD_DATA, payload))
+            self.assertEqual(self.ring.read(), (i, OP_SEAL, RECORD_DATA, payload))
+        self.assertIsNone(self.ring.read())
+
+    def test_full_ring_rejects_write(self):
+        while self.ring.write(1, OP_SEAL, RECORD_DATA, b'x' * 30):
+            pass
+        self.assertIsNotNone(self.ring.read())
+        self.assertTrue(self.ring.write(1, OP_SEAL, RECORD_DATA, b'x' * 30))
+
+    def test_waiting_flag_is_shared(self):
+        other = SharedRing.attach(self.ring.name)
+        self.addCleanup(other.close)
+        self.assertFalse(other.consumer_waiting())
+        self.ring.set_waiting(True)
+        self.assertTrue(other.consumer_waiting())
+
+class TestCryptoWorkerPool(unittest.TestCase):
+    def test_seal_and_open_in_workers(self):
+        secret, transcript = os.urandom(32), os.urandom(64)
+        client = RecordLayer.from_shared_secret('chacha20-poly1305', secret, transcript, True)
+        server = RecordLayer.from_shared_secret('chacha20-poly1305', secret, transcript, False)
+        sealed = client.seal(b'hello')  # before the worker takes over the sequence number
+
+        loop = asyncio.new_event_loop()
+        results = []
+        done = asyncio.Event()
+
+        def on_result(slot, op, record_type, payload):
+            results.append((slot, op, record_type, payload))
+            if len(results) == 3:
+                done.set()
+
+        pool = CryptoWorkerPool(2, loop, on_result, ring_capacity=64 * 1024)
+        pool.start()
+        try:
+            client_slot = pool.add_peer('client', client)
+            server_slot = pool.add_peer('server', server)
+            pool.submit_open(server_slot, sealed)
+            pool.submit_open(server_slot, sealed)  # replayed
+            pool.submit_seal(client_slot, b'world', RECORD_DATA)
+            loop.run_until_complete(asyncio.wait_for(done.wait(), 10))
+        finally:
+            pool.stop()
+            loop.close()
+
+        by_slot = {}
+        for slot, op, record_type, payload in results:
+            by_slot.setdefault(slot, []).append((op, payload))
+        self.assertEqual(by_slot[server_slot], [(OP_OPENED, b'hello'), (OP_DROPPED, b'')])
+        op, record = by_slot[client_slot][0]
+        self.assertEqual(op, OP_SEALED)
+        self.assertEqual(server.open(record), (RECORD_DATA, b'world'))
+
+    def test_peers_added_back_to_back_on_one_worker(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        results = []
+        done = asyncio.Event()
+
+        def on_result(slot, op, record_type, payload):
+            results.append((slot, op))
+            if len(results) == 4:
+                done.set()
+
+        pool = CryptoWorkerPool(1, loop, on_result, ring_capacity=64 * 1024)
+        pool.start()
+        self.addCleanup(pool.stop)
+        secret, transcript = os.urandom(32), os.urandom(64)
+        slots = [pool.add_peer(f'peer{i}', RecordLayer.from_shared_secret(
+            'chacha20-poly1305', secret, transcript, True)) for i in range(3)]
+        for slot in slots:
+            pool.submit_seal(slot, b'x', RECORD_DATA)
+        pool.peer_slots[99] = 0  # A slot the worker never heard of still gets an answer
+        pool.submit_seal(99, b'lost', RECORD_DATA)
+        loop.run_until_complete(asyncio.wait_for(done.wait(), 10))
+
+        self.assertEqual(results, [(slot, OP_SEALED) for slot in slots] + [(99, OP_DROPPED)])
+
+    def test_collector_stops_polling_dead_worker(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        pool = CryptoWorkerPool(1, loop, lambda *result: None, ring_capacity=4096)
+        pool.start()
+        self.addCleanup(pool.stop)
+        pool.workers[0]['process'].terminate()
+        pool._collector.join(timeout=2.0)
+        self.assertFalse(pool._collector.is_alive())
+
+class TestWorkerMain(unittest.TestCase):
+    def test_stop_while_waiting_for_response_space(self):
+        requests, responses = SharedRing.create(4096), SharedRing.create(128)
+        self.addCleanup(requests.close)
+        self.addCleanup(responses.close)
+        control, worker_control = multiprocessing.Pipe()
+        request_bell_reader, request_bell = multiprocessing.Pipe(duplex=False)
+        response_bell_reader, response_bell = multiprocessing.Pipe(duplex=False)
+
+        layer = RecordLayer.from_shared_secret('chacha20-poly1305', os.urandom(32), os.urandom(64), True)
+        control.send(('add', 1, layer.export_state()))
+        for _ in range(10):  # More sealed records than the response ring holds
+            requests.write(1, OP_SEAL, RECORD_DATA, b'x' * 32)
+        request_bell.send_bytes(b'\x01')
+
+        worker = threading.Thread(target=_worker_main, daemon=True, args=(
+            requests.name, responses.name, worker_control, request_bell_reader, response_bell))
+        worker.start()
+        worker.join(timeout=0.2)
+        self.assertTrue(worker.is_alive())  # Blocked on the full response ring
+
+        control.send(('stop',))
+        worker.join(timeout=1.0)
+        self.assertFalse(worker.is_alive())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import asyncio
+import socket
+import time
+import unittest
+from collections import deque
+from types import SimpleNamespace
+from ezlan.network.crypto_workers import OP_DROPPED, OP_OPEN, OP_OPENED, OP_SEALED
+from ezlan.network.data_plane import DataPlane
+from ezlan.network.framing import FrameReader
+from ezlan.network.record_layer import Handshake, PROBE_REPLY, RECORD_PROBE
+from ezlan.network.secure_tunnel import SecureTunnel
+
+def record_layers():
+    client, server = Handshake(), Handshake()
+    client_hello = client.client_hello()
+    server_hello, server_layer = server.server_hello(client_hello)
+    return client.finish(client_hello, server_hello), server_layer
+
+class TestDataPlaneOverSocketpair(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.close_loop)
+        self.left, self.right = SecureTunnel(None), SecureTunnel(None)
+        left_sock, right_sock = socket.socketpair()
+        left_layer, right_layer = record_layers()
+        self.received = {'left': [], 'right': []}
+        for name, tunnel, sock, layer in (('left', self.left, left_sock, left_layer),
+                                          ('right', self.right, right_sock, right_layer)):
+            tunnel.data_plane.loop = self.loop
+            tunnel.data_plane.packet_callback = (
+                lambda info, payload, name=name: self.received[name].append(payload)
+            )
+            tunnel.active_connections['peer'] = {
+                'socket': sock, 'reader': FrameReader(sock), 'host': 'peer', 'port': 0,
+                'record_layer': layer, 'transport': 'tcp', 'datagram_socket': None,
+                'last_received': 0.0, 'status': 'connected'
+            }
+            tunnel.data_plane.attach(tunnel.active_connections['peer'])
+        self.run_loop()
+
+    def close_loop(self):
+        for tunnel in (self.left, self.right):
+            tunnel.data_plane.stop()
+        self.run_loop()
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        self.run_loop()
+        self.loop.close()
+
+    def run_loop(self, seconds=0.05):
+        self.loop.run_until_complete(asyncio.sleep(seconds))
+
+    def test_attach_wires_both_transports(self):
+        for tunnel in (self.left, self.right):
+            self.assertIn('stream_transport', tunnel.active_connections['peer'])
+
+    def test_send_and_receive(self):
+        self.left.send_packet('peer', b'ping')
+        self.right.send_packet('peer', b'pong')
+        self.run_loop()
+        self.assertEqual(self.received['right'], [b'ping'])
+        self.assertEqual(self.received['left'], [b'pong'])
+
+    def test_detach_closes_socket_through_its_transport(self):
+        connection_info = self.left.active_connections['peer']
+        transport = connection_info['stream_transport']
+        self.left.close_connection('peer')
+        self.assertFalse(transport.is_closing())  # Raw socket is left to the transport
+        self.assertNotEqual(connection_info['socket'].fileno(), -1)
+
+        self.run_loop()
+        self.assertNotIn('stream_transport', connection_info)
+        self.assertEqual(connection_info['socket'].fileno(), -1)
+        # The other side sees the close and drops its end
+        self.assertNotIn('peer', self.right.active_connections)
+
+    def test_stop_leaves_no_pending_tasks(self):
+        self.assertIsNotNone(self.left.data_plane._keepalive_task)
+        streams = [tunnel.active_connections['peer']['socket'] for tunnel in (self.left, self.right)]
+        for tunnel in (self.left, self.right):
+            tunnel.data_plane.stop()
+        self.run_loop()
+        self.assertEqual(asyncio.all_tasks(self.loop), set())
+        self.assertEqual([sock.fileno() for sock in streams], [-1, -1])
+        self.assertFalse(self.left.active_connections)
+
+    def test_tcp_traffic_does_not_keep_silent_udp_alive(self):
+        connection_info = self.left.active_connections['peer']
+        connection_info['transport'] = 'udp'
+        connection_info['last_datagram_received'] = time.monotonic() - 10.0
+        self.right.send_packet('peer', b'over tcp')
+        self.run_loop()
+        self.assertEqual(self.received['left'], [b'over tcp'])
+
+        self.left.data_plane._check_paths(time.monotonic())
+        self.assertEqual(connection_info['transport'], 'tcp')
+        self.assertIn('udp_retry_at', connection_info)
+
+    def test_close_before_attach_closes_raw_socket(self):
+        sock, other = socket.socketpair()
+        self.addCleanup(other.close)
+        connection_info = {
+            'socket': sock, 'reader': FrameReader(sock), 'host': 'late', 'port': 0,
+            'record_layer': record_layers()[0], 'transport': 'tcp', 'datagram_socket': None,
+            'last_received': 0.0, 'status': 'connected'
+        }
+        self.left.active_connections['late'] = connection_info
+        self.left.data_plane.attach(connection_info)
+        self.left.close_connection('late')
+        self.run_loop()
+        self.assertNotIn('stream_transport', connection_info)
+        self.assertEqual(sock.fileno(), -1)
+
+class TestWorkerResults(unittest.TestCase):
+    def test_dropped_open_consumes_its_pending_entry(self):
+        data_plane = DataPlane(SimpleNamespace(), asyncio.new_event_loop())
+        self.addCleanup(data_plane.loop.close)
+        data_plane.crypto_pool = SimpleNamespace()
+        connection_info = {
+            'host': 'peer', 'transport': 'tcp', 'status': 'connected', 'last_received': 0.0,
+            'pending_opens': deque([(True, ('10.0.0.2', 1000)), (True, ('10.0.0.2', 2000))])
+        }
+        data_plane._slots[0] = connection_info
+        data_plane._handle_worker_result(0, OP_DROPPED, OP_OPEN, b'')
+        data_plane._handle_worker_result(0, OP_OPENED, RECORD_PROBE, PROBE_REPLY)
+        self.assertEqual(connection_info['datagram_addr'], ('10.0.0.2', 2000))
+        self.assertFalse(connection_info['pending_opens'])
+
+    def test_sealed_reply_keeps_the_path_it_was_requested_on(self):
+        data_plane = DataPlane(SimpleNamespace(), asyncio.new_event_loop())
+        self.addCleanup(data_plane.loop.close)
+        submitted = []
+        data_plane.crypto_pool = SimpleNamespace(
+            submit_seal=lambda slot, payload, record_type: submitted.append(payload) or True
+        )
+        sent = []
+        connection_info = {
+            'host': 'peer', 'transport': 'udp', 'status': 'connected', 'crypto_slot': 0,
+            'pending_opens': deque(), 'pending_seals': deque(),
+            'stream_transport': SimpleNamespace(write=lambda data: sent.append('tcp')),
+            'datagram_transport': SimpleNamespace(sendto=lambda data, addr: sent.append('udp'))
+        }
+        data_plane._slots[0] = connection_info
+        # A probe that arrived over TCP is answered over TCP even though UDP is preferred
+        data_plane._seal_and_send(connection_info, PROBE_REPLY, RECORD_PROBE, datagram=False)
+        data_plane._seal_and_send(connection_info, PROBE_REPLY, RECORD_PROBE)
+        for record in submitted:
+            data_plane._handle_worker_result(0, OP_SEALED, RECORD_PROBE, record)
+        self.assertEqual(sent, ['tcp', 'udp'])
+
+if __name__ == '__main__':
+    unittest.main()
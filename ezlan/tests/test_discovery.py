@@ -0,0 +1,74 @@
+import json
+import socket
+import time
+import unittest
+from types import SimpleNamespace
+from ezlan.network.discovery import DiscoveryService
+from ezlan.network.interface_inventory import InterfaceAddress
+
+def fake_interfaces(*addresses):
+    return SimpleNamespace(addresses=addresses, local_ip=lambda: '127.0.0.1',
+                           broadcast_addresses=lambda: [])
+
+class DiscoveryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.service = DiscoveryService()
+        self.service.interfaces = fake_interfaces()  # Nothing is broadcast on the real network
+        self.addCleanup(self.service.stop_discovery)
+
+class TestDiscoveryLoop(DiscoveryTestCase):
+    def test_datagram_handled_without_waiting_for_broadcast(self):
+        self.service.PORT = 0
+        self.service.broadcast_interval = 60.0
+        self.service.start_discovery()
+        port = self.service.socket.getsockname()[1]
+        time.sleep(0.05)  # Let the loop finish its first broadcast round and wait
+
+        presence = {'name': 'alice', 'ip': '10.0.0.2', 'type': 'presence'}
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as peer:
+            peer.sendto(json.dumps(presence).encode(), ('127.0.0.1', port))
+        deadline = time.monotonic() + 1.0
+        while 'alice' not in self.service.known_peers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.service.known_peers.get('alice'), presence)
+
+    def test_stop_closes_wakeup_pair_after_thread_exits(self):
+        self.service.PORT = 0
+        self.service.start_discovery()
+        wakeup, thread = self.service._wakeup, self.service._discovery_thread
+        self.service.stop_discovery()
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(self.service._wakeup)
+        self.assertEqual(wakeup.fileno(), -1)
+
+class TestBroadcastPool(DiscoveryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.receiver.bind(('127.0.0.1', 0))
+        self.receiver.settimeout(1.0)
+        self.addCleanup(self.receiver.close)
+        self.service.broadcast_port = self.receiver.getsockname()[1]
+        # Unicast "broadcast" address so the test stays on loopback
+        self.service.interfaces = fake_interfaces(InterfaceAddress('lo', '127.0.0.1', None, '127.0.0.1'))
+
+    def test_sockets_reused_between_rounds(self):
+        self.service._broadcast_presence()
+        pool = dict(self.service._broadcast_targets)
+        self.service._broadcast_presence()
+        self.assertEqual(self.service._broadcast_targets, pool)
+
+        for _ in range(2):
+            self.assertEqual(json.loads(self.receiver.recv(65535))['type'], 'presence')
+
+    def test_interface_change_closes_stale_sockets(self):
+        self.service._broadcast_presence()
+        (broadcast_socket, _), = self.service._broadcast_targets.values()
+        self.service.interfaces = fake_interfaces()
+        self.service.invalidate_interfaces()
+        self.service._broadcast_presence()
+        self.assertEqual(self.service._broadcast_targets, {})
+        self.assertEqual(broadcast_socket.fileno(), -1)
+
+if __name__ == '__main__':
+    unittest.main()
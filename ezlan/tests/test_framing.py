@@ -0,0 +1,48 @@
+import socket
+import unittest
+from ezlan.network.framing import FrameReader, FramingError, encode_frame
+
+class TestFrameReader(unittest.TestCase):
+    def setUp(self):
+        self.sender, self.receiver = socket.socketpair()
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def test_many_frames_per_recv(self):
+        reader = FrameReader(self.receiver)
+        self.sender.sendall(b''.join(encode_frame(bytes([i]) * 10) for i in range(5)))
+        frames = []
+        while len(frames) < 5:
+            frames.extend(bytes(f) for f in reader.read_frames())
+        self.assertEqual(frames, [bytes([i]) * 10 for i in range(5)])
+
+    def test_frame_split_across_reads(self):
+        reader = FrameReader(self.receiver)
+        data = encode_frame(b"split frame")
+        self.sender.sendall(data[:3])
+        self.assertEqual(reader.read_frames(), [])
+        self.sender.sendall(data[3:])
+        self.assertEqual(reader.read_frame(), b"split frame")
+
+    def test_buffer_compacts_and_grows(self):
+        reader = FrameReader(self.receiver, buffer_size=64)
+        payloads = [b"a" * 40, b"b" * 200, b"c" * 40]
+        self.sender.sendall(b''.join(encode_frame(p) for p in payloads))
+        self.assertEqual([reader.read_frame() for _ in payloads], payloads)
+
+    def test_oversized_frame_rejected(self):
+        reader = FrameReader(self.receiver, max_frame_size=16)
+        self.sender.sendall(encode_frame(b"x" * 32))
+        with self.assertRaises(FramingError):
+            reader.read_frame()
+
+    def test_closed_connection(self):
+        reader = FrameReader(self.receiver)
+        self.sender.close()
+        with self.assertRaises(ConnectionError):
+            reader.read_frames()
+
+if __name__ == '__main__':
+    unittest.main()
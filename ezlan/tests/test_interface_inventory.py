@@ -0,0 +1,34 @@
+import unittest
+from ezlan.network.interface_inventory import InterfaceAddress, InterfaceInventory
+
+class FakeInventory(InterfaceInventory):
+    """Inventory over a table the test controls"""
+    def __init__(self):
+        self.table = (InterfaceAddress('eth0', '192.168.1.10', '255.255.255.0', '192.168.1.255'),)
+        super().__init__()
+
+    def _enumerate(self):
+        return self.table
+
+    def _route_address(self, addresses):
+        return addresses[0].address if addresses else '127.0.0.1'
+
+class TestInterfaceInventory(unittest.TestCase):
+    def setUp(self):
+        self.inventory = FakeInventory()
+        self.changes = []
+        self.inventory.changed.connect(self.changes.append)
+
+    def test_unchanged_table_is_not_republished(self):
+        self.assertFalse(self.inventory.refresh())
+        self.assertEqual(self.changes, [])
+
+    def test_address_change_publishes_new_snapshot(self):
+        self.inventory.table += (InterfaceAddress('wlan0', '10.0.0.5', '255.0.0.0', '10.255.255.255'),)
+        self.assertTrue(self.inventory.refresh())
+        self.assertEqual(self.changes, [self.inventory.table])
+        self.assertEqual(self.inventory.broadcast_addresses(), ['10.255.255.255', '192.168.1.255'])
+        self.assertEqual(self.inventory.local_ip(), '192.168.1.10')
+
+if __name__ == '__main__':
+    unittest.main()
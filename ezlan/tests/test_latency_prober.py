@@ -0,0 +1,55 @@
+import asyncio
+import unittest
+from ezlan.network.latency_prober import LatencyProber, ProbeStats
+from ezlan.network.record_layer import PROBE_REPLY, RECORD_PROBE
+
+class EchoDataPlane:
+    """Answers every probe on the next loop iteration, like a peer would"""
+    def __init__(self, loop, hosts):
+        self.loop = loop
+        self.probe_handler = None
+        self.secure_tunnel = type('Tunnel', (), {})()
+        self.secure_tunnel.active_connections = {
+            host: {'host': host, 'status': 'connected'} for host in hosts
+        }
+
+    def send_payload(self, connection_info, payload, record_type):
+        assert record_type == RECORD_PROBE
+        self.loop.call_soon(self.probe_handler, connection_info, PROBE_REPLY + payload[1:])
+
+class TestProbeStats(unittest.TestCase):
+    def test_jitter_follows_rtt_variation(self):
+        stats = ProbeStats()
+        for rtt in (10.0, 20.0, 10.0, 20.0):
+            stats.record_reply(rtt)
+        self.assertGreater(stats.jitter, 0.0)
+        self.assertLess(stats.jitter, 10.0)
+
+    def test_loss_counts_unanswered_probes(self):
+        stats = ProbeStats()
+        stats.record_reply(5.0)
+        stats.outcomes.append(False)
+        self.assertEqual(stats.packet_loss, 0.5)
+
+class TestLatencyProber(unittest.TestCase):
+    def test_probes_every_peer_from_one_task(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        results = []
+        data_plane = EchoDataPlane(loop, ['10.0.0.2', '10.0.0.3'])
+        prober = LatencyProber(data_plane, interval=0.01,
+                               result_callback=lambda host, rtt, stats: results.append((host, rtt)))
+        prober.watch('10.0.0.2')
+        prober.watch('10.0.0.3')
+        prober.watch('10.0.0.4')  # No connection: every probe is lost
+
+        loop.run_until_complete(asyncio.sleep(0.05))
+        prober.stop()
+        loop.run_until_complete(asyncio.sleep(0))
+
+        answered = {host for host, rtt in results if rtt is not None}
+        self.assertEqual(answered, {'10.0.0.2', '10.0.0.3'})
+        self.assertTrue(all(rtt is None for host, rtt in results if host == '10.0.0.4'))
+
+if __name__ == '__main__':
+    unittest.main()
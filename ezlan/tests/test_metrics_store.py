@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+from ezlan.network.metrics_store import MetricRing, MetricsStore
+
+class TestMetricRing(unittest.TestCase):
+    def test_window_statistics_match_numpy(self):
+        ring = MetricRing(('latency', 'packet_loss'), capacity=8)
+        rng = np.random.default_rng(1)
+        samples = rng.normal(50, 10, size=(29, 2)).astype(np.float32)
+        for i, row in enumerate(samples):
+            ring.append(row)
+            window = samples[max(0, i - 7):i + 1].astype(np.float64)
+            self.assertAlmostEqual(ring.mean('latency'), window[:, 0].mean(), places=4)
+            self.assertAlmostEqual(ring.std('packet_loss'), window[:, 1].std(), places=3)
+        np.testing.assert_array_equal(ring.values('latency'), samples[-8:, 0])
+        self.assertEqual(len(ring), 8)
+
+    def test_store_repeats_missing_columns(self):
+        store = MetricsStore(capacity=4)
+        store.add_connection('alice')
+        store.record('alice', latency=10.0, jitter=1.0, packet_loss=0.0, bandwidth=100.0)
+        ring = store.record('alice', latency=20.0)
+        self.assertEqual(ring.latest('bandwidth'), 100.0)
+        self.assertAlmostEqual(ring.mean('latency'), 15.0)
+        store.remove_connection('alice')
+        self.assertIsNone(store.get('alice'))
+
+    def test_ring_lives_until_last_consumer_removes_it(self):
+        store = MetricsStore(capacity=4)
+        analytics_ring = store.add_connection('alice')
+        self.assertIs(store.add_connection('alice'), analytics_ring)  # A second consumer
+        store.record('alice', latency=10.0)
+
+        store.remove_connection('alice')  # e.g. analytics timed the connection out
+        self.assertIs(store.get('alice'), analytics_ring)
+        self.assertEqual(analytics_ring.latest('latency'), 10.0)
+
+        store.remove_connection('alice')
+        self.assertIsNone(store.get('alice'))
+
+    def test_samples_for_released_connection_are_dropped(self):
+        store = MetricsStore(capacity=4)
+        store.add_connection('alice')
+        store.remove_connection('alice')
+        self.assertIsNone(store.record('alice', latency=10.0))
+        self.assertIsNone(store.get('alice'))
+        self.assertNotIn('alice', store.rings)
+
+if __name__ == '__main__':
+    unittest.main()
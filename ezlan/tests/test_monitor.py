@@ -0,0 +1,47 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from ezlan.network.monitor import ConnectionMonitor
+from ezlan.network.path_meter import PathMeter
+
+class RecordingQualityMonitor:
+    def __init__(self):
+        self.connections = {}
+        self.updates = []
+
+    def add_connection(self, user_name):
+        self.connections[user_name] = True
+
+    def update_metrics(self, user_name, latency, packet_loss, jitter):
+        self.updates.append((user_name, latency))
+
+class TestPassiveSampling(unittest.TestCase):
+    def setUp(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        self.meter = PathMeter()
+        data_plane = SimpleNamespace(loop=loop, probe_handler=None)
+        secure_tunnel = SimpleNamespace(
+            data_plane=data_plane,
+            active_connections={'10.0.0.2': {'host': '10.0.0.2', 'path_meter': self.meter}}
+        )
+        self.quality = RecordingQualityMonitor()
+        self.monitor = ConnectionMonitor(SimpleNamespace(secure_tunnel=secure_tunnel), self.quality)
+        self.addCleanup(self.monitor.stop)
+        self.monitor.start_monitoring('alice', '10.0.0.2')
+        self.peer = PathMeter()
+
+    def test_one_way_traffic_does_not_report_zero_latency(self):
+        self.meter.receive(self.peer.stamp() + b'frame')  # Peer sends, we never do
+        self.monitor._sample_paths()
+        self.assertEqual(self.quality.updates, [])
+
+    def test_reports_once_rtt_is_known(self):
+        self.peer.receive(self.meter.stamp() + b'frame')
+        self.meter.receive(self.peer.stamp() + b'frame')  # Echoes our timestamp
+        self.monitor._sample_paths()
+        self.assertEqual(len(self.quality.updates), 1)
+        self.assertEqual(self.quality.updates[0][0], 'alice')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import struct
+import tempfile
+import time
+import unittest
+from ezlan.network.packet_processor import PacketProcessor
+from ezlan.network.port_classifier import PortClassifier
+
+def make_packet(dst_port, size, protocol=17, options=0):
+    header_length = 20 + 4 * options
+    header = bytearray(header_length + 8)
+    header[0] = 0x40 | (header_length // 4)
+    header[9] = protocol
+    header[header_length + 2:header_length + 4] = struct.pack('!H', dst_port)
+    return bytes(header) + b'\x00' * max(0, size - len(header))
+
+class FakeSignal:
+    def __init__(self):
+        self.packets = []
+
+    def emit(self, packet):
+        self.packets.append(packet)
+
+class FakeInterface:
+    def __init__(self):
+        self.packet_received = FakeSignal()
+
+class TestPortClassifier(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.storage_path = os.path.join(self.tempdir.name, 'game_ports.json')
+        self.classifier = PortClassifier(self.storage_path)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_header_length_and_protocol(self):
+        self.assertTrue(self.classifier.is_gaming(make_packet(27015, 100)))
+        self.assertTrue(self.classifier.is_gaming(make_packet(27015, 100, options=3)))
+        self.assertFalse(self.classifier.is_gaming(make_packet(27015, 100, protocol=1)))
+        self.assertFalse(self.classifier.is_gaming(make_packet(443, 100)))
+        self.assertFalse(self.classifier.is_gaming(b'\x45' + b'\x00' * 10))
+
+    def test_batch_matches_single(self):
+        packets = [make_packet(27015, 60), make_packet(443, 1200), b'',
+                   make_packet(3074, 90, options=2), make_packet(7777, 40, protocol=1), b'\x45\x00']
+        expected = [self.classifier.is_gaming(packet) for packet in packets]
+        self.assertEqual(self.classifier.classify_batch(packets).tolist(), expected)
+        self.assertEqual(expected, [True, False, False, True, False, False])
+
+    def test_custom_ports_persist(self):
+        self.classifier.add_custom_port(40000)
+        self.assertTrue(self.classifier.is_gaming(make_packet(40000, 100)))
+        self.assertIn(40000, PortClassifier(self.storage_path).gaming_ports)
+        self.classifier.remove_custom_port(40000)
+        self.assertFalse(self.classifier.is_gaming(make_packet(40000, 100)))
+
+class TestPacketProcessor(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        classifier = PortClassifier(os.path.join(self.tempdir.name, 'game_ports.json'))
+        self.processor = PacketProcessor(FakeInterface(), lane_limits={'bulk': 4, 'gaming': 2},
+                                         port_classifier=classifier)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_classification(self):
+        self.assertEqual(self.processor.classify(make_packet(27015, 1200)), 'gaming')
+        self.assertEqual(self.processor.classify(make_packet(53, 1200)), 'interactive')
+        self.assertEqual(self.processor.classify(make_packet(443, 100)), 'interactive')
+        self.assertEqual(self.processor.classify(make_packet(443, 1200)), 'bulk')
+
+    def test_bulk_drops_tail_and_gaming_drops_oldest(self):
+        bulk = [make_packet(443, 1000 + i) for i in range(6)]
+        results = [self.processor.submit(packet) for packet in bulk]
+        self.assertEqual(results, [True] * 4 + [False] * 2)
+        self.assertEqual([p for _, p in self.processor.lanes['bulk']], bulk[:4])
+
+        games = [make_packet(3074, 500 + i) for i in range(3)]
+        for packet in games:
+            self.assertTrue(self.processor.submit(packet))
+        self.assertEqual([p for _, p in self.processor.lanes['gaming']], games[1:])
+
+        stats = self.processor.get_lane_stats()
+        self.assertEqual((stats['bulk']['dropped'], stats['gaming']['dropped']), (2, 1))
+        self.assertEqual(stats['bulk']['depth'], 4)
+
+    def test_gaming_served_before_bulk(self):
+        bulk = make_packet(443, 1200)
+        game = make_packet(3074, 1200)
+        self.processor.submit(bulk)
+        self.processor.submit(game)
+        self.processor.start()
+        received = self.processor.interface.packet_received.packets
+        deadline = time.time() + 2.0
+        while len(received) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.processor.stop()
+        self.assertEqual(received, [game, bulk])
+
+if __name__ == '__main__':
+    unittest.main()
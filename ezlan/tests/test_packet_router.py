@@ -0,0 +1,87 @@
+import socket
+import unittest
+from ezlan.network.packet_router import PacketRouter
+
+class FakeDestination:
+    def __init__(self):
+        self.packets = []
+
+    def write_packet(self, packet):
+        self.packets.append(packet)
+
+class TestPacketRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = PacketRouter()
+        self.lan = FakeDestination()
+        self.peer = FakeDestination()
+        self.default = FakeDestination()
+        self.router.add_route('10.0.0.1', '10.0.0.0/8', self.lan)
+        self.router.add_route('10.0.0.1', '10.1.2.3/32', self.peer)
+        self.router.add_route('10.0.0.1', '0.0.0.0/0', self.default)
+
+    def test_longest_prefix_wins(self):
+        self.assertTrue(self.router.route_packet('10.0.0.1', '10.1.2.3', b'peer'))
+        self.assertTrue(self.router.route_packet('10.0.0.1', '10.1.2.4', b'lan'))
+        self.assertEqual(self.peer.packets, [b'peer'])
+        self.assertEqual(self.lan.packets, [b'lan'])
+
+    def test_default_route(self):
+        self.router.route_packet('10.0.0.1', '192.168.1.5', b'out')
+        self.assertEqual(self.default.packets, [b'out'])
+
+    def test_first_octet_is_not_enough(self):
+        self.router.remove_route('0.0.0.0/0')
+        self.router.remove_route('10.0.0.0/8')
+        self.assertFalse(self.router.route_packet('10.0.0.1', '100.1.2.3', b'x'))
+
+    def test_lookup_accepts_packed_and_int(self):
+        self.assertIs(self.router.lookup(bytes([10, 1, 2, 3]))['destination'], self.peer)
+        self.assertIs(self.router.lookup(0x0A010204)['destination'], self.lan)
+
+    def test_snapshot_unaffected_by_writes(self):
+        table = self.router._table
+        self.router.clear()
+        self.assertIsNone(self.router.lookup('10.1.2.3'))
+        self.assertIs(table.lookup(0x0A010203)['destination'], self.peer)
+
+class TestBatchedSend(unittest.TestCase):
+    def test_datagram_boundaries_preserved(self):
+        router = PacketRouter(batch_window=0.001, max_batch=8)
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.connect(receiver.getsockname())
+        router.add_route('10.0.0.1', '10.0.0.0/24', sender)
+        for i in range(20):
+            router.route_packet('10.0.0.1', '10.0.0.7', bytes([i]) * 4)
+        router.batching.flush()
+
+        receiver.settimeout(1.0)
+        received = [receiver.recv(64) for _ in range(20)]
+        self.assertEqual(received, [bytes([i]) * 4 for i in range(20)])
+
+        stats = router.get_batch_stats()[sender]
+        self.assertEqual(stats.packets, 20)
+        self.assertLessEqual(stats.max_batch_size, 8)
+        router.clear()
+        sender.close()
+        receiver.close()
+
+    def test_batcher_kept_while_socket_still_routed(self):
+        router = PacketRouter(batch_window=0.001)
+        self.addCleanup(router.clear)
+        sender, receiver = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.addCleanup(sender.close)
+        self.addCleanup(receiver.close)
+        router.add_route('10.0.0.1', '10.0.0.0/24', sender)
+        router.add_route('10.0.0.1', '10.0.1.0/24', sender)
+        router.route_packet('10.0.0.1', '10.0.1.7', b'frame')
+        batcher = router.batching.batchers[sender]
+
+        router.remove_route('10.0.0.0/24')
+        self.assertIs(router.batching.batchers.get(sender), batcher)
+        router.remove_route('10.0.1.0/24')
+        self.assertNotIn(sender, router.batching.batchers)
+
+if __name__ == '__main__':
+    unittest.main()
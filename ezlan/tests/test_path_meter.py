@@ -0,0 +1,39 @@
+import time
+import unittest
+from ezlan.network.path_meter import FRAME_HEADER, PathMeter
+
+class TestPathMeter(unittest.TestCase):
+    def setUp(self):
+        self.local = PathMeter()
+        self.peer = PathMeter()
+
+    def send(self, sender, receiver, payload=b'frame'):
+        return receiver.receive(sender.stamp() + payload)
+
+    def test_header_is_stripped(self):
+        self.assertEqual(self.send(self.peer, self.local, b'game data'), b'game data')
+
+    def test_loss_and_reordering_from_sequence_gaps(self):
+        frames = [self.peer.stamp() + b'x' for _ in range(10)]
+        for i in (0, 1, 2, 4, 3, 6, 7, 8, 9):  # 5 lost, 3 and 4 swapped
+            self.local.receive(frames[i])
+        sample = self.local.sample()
+        self.assertEqual(sample.frames, 9)
+        self.assertEqual(sample.reordered, 1)
+        self.assertAlmostEqual(sample.packet_loss, 0.1)
+        self.assertEqual(self.local.sample().frames, 0)  # counters reset per interval
+
+    def test_rtt_excludes_hold_time(self):
+        self.send(self.local, self.peer)
+        self.assertIsNone(self.local.srtt_us)  # Nothing echoed yet
+        time.sleep(0.05)  # Peer holds our timestamp before it has something to send
+        self.send(self.peer, self.local)
+        # Path delay is near zero here, the 50ms at the peer must not show up
+        self.assertLess(self.local.sample().rtt, 10.0)
+        self.assertIsNotNone(self.local.srtt_us)
+
+    def test_header_size(self):
+        self.assertEqual(len(self.peer.stamp()), FRAME_HEADER.size)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from PyQt6.QtWidgets import QApplication
+from ezlan.gui.components.performance_dashboard import PLOT_COLUMNS, PerformanceDashboard
+from ezlan.network.analytics import NetworkMetrics
+
+class TestPerformanceDashboard(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.snapshot = {'alice': NetworkMetrics(avg_latency=20.0), 'bob': NetworkMetrics(avg_latency=50.0)}
+        tunnel_service = SimpleNamespace(
+            active_tunnels={'alice': {}, 'bob': {}},
+            network_analytics=SimpleNamespace(get_snapshot=lambda: self.snapshot)
+        )
+        self.dashboard = PerformanceDashboard(tunnel_service)
+        self.dashboard.update_timer.stop()
+        self.dashboard.history_length = 5  # Applies to user tabs created from now on
+        self.addCleanup(self.dashboard.deleteLater)
+        self.dashboard.show()
+        self.dashboard._update_metrics()  # Creates both user tabs
+
+    def show_user(self, user_name):
+        self.dashboard.tab_widget.setCurrentWidget(self.dashboard.user_plots[user_name]['widget'])
+
+    def test_one_persistent_curve_per_metric(self):
+        self.show_user('alice')
+        user = self.dashboard.user_plots['alice']
+        curves = dict(user['curves'])
+        for _ in range(3):
+            self.dashboard._update_metrics()
+
+        self.assertEqual(set(user['curves']), set(PLOT_COLUMNS))
+        for name, curve in user['curves'].items():
+            self.assertIs(curve, curves[name])
+            self.assertEqual(curve.getViewBox().addedItems, [curve])
+        self.assertEqual(len(user['curves']['latency'].getData()[1]), 4)
+
+    def test_history_is_capped(self):
+        self.show_user('alice')
+        for _ in range(12):
+            self.dashboard._update_metrics()
+        user = self.dashboard.user_plots['alice']
+        self.assertEqual(len(user['history']), 5)
+        self.assertEqual(len(user['curves']['latency'].getData()[0]), 5)
+
+    def test_hidden_tab_buffers_without_drawing(self):
+        self.show_user('alice')
+        bob = self.dashboard.user_plots['bob']
+        latency_curve = bob['curves']['latency']
+        with mock.patch.object(latency_curve, 'setData', wraps=latency_curve.setData) as set_data:
+            for _ in range(3):
+                self.dashboard._update_metrics()
+            set_data.assert_not_called()
+            self.assertEqual(len(bob['history']), 4)
+
+            self.show_user('bob')
+            set_data.assert_called_once()
+        self.assertEqual(list(latency_curve.getData()[1]), [50.0] * 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from ezlan.network.record_layer import (Handshake, RecordError, RECORD_DATA,
+                                        RECORD_KEEPALIVE, RECORD_OVERHEAD)
+
+class TestRecordLayer(unittest.TestCase):
+    def setUp(self):
+        client = Handshake()
+        server = Handshake()
+        hello = client.client_hello()
+        reply, self.server = server.server_hello(hello)
+        self.client = client.finish(hello, reply)
+
+    def test_round_trip(self):
+        record = self.client.seal(b"game frame")
+        self.assertEqual(len(record), len(b"game frame") + RECORD_OVERHEAD)
+        self.assertEqual(self.server.open(record), (RECORD_DATA, b"game frame"))
+
+    def test_directions_use_separate_keys(self):
+        record = self.client.seal(b"ping", RECORD_KEEPALIVE)
+        with self.assertRaises(RecordError):
+            self.client.open(record)
+
+    def test_replay_rejected(self):
+        record = self.client.seal(b"once")
+        self.server.open(record)
+        with self.assertRaises(RecordError):
+            self.server.open(record)
+
+    def test_reordering_inside_window(self):
+        first = self.client.seal(b"1")
+        second = self.client.seal(b"2")
+        self.assertEqual(self.server.open(second)[1], b"2")
+        self.assertEqual(self.server.open(first)[1], b"1")
+
+    def test_tampered_record_rejected(self):
+        record = bytearray(self.client.seal(b"payload"))
+        record[-1] ^= 0x01
+        with self.assertRaises(RecordError):
+            self.server.open(bytes(record))
+
+    def test_cipher_negotiation(self):
+        client = Handshake(ciphers=['aes-256-gcm'])
+        hello = client.client_hello()
+        reply, server_layer = Handshake().server_hello(hello)
+        self.assertEqual(reply['cipher'], 'aes-256-gcm')
+        client_layer = client.finish(hello, reply)
+        self.assertEqual(server_layer.open(client_layer.seal(b"x"))[1], b"x")
+
+    def test_version_mismatch_rejected(self):
+        client = Handshake()
+        hello = client.client_hello()
+        reply, _ = Handshake().server_hello(hello)
+        reply['version'] -= 1
+        with self.assertRaises(RecordError):
+            client.finish(hello, reply)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import time
+import unittest
+from ezlan.network.scheduler import TimerWheel
+
+class TestTimerWheel(unittest.TestCase):
+    def setUp(self):
+        self.wheel = TimerWheel(tick=0.005, slots=16)
+        self.addCleanup(self.wheel.stop)
+
+    def test_periodic_job_runs_on_time(self):
+        runs = []
+        done = threading.Event()
+
+        def job():
+            runs.append(time.monotonic())
+            if len(runs) == 5:
+                done.set()
+
+        start = time.monotonic()
+        self.wheel.schedule("job", job, 0.02)
+        self.assertTrue(done.wait(2.0))
+        self.assertAlmostEqual(runs[-1] - start, 0.1, delta=0.05)
+        stats = self.wheel.get_stats()["job"]
+        self.assertGreaterEqual(stats.runs, 5)
+        self.assertLess(stats.max_jitter, 0.05)
+
+    def test_long_delay_spans_revolutions(self):
+        fired = threading.Event()
+        # 16 slots of 5ms is one 80ms revolution
+        start = time.monotonic()
+        self.wheel.schedule("late", fired.set, 1.0, delay=0.2)
+        self.assertTrue(fired.wait(2.0))
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test_cancel_and_overruns(self):
+        calls = []
+        job = self.wheel.schedule("slow", lambda: (calls.append(1), time.sleep(0.05)), 0.01)
+        time.sleep(0.2)
+        self.wheel.cancel(job)
+        count = len(calls)
+        time.sleep(0.05)
+        self.assertEqual(len(calls), count)
+        self.assertGreater(job.stats.overruns, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+import numpy as np
+from ezlan.network.qos_profiles import ScoreWeight
+from ezlan.network.scoring import ScoringEngine, get_scoring_engine
+
+class TestScoringEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = ScoringEngine({
+            'latency': ScoreWeight(0.5, 200.0),
+            'bandwidth': ScoreWeight(0.5, 100.0, higher_is_better=True)
+        })
+
+    def test_matrix_matches_single_scores(self):
+        matrix = np.array([[0.0, 100.0], [100.0, 50.0], [400.0, 500.0], [np.nan, 100.0]])
+        scores = self.engine.score_matrix(matrix)
+        np.testing.assert_allclose(scores, [1.0, 0.5, 0.5, 0.5])
+        self.assertAlmostEqual(self.engine.score(latency=100.0, bandwidth=50.0), scores[1])
+
+    def test_subset_renormalizes(self):
+        self.assertAlmostEqual(self.engine.score(latency=100.0, metrics=('latency',)), 0.5)
+
+    def test_profiles_load(self):
+        self.assertEqual(get_scoring_engine('connection').score(latency=0, packet_loss=0, jitter=0,
+                                                               bandwidth=1024 * 1024), 1.0)
+        self.assertIn('frame_time', get_scoring_engine('gaming').metrics)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import socket
+import threading
+import time
+import unittest
+from ezlan.network.framing import FrameReader
+from ezlan.network.record_layer import RECORD_DATA
+from ezlan.network.secure_tunnel import SecureTunnel
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+class TunnelTestCase(unittest.TestCase):
+    def make_tunnel(self):
+        """A SecureTunnel whose data plane runs on its own loop thread"""
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        tunnel = SecureTunnel(None)
+        tunnel.data_plane.loop = loop
+
+        def cleanup():
+            tunnel.stop_listening()
+            tunnel.data_plane.stop()
+            time.sleep(0.05)  # Let the queued shutdown run
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=1.0)
+            loop.close()
+        self.addCleanup(cleanup)
+        return tunnel
+
+class TestHandshake(TunnelTestCase):
+    def test_initiator_and_responder_derive_matching_keys(self):
+        initiator, responder = self.make_tunnel(), self.make_tunnel()
+        client, server = socket.socketpair()
+        self.addCleanup(client.close)
+        self.addCleanup(server.close)
+
+        accepted = {}
+        thread = threading.Thread(
+            target=lambda: accepted.update(layer=responder._accept_secure_channel(server, FrameReader(server)))
+        )
+        thread.start()
+        client_layer = initiator._setup_secure_channel(client, FrameReader(client))
+        thread.join(timeout=2.0)
+
+        self.assertIsNotNone(client_layer)
+        server_layer = accepted['layer']
+        self.assertIsNotNone(server_layer)
+        self.assertEqual(server_layer.open(client_layer.seal(b'to host')), (RECORD_DATA, b'to host'))
+        self.assertEqual(client_layer.open(server_layer.seal(b'to client')), (RECORD_DATA, b'to client'))
+
+    def test_listener_registers_accepted_peer(self):
+        host, client = self.make_tunnel(), self.make_tunnel()
+        port = host.start_listening(0, '127.0.0.1')
+
+        self.assertTrue(client.create_connection('127.0.0.1', port, transport='tcp'))
+        self.assertTrue(wait_for(lambda: '127.0.0.1' in host.active_connections))
+        self.assertEqual(host.active_connections['127.0.0.1']['role'], 'responder')
+
+        received = []
+        host.data_plane.packet_callback = lambda info, payload: received.append(payload)
+        outgoing = client.active_connections['127.0.0.1']
+        self.assertTrue(wait_for(lambda: 'stream_transport' in outgoing))
+        client.send_packet('127.0.0.1', b'frame')
+        self.assertTrue(wait_for(lambda: received))
+        self.assertEqual(received[0], b'frame')
+
+    def test_reconnect_closes_previous_tunnel(self):
+        host, client = self.make_tunnel(), self.make_tunnel()
+        port = host.start_listening(0, '127.0.0.1')
+
+        self.assertTrue(client.create_connection('127.0.0.1', port, transport='tcp'))
+        old = client.active_connections['127.0.0.1']
+        self.assertTrue(wait_for(lambda: 'stream_transport' in old))
+        self.assertTrue(client.create_connection('127.0.0.1', port, transport='tcp'))
+
+        self.assertIsNot(client.active_connections['127.0.0.1'], old)
+        self.assertEqual(old['status'], 'closed')
+        self.assertTrue(wait_for(lambda: old['socket'].fileno() == -1))
+
+class TestHostDatagramEndpoint(TunnelTestCase):
+    def test_udp_probe_is_answered_by_host(self):
+        host, client = self.make_tunnel(), self.make_tunnel()
+        port = host.start_listening(0, '127.0.0.1')
+
+        self.assertTrue(client.create_connection('127.0.0.1', port, transport='udp'))
+        self.assertEqual(client.active_connections['127.0.0.1']['transport'], 'udp')
+        accepted = host.active_connections['127.0.0.1']
+        self.assertTrue(wait_for(lambda: accepted['transport'] == 'udp'))
+
+        received = []
+        client.data_plane.packet_callback = lambda info, payload: received.append(payload)
+        host.send_packet('127.0.0.1', b'over udp')
+        self.assertTrue(wait_for(lambda: received))
+        self.assertEqual(received[0], b'over udp')
+
+    def test_udp_is_reprobed_after_fallback(self):
+        host, client = self.make_tunnel(), self.make_tunnel()
+        port = host.start_listening(0, '127.0.0.1')
+        self.assertTrue(client.create_connection('127.0.0.1', port, transport='udp'))
+        outgoing = client.active_connections['127.0.0.1']
+        self.assertTrue(wait_for(lambda: 'datagram_transport' in outgoing))
+
+        now = time.monotonic()
+        check = client.data_plane._check_paths
+        client.data_plane.loop.call_soon_threadsafe(check, now + 100.0)  # UDP looks silent
+        self.assertTrue(wait_for(lambda: outgoing['transport'] == 'tcp'))
+        client.data_plane.loop.call_soon_threadsafe(check, now + 1000.0)  # Retry is due
+        self.assertTrue(wait_for(lambda: outgoing['transport'] == 'udp'))
+
+    def test_unknown_sender_is_ignored(self):
+        host = self.make_tunnel()
+        port = host.start_listening(0, '127.0.0.1')
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as stranger:
+            stranger.settimeout(0.3)
+            stranger.sendto(b'\x02' + bytes(40), ('127.0.0.1', port))
+            with self.assertRaises(socket.timeout):
+                stranger.recv(65535)
+
+if __name__ == '__main__':
+    unittest.main()
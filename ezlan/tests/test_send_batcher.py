@@ -0,0 +1,80 @@
+import socket
+import time
+import unittest
+from ezlan.network.send_batcher import BatchingStage, SendBatcher, _sendmmsg
+
+class UDPTestCase(unittest.TestCase):
+    def udp_pair(self):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(0.2)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.connect(receiver.getsockname())
+        self.addCleanup(receiver.close)
+        self.addCleanup(sender.close)
+        return sender, receiver
+
+    def drain(self, receiver):
+        received = []
+        try:
+            while True:
+                received.append(receiver.recv(64))
+        except socket.timeout:
+            return received
+
+class TestSendBatcher(UDPTestCase):
+    def test_datagrams_from_any_buffer_type(self):
+        sender, receiver = self.udp_pair()
+        batcher = SendBatcher(sender)
+        packets = [b'bytes', bytearray(b'bytearray'), memoryview(b'xxmemoryview')[2:]]
+        for packet in packets:
+            batcher.add(packet)
+        batcher.flush()
+        self.assertEqual(self.drain(receiver), [b'bytes', b'bytearray', b'memoryview'])
+        self.assertEqual(batcher.stats.batch_sizes[3], 1)
+
+    @unittest.skipIf(_sendmmsg is None, "sendmmsg is Linux only")
+    def test_sendmmsg_sends_whole_batch(self):
+        sender, receiver = self.udp_pair()
+        batcher = SendBatcher(sender)
+        for i in range(10):
+            batcher.add(bytes([i]) * 8)
+        batcher.flush()
+        self.assertEqual(self.drain(receiver), [bytes([i]) * 8 for i in range(10)])
+
+class TestBatchingStage(UDPTestCase):
+    def test_window_flushes_pending_batch(self):
+        sender, receiver = self.udp_pair()
+        stage = BatchingStage(window=0.005)
+        self.addCleanup(stage.stop)
+        stage.submit(sender, b'one')
+        stage.submit(sender, b'two')
+        self.assertEqual(self.drain(receiver), [b'one', b'two'])
+
+    def test_clear_drops_stale_deadlines(self):
+        old_sender, old_receiver = self.udp_pair()
+        new_sender, _ = self.udp_pair()
+        stage = BatchingStage(window=0.01)
+        self.addCleanup(stage.stop)
+        stage.submit(old_sender, b'pending')
+        old_batcher = stage.batchers[old_sender]
+        stage.clear()
+        self.assertEqual(stage._deadlines, [])
+        self.assertEqual(self.drain(old_receiver), [b'pending'])  # Flushed by clear
+
+        old_batcher.add(b'late')  # Nothing may flush a forgotten batcher
+        stage.submit(new_sender, b'restart')
+        time.sleep(0.05)
+        self.assertEqual(self.drain(old_receiver), [])
+
+    def test_remove_drops_destination_deadline(self):
+        sender, receiver = self.udp_pair()
+        stage = BatchingStage(window=1.0)
+        self.addCleanup(stage.stop)
+        stage.submit(sender, b'pending')
+        stage.remove(sender)
+        self.assertEqual(stage._deadlines, [])
+        self.assertEqual(self.drain(receiver), [b'pending'])
+
+if __name__ == '__main__':
+    unittest.main()
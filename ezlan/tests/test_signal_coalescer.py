@@ -0,0 +1,35 @@
+import unittest
+from ezlan.network.signal_coalescer import SignalCoalescer
+
+class RecordingSignal:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, *args):
+        self.emitted.append(args)
+
+class TestSignalCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.signal = RecordingSignal()
+        self.coalescer = SignalCoalescer(self.signal, max_rate=1)
+        self.addCleanup(self.coalescer.stop)
+
+    def test_latest_value_per_key_wins(self):
+        for i in range(100):
+            self.coalescer.post('alice', 'alice', float(i))
+        self.coalescer.post('bob', 'bob', 1.0)
+        self.assertEqual(self.coalescer.backlog, 2)
+
+        self.coalescer.flush()
+        self.assertEqual(sorted(self.signal.emitted), [('alice', 99.0), ('bob', 1.0)])
+        self.assertEqual(self.coalescer.superseded, 99)
+        self.assertEqual(self.coalescer.backlog, 0)
+
+    def test_discarded_key_is_not_delivered(self):
+        self.coalescer.post('alice', 'alice', 1.0)
+        self.coalescer.discard('alice')
+        self.coalescer.flush()
+        self.assertEqual(self.signal.emitted, [])
+
+if __name__ == '__main__':
+    unittest.main()
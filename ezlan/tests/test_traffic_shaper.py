@@ -0,0 +1,58 @@
+import threading
+import time
+import unittest
+from ezlan.network.codel import DEFAULT_TARGET
+from ezlan.network.traffic_shaper import QoSPolicy, TrafficShaper
+
+class TestTrafficShaper(unittest.TestCase):
+    def setUp(self):
+        self.output = []
+        self.done = threading.Event()
+        self.expected = 0
+
+    def _collect(self, user_name, packet):
+        self.output.append((user_name, time.monotonic()))
+        if len(self.output) == self.expected:
+            self.done.set()
+
+    def _make_shaper(self, link_rate=0):
+        shaper = TrafficShaper(link_rate=link_rate)
+        shaper.output_callback = self._collect
+        self.addCleanup(shaper.stop)
+        return shaper
+
+    def test_rate_limit(self):
+        shaper = self._make_shaper()
+        shaper.add_connection('bulk', QoSPolicy(bandwidth_limit=100000))
+        shaper.packet_queues['bulk'].target = 1.0  # measure the rate alone, without AQM drops
+        self.expected = 30
+        for _ in range(self.expected):
+            shaper.enqueue_packet('bulk', b'x' * 1000)
+        start = time.monotonic()
+        shaper.start()
+        self.assertTrue(self.done.wait(2.0))
+        # 3000 byte burst, then 27000 bytes at 100000 B/s
+        self.assertAlmostEqual(self.output[-1][1] - start, 0.27, delta=0.05)
+
+    def test_strict_priority_under_link_limit(self):
+        shaper = self._make_shaper(link_rate=200000)
+        shaper.add_connection('bulk', QoSPolicy(priority=1))
+        shaper.add_connection('game', QoSPolicy(priority=7))
+        self.expected = 10
+        for _ in range(5):
+            shaper.enqueue_packet('bulk', b'b' * 1000)
+        for _ in range(5):
+            shaper.enqueue_packet('game', b'g' * 1000)
+        shaper.start()
+        self.assertTrue(self.done.wait(2.0))
+        self.assertEqual([user for user, _ in self.output], ['game'] * 5 + ['bulk'] * 5)
+
+    def test_best_effort_restores_default_codel_target(self):
+        shaper = self._make_shaper()
+        shaper.add_connection('game', QoSPolicy(latency_target=4.0))
+        self.assertAlmostEqual(shaper.packet_queues['game'].target, 0.001)
+        shaper.update_policy('game', QoSPolicy())
+        self.assertEqual(shaper.packet_queues['game'].target, DEFAULT_TARGET)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from ezlan.network.trend_forecaster import HoltForecaster
+
+class TestHoltForecaster(unittest.TestCase):
+    def test_tracks_linear_trend_per_row(self):
+        forecaster = HoltForecaster(('latency',))
+        for name in ('rising', 'flat', 'gone'):
+            forecaster.add(name)
+        forecaster.remove('gone')
+        self.assertEqual(forecaster.names, ['rising', 'flat'])
+
+        for t in range(100):
+            forecaster.update(np.array([[20.0 + 2.0 * t], [30.0]]))
+        point, lower, upper = forecaster.forecast(10)
+        self.assertAlmostEqual(forecaster.trend[0, 0], 2.0, places=2)
+        self.assertAlmostEqual(point[0, 0], 20.0 + 2.0 * 109, delta=0.5)
+        self.assertAlmostEqual(point[1, 0], 30.0)
+        self.assertTrue(np.all(lower <= point) and np.all(point <= upper))
+
+    def test_interval_widens_with_noise_and_horizon(self):
+        forecaster = HoltForecaster(('latency',))
+        forecaster.add('noisy')
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            forecaster.update(np.array([[50.0 + rng.normal(0, 5)]]))
+        _, lower1, upper1 = forecaster.forecast(1)
+        _, lower10, upper10 = forecaster.forecast(10)
+        self.assertGreater(upper1[0, 0] - lower1[0, 0], 10.0)
+        self.assertGreater(upper10[0, 0] - lower10[0, 0], upper1[0, 0] - lower1[0, 0])
+
+    def test_masked_rows_unchanged(self):
+        forecaster = HoltForecaster(('latency',))
+        forecaster.add('a')
+        forecaster.add('b')
+        forecaster.update(np.array([[10.0], [10.0]]))
+        forecaster.update(np.array([[20.0], [99.0]]), np.array([True, False]))
+        self.assertEqual(forecaster.level[1, 0], 10.0)
+        self.assertEqual(list(forecaster.samples), [2, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+from ezlan.gui.components.user_list import PeerListModel
+
+def peer(name, ip='10.0.0.1'):
+    return {'name': name, 'ip': ip, 'type': 'presence'}
+
+class TestPeerListModel(unittest.TestCase):
+    def setUp(self):
+        self.model = PeerListModel()
+        self.events = []
+        self.model.rowsInserted.connect(lambda parent, first, last: self.events.append(('insert', first, last)))
+        self.model.rowsRemoved.connect(lambda parent, first, last: self.events.append(('remove', first, last)))
+        self.model.dataChanged.connect(lambda top, bottom: self.events.append(('change', top.row(), bottom.row())))
+
+    def test_new_peers_inserted_as_one_block(self):
+        self.model.apply({name: peer(name) for name in ('a', 'b', 'c')})
+        self.assertEqual(self.events, [('insert', 0, 2)])
+        self.assertEqual(self.model.rowCount(), 3)
+
+    def test_unchanged_peers_cause_no_notifications(self):
+        self.model.apply({'a': peer('a')})
+        self.events.clear()
+        self.model.apply({'a': peer('a')})
+        self.assertEqual(self.events, [])
+
+    def test_update_and_remove_by_key(self):
+        self.model.apply({name: peer(name) for name in ('a', 'b', 'c')})
+        self.events.clear()
+        self.model.apply({'c': peer('c', '10.0.0.9')}, {'a'})
+        self.assertEqual(self.events, [('remove', 0, 0), ('change', 1, 1)])
+        self.assertEqual(self.model.names(), ['b', 'c'])
+        self.assertEqual(self.model.data(self.model.index(1)), 'c (10.0.0.9)')
+
+if __name__ == '__main__':
+    unittest.main()